@@ -0,0 +1,265 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+
+from UnifiedScan import UnifiedScraper, EmailExtractor, PDFExtractor, SensitiveFileExtractor
+from Sitemap import sitemap_seeds, seed_frontier
+from ScanArgs import scan_parser, scan_args, open_state, open_sink, open_visited, open_fetcher, open_metrics, open_matcher
+
+# name -> (extractor class, the options it takes besides state and sink)
+EXTRACTORS = {
+    'emails': (EmailExtractor, ()),
+    'pdfs': (PDFExtractor, ('probe',)),
+    'files': (SensitiveFileExtractor, ('probe', 'matcher')),
+}
+
+
+def extractor_names(text):
+    """Names from a comma-separated --extract value"""
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+
+def make_extractors(names, start_url, fetcher, state=None, sink=None, probe=False, matcher=None):
+    """The named extractors for one site; probing and the file matcher go
+    only to the extractors that use them"""
+    options = {'probe': probe, 'matcher': matcher}
+    extractors = []
+    for name in names:
+        if name not in EXTRACTORS:
+            raise ValueError(f"unknown extractor: {name}")
+        cls, takes = EXTRACTORS[name]
+        extractors.append(cls(start_url, fetcher, state=state, sink=sink, **{key: options[key] for key in takes}))
+    return extractors
+
+
+def read_seeds(path):
+    """Start URLs from a file, one per line; blank lines and # comments are skipped"""
+    seeds = []
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith('#'):
+                continue
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            domain = urlparse(url).netloc
+            if domain not in seen:
+                seen.add(domain)
+                seeds.append(url)
+    return seeds
+
+
+class SiteSlot:
+    """Scheduling state of one site in a batch"""
+    def __init__(self, scraper, checkpoint_every=50):
+        self.scraper = scraper
+        self.domain = scraper.domain
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.idle = False  # frontier was empty at the last attempt
+        self.state = scraper.state
+        self.handled = 0
+        self.next_checkpoint = checkpoint_every
+
+    def draining(self):
+        """A site with a CrawlState stops claiming until it can checkpoint"""
+        return self.state is not None and self.handled >= self.next_checkpoint
+
+    def done(self):
+        return self.idle and self.in_flight == 0
+
+
+class BatchScheduler:
+    """Crawl many sites at once under one connection budget.
+
+    At most `connections` requests are in flight overall and at most
+    `per_host` per site, with request starts to one site `delay` seconds
+    apart. Free connections go to sites in round-robin order so a large
+    site cannot starve the others. Pages are parsed on this thread.
+    Sites with a CrawlState are checkpointed only while none of their
+    pages are in flight, as in ParsePipeline.
+    """
+    def __init__(self, scrapers, connections=16, per_host=1, delay=0.5, on_site_done=None,
+                 checkpoint_every=50):
+        self.slots = [SiteSlot(s, checkpoint_every) for s in scrapers]
+        self.checkpoint_every = checkpoint_every
+        self.connections = connections
+        self.per_host = per_host
+        self.delay = delay
+        self.on_site_done = on_site_done
+        self.turn = 0
+
+    def next_request(self, now):
+        """Pick the next site allowed to start a request, in round-robin order"""
+        count = len(self.slots)
+        for offset in range(count):
+            slot = self.slots[(self.turn + offset) % count]
+            if slot.done() or slot.draining() or slot.in_flight >= self.per_host or slot.next_start > now:
+                continue
+            url = slot.scraper.claim_next()
+            if url is None:
+                slot.idle = True
+                continue
+            slot.idle = False
+            self.turn = (self.turn + offset + 1) % count
+            return slot, url
+        return None, None
+
+    def run(self):
+        if not self.slots:
+            return
+        for slot in self.slots:
+            slot.scraper.fetcher.metrics.watch(slot.scraper.urls_to_visit)
+        pool = ThreadPoolExecutor(self.connections)
+        try:
+            self.schedule(pool)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            # Claimed but unfinished pages must be crawled again on --resume
+            for slot in self.slots:
+                if slot.state:
+                    slot.state.rollback()
+            raise
+        pool.shutdown()
+
+    def finish(self, slot):
+        self.slots.remove(slot)
+        if slot.state:
+            slot.state.checkpoint()
+        if self.on_site_done:
+            self.on_site_done(slot.scraper)
+
+    def schedule(self, pool):
+        pending = {}  # future -> (slot, url)
+        while self.slots:
+            now = time.monotonic()
+            while len(pending) < self.connections:
+                slot, url = self.next_request(now)
+                if slot is None:
+                    break
+                slot.in_flight += 1
+                slot.next_start = now + self.delay
+                pending[pool.submit(slot.scraper.fetch_page, url)] = (slot, url)
+
+            for slot in self.slots[:]:
+                if slot.done():
+                    self.finish(slot)
+                elif slot.draining() and slot.in_flight == 0:
+                    slot.state.checkpoint()
+                    slot.next_checkpoint = slot.handled + self.checkpoint_every
+            if not self.slots:
+                break
+
+            if not pending:
+                # Every remaining site is waiting out its delay
+                wake = min(s.next_start for s in self.slots)
+                time.sleep(max(0.0, wake - time.monotonic()))
+                continue
+
+            # Wake for a delay only if a site could start a request then;
+            # otherwise only a finished request frees anything
+            timeout = None
+            if len(pending) < self.connections:
+                waiting = [s.next_start for s in self.slots
+                           if s.next_start > now and s.in_flight < self.per_host
+                           and not s.idle and not s.draining()]
+                if waiting:
+                    timeout = max(0.0, min(waiting) - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                slot, url = pending.pop(future)
+                slot.in_flight -= 1
+                # Links from this page may refill an idle frontier
+                slot.idle = False
+                scraper = slot.scraper
+                try:
+                    response = future.result()
+                    page = scraper.fetcher.extract(response, scraper.parse_kind, scraper.parse_func)
+                    with scraper.fetcher.metrics.timer('extract'):
+                        scraper.handle_page(url, page)
+                    slot.handled += 1
+                except requests.RequestException as e:
+                    scraper.handle_error(url, e)
+
+
+def site_results(scraper):
+    results = {'site': scraper.start_url, 'pages': len(scraper.visited_urls)}
+    for extractor in scraper.extractors:
+        found = extractor.results()
+        if isinstance(found, dict):
+            results[extractor.name] = {url: sorted(sources) for url, sources in sorted(found.items())}
+        else:
+            results[extractor.name] = sorted(found)
+    return results
+
+
+def write_site_results(scraper, out_dir):
+    path = os.path.join(out_dir, scraper.domain.replace(':', '_') + '.json')
+    with open(path, 'w') as f:
+        json.dump(site_results(scraper), f, indent=2)
+    print(f"Finished {scraper.start_url}: results in {path}")
+
+
+if __name__ == "__main__":
+    parser = scan_parser("Scan every site listed in a seed file under one scheduler")
+    parser.add_argument('seeds', help='file with one start URL per line')
+    parser.add_argument('--out', default='batch_results', help='directory for per-site results (default: batch_results)')
+    parser.add_argument('--max-pages', type=int, default=50, help='page budget per site (default: 50)')
+    parser.add_argument('--connections', type=int, default=16, help='requests in flight overall (default: 16)')
+    parser.add_argument('--per-host', type=int, default=1, help='requests in flight per site (default: 1)')
+    parser.add_argument('--delay', type=float, default=0.5, help='seconds between request starts per site (default: 0.5)')
+    parser.add_argument('--extract', default='emails,pdfs,files',
+                        help='comma-separated extractors to run (default: emails,pdfs,files)')
+    args = scan_args(None, parser)
+
+    names = extractor_names(args.extract)
+    unknown = [n for n in names if n not in EXTRACTORS]
+    if unknown:
+        parser.error(f"unknown extractor(s): {', '.join(unknown)}")
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.state:
+        os.makedirs(args.state, exist_ok=True)
+
+    fetcher = open_fetcher(args)
+    reporter = open_metrics(args, fetcher)
+    fetcher.resize_pool(args.connections)
+    # One sink for every site; the source URL tells the sites apart
+    sink = open_sink(args)
+
+    matcher = open_matcher(args)
+    states = []
+    scrapers = []
+    for start_url in read_seeds(args.seeds):
+        domain = urlparse(start_url).netloc
+        # With --state each site keeps its own state file in that directory
+        state = open_state(args, os.path.join(args.state, domain.replace(':', '_') + '.db')) if args.state else None
+        if state:
+            states.append(state)
+        extractors = make_extractors(names, start_url, fetcher, state, sink, args.probe, matcher)
+        scraper = UnifiedScraper(start_url, args.max_pages, extractors, fetcher, state,
+                                 open_visited(args), open_visited(args))
+        scraper.max_page_bytes = args.max_page_size * 1024 * 1024
+        if args.priority:
+            scraper.scorer = scraper.priority_scorer()
+        if args.sitemap:
+            seed_frontier(scraper, sitemap_seeds(start_url, fetcher, scraper.headers, args.since))
+        scrapers.append(scraper)
+
+    scheduler = BatchScheduler(scrapers, args.connections, args.per_host, args.delay,
+                               on_site_done=lambda s: write_site_results(s, args.out))
+    try:
+        scheduler.run()
+    finally:
+        for state in states:
+            state.close()
+        if sink:
+            sink.close()
+        if reporter:
+            reporter.stop()
+        fetcher.close()
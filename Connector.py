@@ -0,0 +1,145 @@
+import socket
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+
+# The HTTP/2 client is optional, see Fetcher
+try:
+    import httpcore
+    import httpx
+except ImportError:
+    httpcore = httpx = None
+
+
+class Connector:
+    """Opens the TCP connections of one Fetcher, resolving host names
+    through its HostCache and timing the dns and connect phases into its
+    CrawlMetrics when given.
+
+    Fetcher mounts it on its own requests session (ResolvingAdapter) and
+    HTTP/2 client (resolving_transport); other clients in the process
+    keep resolving and connecting the usual way.
+    """
+    def __init__(self, hosts, metrics=None):
+        self.hosts = hosts
+        self.metrics = metrics
+
+    def open(self, host, port, connect, errors=(OSError,)):
+        """Return connect(address) for the first cached address of `host`
+        that accepts; the error of the last one is raised if none does"""
+        host = host.strip('[]')
+        family = connection.allowed_gai_family()
+        start = time.perf_counter()
+        infos = self.hosts.resolve(host, port, family)
+        self.observe('dns', start)
+
+        start = time.perf_counter()
+        error = None
+        for info in infos:
+            try:
+                sock = connect(info[4][0])
+            except errors as e:
+                error = e
+                continue
+            self.observe('connect', start)
+            return sock
+        # The cached addresses may be stale; resolve again next time
+        self.hosts.forget(host, port, family)
+        raise error or OSError('getaddrinfo returns an empty list')
+
+    def observe(self, phase, start):
+        if self.metrics is not None:
+            self.metrics.observe(phase, time.perf_counter() - start)
+
+
+class ResolvingConnection:
+    """Mixin for urllib3 connections that open their socket through a Connector"""
+    def __init__(self, *args, connector=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connector = connector
+
+    def _new_conn(self):
+        def connect(address):
+            return connection.create_connection((address, self.port), self.timeout,
+                                                source_address=self.source_address,
+                                                socket_options=self.socket_options)
+        # The same errors urllib3 raises for its own connections
+        try:
+            return self.connector.open(self._dns_host, self.port, connect)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+
+class ResolvingHTTPConnection(ResolvingConnection, HTTPConnection):
+    pass
+
+
+class ResolvingHTTPSConnection(ResolvingConnection, HTTPSConnection):
+    pass
+
+
+CONNECTION_CLASSES = {'http': ResolvingHTTPConnection, 'https': ResolvingHTTPSConnection}
+
+
+class ResolvingPoolManager(PoolManager):
+    """PoolManager whose pools open connections through `connector`"""
+    def __init__(self, *args, connector=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connector = connector
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        # Set on the pool rather than in connection_pool_kw, which also
+        # keys the pools and takes only urllib3's own arguments
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.ConnectionCls = CONNECTION_CLASSES[scheme]
+        pool.conn_kw['connector'] = self.connector
+        return pool
+
+
+class ResolvingAdapter(HTTPAdapter):
+    """requests adapter whose new connections are opened by `connector`"""
+    def __init__(self, connector, **kwargs):
+        self.connector = connector
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = ResolvingPoolManager(num_pools=connections, maxsize=maxsize, block=block,
+                                                connector=self.connector, **pool_kwargs)
+
+
+if httpcore is not None:
+    class ResolvingBackend(httpcore.SyncBackend):
+        """httpcore network backend that opens connections through `connector`"""
+        def __init__(self, connector):
+            self.connector = connector
+
+        def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            def connect(address):
+                return super(ResolvingBackend, self).connect_tcp(address, port, timeout, local_address,
+                                                                 socket_options)
+            try:
+                return self.connector.open(host, port, connect,
+                                           errors=(httpcore.ConnectError, httpcore.ConnectTimeout))
+            except OSError as e:
+                # Resolution failed; httpx maps only httpcore's errors
+                raise httpcore.ConnectError(str(e)) from e
+
+
+def resolving_transport(connector, **kwargs):
+    """An httpx HTTPTransport (taking its arguments) whose connections are opened by `connector`"""
+    transport = httpx.HTTPTransport(**kwargs)
+    # httpx has no public hook for the network backend of its pool
+    transport._pool._network_backend = ResolvingBackend(connector)
+    return transport
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+class FrontierQueue:
+    """deque-like queue of crawl items stored in SQLite.
+
+    Items pop lowest level first, then highest score and in insertion
+    order among equal scores, so an unscored queue is a plain FIFO.
+    """
+    def __init__(self, state):
+        self.db = state.db
+        self.size = self.count()
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM frontier').fetchone()[0]
+
+    def append(self, item, score=0.0, level=0):
+        self.db.execute('INSERT INTO frontier (item, score, level) VALUES (?, ?, ?)',
+                        (json.dumps(item), score, level))
+        self.size += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        row = self.db.execute('SELECT id, item FROM frontier ORDER BY level, score DESC, id LIMIT 1').fetchone()
+        if row is None:
+            raise IndexError('pop from an empty frontier')
+        self.db.execute('DELETE FROM frontier WHERE id = ?', (row[0],))
+        self.size -= 1
+        item = json.loads(row[1])
+        # Tuples come back from JSON as lists
+        return tuple(item) if isinstance(item, list) else item
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+
+class VisitedSet:
+    """set-like store of URLs kept in a SQLite table (visited or enqueued)"""
+    def __init__(self, state, table='visited'):
+        self.db = state.db
+        self.table = table
+        self.size = self.count()
+
+    def count(self):
+        return self.db.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def add(self, url):
+        cursor = self.db.execute(f'INSERT OR IGNORE INTO {self.table} (url) VALUES (?)', (url,))
+        self.size += cursor.rowcount
+
+    def __contains__(self, url):
+        return self.db.execute(f'SELECT 1 FROM {self.table} WHERE url = ?', (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for (url,) in self.db.execute(f'SELECT url FROM {self.table}'):
+            yield url
+
+
+class CrawlState:
+    """On-disk frontier, visited set and findings for one resumable scan.
+
+    Work is committed every `checkpoint_every` pages. A page interrupted
+    halfway is rolled back, so a resumed run re-fetches at most the pages
+    done since the last checkpoint.
+    """
+    def __init__(self, path, checkpoint_every=50, resume=True):
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.pages = 0
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS frontier (id INTEGER PRIMARY KEY AUTOINCREMENT, item TEXT, '
+                        'score REAL NOT NULL DEFAULT 0, level INTEGER NOT NULL DEFAULT 0)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS frontier_order ON frontier (level, score DESC, id)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS enqueued (url TEXT PRIMARY KEY)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS findings (kind TEXT, value TEXT, source TEXT, '
+                        'PRIMARY KEY (kind, value, source))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.db.execute('BEGIN')
+        self.queue = FrontierQueue(self)
+        self.visited = VisitedSet(self)
+        self.enqueued = VisitedSet(self, 'enqueued')
+
+    def is_new(self):
+        return not self.queue and not len(self.visited)
+
+    def get_meta(self, key, default=None):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def add_finding(self, kind, value, source=''):
+        self.db.execute('INSERT OR IGNORE INTO findings (kind, value, source) VALUES (?, ?, ?)',
+                        (kind, value, source))
+
+    def findings(self, kind):
+        """Yield (value, source) pairs recorded for `kind`"""
+        yield from self.db.execute('SELECT value, source FROM findings WHERE kind = ?', (kind,)).fetchall()
+
+    @contextmanager
+    def page(self):
+        """Group the queue/visited/findings updates of one page"""
+        self.db.execute('SAVEPOINT page')
+        try:
+            yield
+        except BaseException:
+            # Keep everything up to the previous page, drop this one
+            self.db.execute('ROLLBACK TO page')
+            self.db.execute('RELEASE page')
+            self.recount()
+            self.checkpoint()
+            raise
+        self.db.execute('RELEASE page')
+        self.pages += 1
+        if self.pages % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.db.execute('COMMIT')
+        self.db.execute('BEGIN')
+
+    def rollback(self):
+        """Discard everything since the last checkpoint"""
+        self.db.execute('ROLLBACK')
+        self.db.execute('BEGIN')
+        self.recount()
+
+    def recount(self):
+        self.queue.size = self.queue.count()
+        self.visited.size = self.visited.count()
+        self.enqueued.size = self.enqueued.count()
+
+    def close(self):
+        self.db.execute('COMMIT')
+        self.db.close()
+
@@ -0,0 +1,212 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from BatchScan import EXTRACTORS, extractor_names, make_extractors, read_seeds
+from UnifiedScan import UnifiedScraper
+from UrlCanon import canonicalize
+from Sitemap import sitemap_seeds
+from ScanArgs import scan_parser, scan_args, open_visited, open_fetcher, open_metrics, open_matcher
+from WorkQueue import WorkQueue, serve_queue, open_queue
+
+
+class QueueSink:
+    """Collects the findings of a page until they are sent with WorkQueue.complete()"""
+    def __init__(self):
+        self.rows = []
+
+    def write(self, kind, value, source=''):
+        self.rows.append((kind, value, source))
+
+    def take(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class WorkerScraper(UnifiedScraper):
+    """A UnifiedScraper whose frontier is a shared WorkQueue: the links of
+    each page are collected for the queue instead of being crawled here"""
+    def __init__(self, start_url, extractors, fetcher, enqueued=None):
+        self.links = []
+        super().__init__(start_url, 0, extractors, fetcher, enqueued=enqueued)
+
+    def enqueue(self, url, score=0.0):
+        # Only a local filter; the queue dedupes across workers
+        if url not in self.enqueued:
+            self.enqueued.add(url)
+            self.links.append((url, score))
+
+    def take_links(self):
+        links, self.links = self.links, []
+        return links
+
+
+def make_scraper(args, start_url, fetcher, sink, matcher):
+    extractors = make_extractors(extractor_names(args.extract), start_url, fetcher, sink=sink,
+                                 probe=args.probe, matcher=matcher)
+    scraper = WorkerScraper(start_url, extractors, fetcher, open_visited(args))
+    scraper.max_page_bytes = args.max_page_size * 1024 * 1024
+    if args.priority:
+        scraper.scorer = scraper.priority_scorer()
+    return scraper
+
+
+def run_worker(args):
+    """Lease URLs from the queue and crawl them until no site has work left"""
+    owner = f'{socket.gethostname()}-{os.getpid()}'
+    queue = open_queue(args.queue)
+    fetcher = open_fetcher(args)
+    reporter = open_metrics(args, fetcher)
+    sink = QueueSink()
+    matcher = open_matcher(args)
+    sites = queue.sites()
+    scrapers = {}
+    pages = 0
+    print(f"Worker {owner} started")
+    try:
+        while True:
+            batch = queue.lease(owner, args.batch, args.lease)
+            if not batch:
+                # Pages leased by other workers may still add links, and
+                # the leases of dead workers come back as ready
+                progress = queue.progress()
+                if not progress['ready'] and not progress['leased']:
+                    break
+                time.sleep(1)
+                continue
+            for url, site in batch:
+                if site not in scrapers:
+                    if site not in sites:
+                        sites = queue.sites()
+                    scrapers[site] = make_scraper(args, sites[site]['start_url'], fetcher, sink, matcher)
+                scraper = scrapers[site]
+                if not fetcher.allowed(url):
+                    print(f"Skipping disallowed URL: {url}")
+                    queue.complete(owner, url, ttl=args.lease, skipped=True)
+                    continue
+                print(f"Scraping: {url}")
+                scraper.get_all_links(url)
+                queue.complete(owner, url, scraper.take_links(), sink.take(), args.lease)
+                pages += 1
+    except KeyboardInterrupt:
+        print("\nInterrupted! Leased URLs go back to the queue.")
+    except requests.ConnectionError as e:
+        # A remote coordinator shuts down once every site is done
+        print(f"Work queue closed: {e}")
+    finally:
+        try:
+            queue.release(owner)
+        except requests.ConnectionError:
+            pass  # its leases run out on the coordinator instead
+        queue.close()
+        if reporter:
+            reporter.stop()
+        fetcher.close()
+    print(f"Worker {owner} finished: {pages} pages")
+
+
+def write_results(queue, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    for site, info in sorted(queue.sites().items()):
+        pages, found = queue.results(site)
+        results = {'site': info['start_url'], 'pages': pages}
+        # Findings are keyed by the extractor names, e.g. 'email' -> 'emails'
+        results.update((kind + 's', values) for kind, values in found.items())
+        path = os.path.join(out_dir, site.replace(':', '_') + '.json')
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Finished {info['start_url']}: results in {path}")
+
+
+def run_coordinator(args):
+    """Seed the queue, serve it and wait until every site is done, or until
+    every worker has exited with work left and no remote worker can come"""
+    queue = WorkQueue(args.queue)
+    fetcher = open_fetcher(args) if args.sitemap else None
+    for start_url in read_seeds(args.seeds):
+        start_url = canonicalize(start_url)
+        site = urlparse(start_url).netloc
+        queue.add_site(site, start_url, args.max_pages)
+        if fetcher:
+            links = [(url, 0.0) for url in map(canonicalize, sitemap_seeds(start_url, fetcher, None, args.since))
+                     if urlparse(url).netloc == site]
+            queue.push(site, links)
+            print(f"Queued {len(links)} URLs from sitemaps")
+    if fetcher:
+        fetcher.close()
+
+    server = None
+    if args.port is not None:
+        server = serve_queue(queue, args.port, args.host)
+        print(f"Serving the work queue on http://{args.host}:{server.server_address[1]}")
+
+    # Spawned rather than forked, so no worker inherits open connections
+    context = multiprocessing.get_context('spawn')
+    worker_args = argparse.Namespace(**vars(args))
+    worker_args.metrics_port = None
+    workers = [context.Process(target=run_worker, args=(worker_args,)) for _ in range(args.spawn)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        while True:
+            progress = queue.progress()
+            print(f"Queue: {json.dumps(progress)}")
+            if not progress['ready'] and not progress['leased']:
+                break
+            if workers and not any(worker.is_alive() for worker in workers):
+                codes = ', '.join(str(worker.exitcode) for worker in workers)
+                if server is None:
+                    print(f"Every worker has exited (exit codes {codes}) with work left; "
+                          f"rerun the coordinator to continue.")
+                    break
+                print(f"Every spawned worker has exited (exit codes {codes}); waiting for remote workers.")
+                workers = []  # reported once; they need no join
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        print("\nInterrupted! The queue keeps its progress; rerun the coordinator to continue.")
+    for worker in workers:
+        worker.join()
+    if server:
+        server.shutdown()
+    write_results(queue, args.out)
+    queue.close()
+
+
+if __name__ == "__main__":
+    parser = scan_parser("Crawl sites with worker processes on one or more machines sharing a work queue")
+    parser.add_argument('role', choices=('coordinator', 'worker'))
+    parser.add_argument('seeds', nargs='?', help='coordinator: file with one start URL per line')
+    parser.add_argument('--queue', default='crawl_queue.db',
+                        help='SQLite work queue; a worker may give the coordinator\'s http:// URL instead '
+                             '(default: crawl_queue.db)')
+    parser.add_argument('--max-pages', type=int, default=50, help='coordinator: page budget per site (default: 50)')
+    parser.add_argument('--spawn', type=int, default=0,
+                        help='coordinator: worker processes to start on this machine (default: 0)')
+    parser.add_argument('--port', type=int, help='coordinator: serve the queue to remote workers on this port')
+    parser.add_argument('--host', default='127.0.0.1', help='coordinator: address to serve on (default: 127.0.0.1)')
+    parser.add_argument('--poll', type=float, default=5, help='coordinator: seconds between progress lines (default: 5)')
+    parser.add_argument('--out', default='distributed_results',
+                        help='coordinator: directory for per-site results (default: distributed_results)')
+    parser.add_argument('--batch', type=int, default=10, help='worker: URLs leased at a time (default: 10)')
+    parser.add_argument('--lease', type=float, default=120,
+                        help='worker: seconds before URLs leased by a silent worker are handed out again (default: 120)')
+    parser.add_argument('--extract', default='emails,pdfs,files',
+                        help='worker: comma-separated extractors to run (default: emails,pdfs,files)')
+    args = scan_args(None, parser)
+
+    unknown = [n for n in extractor_names(args.extract) if n not in EXTRACTORS]
+    if unknown:
+        parser.error(f"unknown extractor(s): {', '.join(unknown)}")
+    if args.role == 'coordinator':
+        if not args.seeds:
+            parser.error('the coordinator needs a seed file')
+        run_coordinator(args)
+    else:
+        run_worker(args)
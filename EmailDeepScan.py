@@ -1,185 +1,363 @@
 import requests
-from urllib.parse import urlparse, urljoin, urlunparse
-from urllib.robotparser import RobotFileParser
-from bs4 import BeautifulSoup
-import re
-from collections import deque
-from xml.etree import ElementTree as ET
+from urllib.parse import urlparse, urljoin
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import time
+from Fetcher import get_fetcher, MAX_PAGE_BYTES
+from LinkParser import extract_hrefs, extract_links
+from UrlCanon import canonicalize
+from Frontier import PriorityFrontier, UrlScorer, EMAIL_KEYWORDS
+import EmailExtract
+from Sitemap import SitemapReader, parse_sitemap
+from ScanArgs import scan_args, open_state, open_sink, open_visited, open_fetcher, open_metrics
+
+class HostThrottle:
+    """Per-host rate limit: request starts to one host are `delay` seconds apart"""
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_slot = {}
+        self.locks = {}
+
+    async def wait(self, host):
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 
 class EmailScraper:
-    def __init__(self, base_url):
+    def __init__(self, base_url, fetcher=None, state=None, visited=None, sink=None, enqueued=None):
         self.base_url = base_url
-        self.base_domain = urlparse(base_url).netloc
-        self.visited = set()
-        self.queue = deque()
+        self.base_domain = urlparse(canonicalize(base_url)).netloc
+        self.state = state
+        self.sink = sink
+        if state:
+            self.visited = state.visited
+            self.queue = state.queue
+            self.enqueued = state.enqueued
+        else:
+            self.visited = visited if visited is not None else set()
+            self.queue = PriorityFrontier()
+            self.enqueued = enqueued if enqueued is not None else set()
         self.broken_links = set()
         self.emails = set()
+        if state:
+            self.emails.update(email for email, _ in state.findings('email'))
+            self.broken_links.update(url for url, _ in state.findings('broken'))
         self.sitemaps = []
+        self.sitemap_since = None
         self.headers = {
             'User-Agent': 'EmailScraperBot/1.0',
             'Accept': 'text/html,application/xhtml+xml,application/xml',
             'Accept-Language': 'en-US,en;q=0.5',
         }
-        self.robot_parser = None
+        self.robots = None  # RobotsRules from the fetcher's HostCache
+        self.crawl_delay = None
+        self.fetcher = fetcher or get_fetcher()
+        self.max_page_bytes = MAX_PAGE_BYTES
+        self.scorer = None  # a UrlScorer orders each depth level best-first
     
     def init_robots_parser(self):
-        robots_url = urljoin(self.base_url, '/robots.txt')
-        try:
-            # Fetch robots.txt manually
-            response = requests.get(robots_url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                # Create parser and parse content
-                self.robot_parser = RobotFileParser()
-                self.robot_parser.parse(response.text.splitlines())
-                print(f"Parsed robots.txt for {self.base_domain}")
-                
-                # Extract sitemaps from robots.txt content
-                for line in response.text.splitlines():
-                    if line.strip().lower().startswith('sitemap:'):
-                        sitemap_url = line.split(':', 1)[1].strip()
-                        self.sitemaps.append(sitemap_url)
-        except Exception as e:
-            print(f"Robots.txt error: {str(e)}")
+        # Shared with the other scanners and cached across runs by the fetcher
+        self.robots = self.fetcher.robots(self.base_url)
+        self.crawl_delay = self.robots.crawl_delay()
+        self.sitemaps.extend(self.robots.sitemaps)
+        print(f"Parsed robots.txt for {self.base_domain}")
 
     def is_allowed(self, url):
-        if self.robot_parser:
-            try:
-                return self.robot_parser.can_fetch('*', url)
-            except:
-                return True
-        return True
+        if self.robots is None:
+            return True
+        return self.robots.allowed(url)
 
     def normalize_url(self, url):
-        parsed = urlparse(url)
-        # Remove fragments and normalize
-        normalized = urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', parsed.query, ''))
-        return normalized.rstrip('/')
+        # Canonical form, without the trailing slash
+        return canonicalize(url).rstrip('/')
+
+    def is_new_link(self, url):
+        """True the first time a URL is offered for the queue"""
+        if url in self.enqueued:
+            return False
+        self.enqueued.add(url)
+        return True
 
     def extract_emails(self, text):
-        # Robust email regex pattern
-        pattern = r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b'
-        return set(re.findall(pattern, text))
+        return EmailExtract.extract_emails(text)
 
     def get_links(self, url, html):
-        # Try different parsers if lxml is not available
-        try:
-            soup = BeautifulSoup(html, 'lxml')
-        except:
-            try:
-                soup = BeautifulSoup(html, 'html.parser')
-            except Exception as e:
-                print(f"HTML parsing failed: {str(e)}")
-                return set()
-        
+        return self.resolve_links(url, extract_hrefs(html, ('a', 'link')))
+
+    def resolve_links(self, url, hrefs):
         links = set()
         
-        for tag in soup.find_all(['a', 'link'], href=True):
-            href = tag['href'].strip()
+        for href in hrefs:
+            href = href.strip()
             if any(href.startswith(prefix) for prefix in 
                   ('mailto:', 'tel:', 'javascript:', '#')):
                 continue
             
             # Handle relative URLs
             absolute_url = urljoin(url, href)
-            parsed = urlparse(absolute_url)
             
             # Normalize and filter
             normalized = self.normalize_url(absolute_url)
-            if parsed.netloc == self.base_domain:
+            if urlparse(normalized).netloc == self.base_domain:
                 links.add(normalized)
                 
         return links
 
+    def parse_page(self, html):
+        page = extract_links(html, ('a', 'link'))
+        page['emails'] = sorted(self.extract_emails(html))
+        return page
+
+    def link_score(self, url, text='', parent_hits=0):
+        return self.scorer.score(url, text, parent_hits) if self.scorer else 0.0
+
     def parse_sitemap(self, content):
-        urls = set()
+        return parse_sitemap(content)
+
+    def fetch(self, url):
+        # Only HTML pages and sitemaps are parsed; anything else is dropped
+        # before its body is downloaded
+        content_types = None if 'sitemap' in url else ('html', 'xml')
+        return self.fetcher.get(url, headers=self.headers, timeout=15,
+                                max_bytes=self.max_page_bytes, content_types=content_types)
+
+    def seed_queue(self):
+        # A resumed run continues from the saved frontier
+        if self.state and not self.state.is_new():
+            return
+
+        # Start with base URL, then every page the sitemaps list (streamed,
+        # indexes followed, newest lastmod first)
+        base_url = self.normalize_url(self.base_url)
+        if self.is_new_link(base_url):
+            self.queue.append((base_url, 0))
+        sitemaps = [s for s in self.sitemaps if urlparse(canonicalize(s)).netloc == self.base_domain]
+        if sitemaps:
+            reader = SitemapReader(self.fetcher, self.headers, self.sitemap_since)
+            for url in reader.urls(sitemaps, self.base_domain):
+                url = self.normalize_url(url)
+                if self.is_new_link(url):
+                    self.queue.append((url, 0), self.link_score(url))
+
+    def process_response(self, url, depth, response):
+        """Extract emails and return the (url, depth, score) triples to enqueue next"""
+        kind, parsed = self.parse_response(url, response)
+        return self.process_parsed(url, depth, kind, parsed)
+
+    def parse_response(self, url, response):
+        """Parse a sitemap or HTML page into ('sitemap', urls) or ('html', page).
+
+        Touches no crawl state, so the async crawl runs it off the event loop.
+        """
+        response.raise_for_status()
+
+        # Handle different content types
+        content_type = response.headers.get('Content-Type', '').lower()
+        if 'sitemap' in url or 'xml' in content_type:
+            return 'sitemap', self.parse_sitemap(response.content)
+        if 'html' in content_type:
+            return 'html', self.fetcher.extract(response, 'EmailDeepScan+scripts', self.parse_page)
+        return None, None
+
+    def process_parsed(self, url, depth, kind, parsed):
+        """Record a parse_response() result and return the triples to enqueue next"""
+        new_items = []
+
+        # Process sitemaps
+        if kind == 'sitemap':
+            for new_url in parsed or ():
+                normalized = self.normalize_url(new_url)
+                if urlparse(normalized).netloc == self.base_domain:
+                    if self.is_new_link(normalized):
+                        new_items.append((normalized, depth, self.link_score(normalized)))
+
+        # Process HTML content
+        elif kind == 'html':
+            with self.fetcher.metrics.timer('extract'):
+                new_items = self.process_page(url, depth, parsed)
+
+        return new_items
+
+    def process_page(self, url, depth, page):
+        """Record the emails of a parsed page and return its new links"""
+        new_items = []
+
+        # Extract emails
+        new_emails = set(page['emails'])
+        if new_emails:
+            if self.sink:
+                for email in sorted(new_emails - self.emails):
+                    self.sink.write('email', email, url)
+            self.emails.update(new_emails)
+            if self.state:
+                for email in new_emails:
+                    self.state.add_finding('email', email, url)
+            print(f"Found {len(new_emails)} emails at {url}")
+
+        # Extract links
+        texts = {}
+        for href, text in page.get('anchors', {}).items():
+            texts.setdefault(self.normalize_url(urljoin(url, href.strip())), text)
+        links = self.resolve_links(url, page['hrefs'])
+        for link in links:
+            if self.is_new_link(link):
+                new_items.append((link, depth + 1, self.link_score(link, texts.get(link, ''), len(new_emails))))
+        self.fetcher.metrics.count_links(len(links), len(links) - len(new_items))
+
+        return new_items
+
+    def handle_error(self, url, e):
+        if getattr(e, 'response', None) is not None:
+            if e.response.status_code == 404:
+                self.broken_links.add(url)
+                if self.state:
+                    self.state.add_finding('broken', url)
+                if self.sink:
+                    self.sink.write('broken', url)
+        print(f"Error ({url}): {str(e)}")
+
+    def claim(self, url, depth, max_depth):
+        """Mark url as visited; return False if it should not be fetched"""
+        if depth > max_depth:
+            return False
+        if url in self.visited:
+            return False
+
+        self.visited.add(url)
+
+        if not self.is_allowed(url):
+            print(f"Skipping disallowed URL: {url}")
+            return False
+        return True
+
+    def pacing_delay(self, delay):
+        """Seconds to wait between page requests, at least the Crawl-delay.
+
+        With a RateController on the fetcher the delay becomes the host's
+        base delay there and the crawl loops do not wait themselves.
+        """
+        delay = max(delay, self.crawl_delay or 0.0)
+        if self.fetcher.rate is not None:
+            self.fetcher.rate.set_delay(self.base_domain, delay)
+            return 0.0
+        return delay
+
+    def page_scope(self):
+        return self.state.page() if self.state else nullcontext()
+
+    def crawl(self, max_depth=5, delay=1.0, concurrency=1):
+        self.fetcher.metrics.watch(self.queue)
         try:
-            root = ET.fromstring(content)
-            # Handle different sitemap formats
-            namespace = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-            
-            # Sitemap index
-            for elem in root.findall('sm:sitemap/sm:loc', namespace) or \
-                        root.findall('sitemap/loc'):
-                if elem.text:
-                    urls.add(elem.text.strip())
-            
-            # URL set
-            for elem in root.findall('sm:url/sm:loc', namespace) or \
-                        root.findall('url/loc'):
-                if elem.text:
-                    urls.add(elem.text.strip())
-                    
-        except ET.ParseError:
-            # Handle plain text sitemap
-            for line in content.splitlines():
-                clean_line = line.strip()
-                if clean_line and not clean_line.startswith('#'):
-                    urls.add(clean_line)
-                    
-        return urls
+            if concurrency > 1:
+                asyncio.run(self.crawl_async(max_depth, delay, concurrency))
+            else:
+                self.crawl_sequential(max_depth, delay)
+        except KeyboardInterrupt:
+            if not self.state:
+                raise
+            print("\nInterrupted! Progress saved, rerun with --resume to continue.")
+        if self.state:
+            self.state.checkpoint()
 
-    def crawl(self, max_depth=5, delay=1.0):
+    def crawl_sequential(self, max_depth=5, delay=1.0):
         self.init_robots_parser()
-        
-        # Start with base URL and sitemaps
-        self.queue.append((self.base_url, 0))
-        for sitemap in self.sitemaps:
-            if urlparse(sitemap).netloc == self.base_domain:
-                self.queue.append((sitemap, 0))
+        delay = self.pacing_delay(delay)
+        self.seed_queue()
         
         while self.queue:
-            url, depth = self.queue.popleft()
-            
-            if depth > max_depth:
-                continue
-            if url in self.visited:
-                continue
-                
-            self.visited.add(url)
-            
-            if not self.is_allowed(url):
-                print(f"Skipping disallowed URL: {url}")
-                continue
-                
-            try:
-                print(f"Crawling ({depth}): {url}")
-                response = requests.get(url, headers=self.headers, timeout=15)
-                response.raise_for_status()
-                
-                # Handle different content types
-                content_type = response.headers.get('Content-Type', '').lower()
-                
-                # Process sitemaps
-                if 'sitemap' in url or 'xml' in content_type:
-                    sitemap_urls = self.parse_sitemap(response.text)
-                    if sitemap_urls:
-                        for new_url in sitemap_urls:
-                            normalized = self.normalize_url(new_url)
-                            if urlparse(normalized).netloc == self.base_domain:
-                                if normalized not in self.visited:
-                                    self.queue.append((normalized, depth))
-                
-                # Process HTML content
-                elif 'html' in content_type:
-                    # Extract emails
-                    new_emails = self.extract_emails(response.text)
-                    if new_emails:
-                        self.emails.update(new_emails)
-                        print(f"Found {len(new_emails)} emails at {url}")
-                    
-                    # Extract links
-                    for link in self.get_links(url, response.text):
-                        if link not in self.visited:
-                            self.queue.append((link, depth + 1))
-            
-            except requests.RequestException as e:
-                if hasattr(e, 'response') and e.response:
-                    if e.response.status_code == 404:
-                        self.broken_links.add(url)
-                print(f"Error ({url}): {str(e)}")
-            
-            time.sleep(delay)  # Respect crawl delay
+            with self.page_scope():
+                url, depth = self.queue.popleft()
+
+                if not self.claim(url, depth, max_depth):
+                    continue
+
+                try:
+                    print(f"Crawling ({depth}): {url}")
+                    response = self.fetch(url)
+                    for new_url, new_depth, score in self.process_response(url, depth, response):
+                        self.queue.append((new_url, new_depth), score, new_depth)
+
+                except requests.RequestException as e:
+                    self.handle_error(url, e)
+
+            if delay:
+                time.sleep(delay)  # Respect crawl delay
+
+    async def crawl_async(self, max_depth=5, delay=1.0, concurrency=10):
+        """Crawl with up to `concurrency` requests in flight.
+
+        Pages are processed one depth level at a time so every URL is
+        claimed at its shallowest depth, exactly like the sequential BFS.
+        `delay` (at least the Crawl-delay) is enforced per host between
+        request starts. Pages are parsed on the fetch threads so the event
+        loop keeps the other requests going. With a CrawlState the crawl is
+        checkpointed after each level. An error other than a failed request
+        stops the crawl and is raised here, as in the sequential crawl.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.fetcher.resize_pool(concurrency)
+
+        await loop.run_in_executor(executor, self.init_robots_parser)
+        throttle = HostThrottle(self.pacing_delay(delay))
+        self.seed_queue()
+
+        async def worker(level, next_level):
+            while True:
+                url, depth = await level.get()
+                try:
+                    if not self.claim(url, depth, max_depth):
+                        continue
+                    await throttle.wait(urlparse(url).netloc)
+                    print(f"Crawling ({depth}): {url}")
+                    try:
+                        response = await loop.run_in_executor(executor, self.fetch, url)
+                        parsed = await loop.run_in_executor(executor, self.parse_response, url, response)
+                        for new_url, new_depth, score in self.process_parsed(url, depth, *parsed):
+                            # Sitemap entries stay on the current level
+                            if new_depth == depth:
+                                level.put_nowait((new_url, new_depth))
+                            else:
+                                next_level.append(((new_url, new_depth), score))
+                    except requests.RequestException as e:
+                        self.handle_error(url, e)
+                finally:
+                    level.task_done()
+
+        try:
+            while self.queue:
+                level = asyncio.Queue()
+                while self.queue:
+                    level.put_nowait(self.queue.popleft())
+                next_level = []
+                workers = [asyncio.create_task(worker(level, next_level))
+                           for _ in range(concurrency)]
+                joined = asyncio.create_task(level.join())
+                # Workers only return by raising; the level cannot finish without them
+                await asyncio.wait([joined, *workers], return_when=asyncio.FIRST_COMPLETED)
+                for task in [joined, *workers]:
+                    task.cancel()
+                await asyncio.gather(joined, *workers, return_exceptions=True)
+                for task in workers:
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
+                for item, score in next_level:
+                    self.queue.append(item, score, item[1])
+                if self.state:
+                    self.state.checkpoint()
+        except BaseException:
+            # The unfinished level is re-crawled on resume
+            if self.state:
+                self.state.rollback()
+            raise
+        finally:
+            executor.shutdown(wait=False)
 
     def report(self, writetofile):
         if not writetofile == "":
@@ -223,6 +401,8 @@ class EmailScraper:
 
 
 if __name__ == "__main__":
+    args = scan_args("Crawl a site for email addresses and broken links")
+
     target_url = input("Enter the starting URL (e.g., https://example.com): ").strip()
     if not target_url.startswith(('http://', 'https://')):
         target_url = 'https://' + target_url
@@ -233,8 +413,28 @@ if __name__ == "__main__":
     delay = input("Enter maximum number of delay (default 0.5 sec): ").strip()
     delay = float(delay) if delay.isdigit() else 0.5
 
+    concurrency = input("Enter number of concurrent requests (default 1): ").strip()
+    concurrency = int(concurrency) if concurrency.isdigit() else 1
+
     writetofile = input("Enter the Save File for the scan (e.g., emailscan.txt): ")
     
-    scraper = EmailScraper(target_url)
-    scraper.crawl(max_depth=max_pages, delay=delay)
+    state = open_state(args)
+    visited = open_visited(args)
+    fetcher = open_fetcher(args)
+    reporter = open_metrics(args, fetcher)
+    sink = open_sink(args)
+    scraper = EmailScraper(target_url, fetcher=fetcher, state=state, visited=visited, sink=sink,
+                           enqueued=open_visited(args))
+    scraper.sitemap_since = args.since
+    scraper.max_page_bytes = args.max_page_size * 1024 * 1024
+    if args.priority:
+        scraper.scorer = UrlScorer(EMAIL_KEYWORDS)
+    scraper.crawl(max_depth=max_pages, delay=delay, concurrency=concurrency)
     scraper.report(writetofile)
+    if state:
+        state.close()
+    if sink:
+        sink.close()
+    if reporter:
+        reporter.stop()
+    fetcher.close()
@@ -0,0 +1,136 @@
+import re
+from functools import lru_cache
+from html import unescape
+from urllib.parse import unquote
+
+from ScriptExtract import script_texts, script_type
+
+EMAIL_PATTERN = re.compile(r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b')
+
+LOCAL_CHARS = r'a-zA-Z0-9._%+-'
+# Character references other than &#64; (@) and &#46; (.), which separate
+# the parts of an address instead
+ENTITY = r'&#(?!0*(?:64|46);|[xX]0*(?:40|2[eE]);)(?:[0-9]{1,7}|[xX][0-9a-fA-F]{1,6});'
+ENTITY_AT = r'&(?:#0*64;|#[xX]0*40;|commat;)'
+ENTITY_DOT = r'&(?:#0*46;|#[xX]0*2[eE];|period;)'
+BRACKETED_AT = r'\s*[\[({]\s*[aA][tT]\s*[\])}]\s*'
+BRACKETED_DOT = r'\s*[\[({]\s*[dD][oO][tT]\s*[\])}]\s*'
+# john at example dot com: spelled out, with every dot spelled out too
+SPELLED = r'\s+[aA][tT]\s+[a-zA-Z0-9-]++(?:\s+[dD][oO][tT]\s+[a-zA-Z0-9-]++)+'
+SCRIPT_BLOCK = r'<(?P<tag>[sS][cC][rR][iI][pP][tT]|[sS][tT][yY][lL][eE])\b(?P<attrs>[^>]*)>(?P<body>.*?)</(?i:(?P=tag))\s*>'
+MAILTO = r'[mM][aA][iI][lL][tT][oO]:(?P<mailto>[^"\'<>\s?]+)'
+
+SEPARATOR = re.compile(rf'(?P<at>@|{ENTITY_AT}|{BRACKETED_AT})|\.|{ENTITY_DOT}|{BRACKETED_DOT}')
+SPELLED_WORD = re.compile(r'\s+(at|dot)\s+', re.I)
+BRACKETED = re.compile(r'[\[({]\s*[aA][tT]\s*[\])}]')
+
+# Substrings of the lowercased page that must be present before the
+# [at] pattern runs; "in" is far cheaper than a regex search
+BRACKET_TOKENS = ('[at', '(at', '{at', '[ at', '( at', '{ at')
+
+# "met at Google dot com" reads like an address too, so a spelled-out
+# one needs a mailbox-like local part, a capitalised AT or a longer
+# domain (bob at acme dot co dot uk), and always a TLD-shaped tail
+MAILBOXES = {
+    'info', 'contact', 'contacts', 'sales', 'support', 'admin', 'office', 'hello', 'mail', 'email',
+    'enquiries', 'enquiry', 'inquiries', 'inquiry', 'help', 'webmaster', 'postmaster', 'press', 'media',
+    'jobs', 'careers', 'hr', 'billing', 'accounts', 'marketing', 'privacy', 'legal', 'service',
+    'feedback', 'team', 'hi', 'news', 'abuse', 'security',
+}
+GENERIC_TLDS = {
+    'com', 'org', 'net', 'edu', 'gov', 'mil', 'int', 'info', 'biz', 'name', 'pro', 'mobi', 'app', 'dev',
+    'online', 'site', 'tech', 'store', 'shop', 'xyz', 'club', 'email', 'agency', 'company', 'digital',
+    'cloud', 'blog', 'news', 'media', 'asia', 'museum', 'coop', 'aero', 'travel',
+}
+
+# logo@2x.png and friends match the pattern but are asset names
+ASSET_SUFFIXES = {
+    'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'avif', 'ico', 'bmp', 'tif', 'tiff',
+    'css', 'js', 'json', 'map', 'woff', 'woff2', 'ttf', 'eot', 'otf', 'mp4', 'webm',
+}
+
+
+@lru_cache(maxsize=None)
+def engine(entities, mailto, bracketed, spelled):
+    """The one-pass pattern for a page, with only the spellings it can hold.
+
+    Script and style blocks are consumed whole, so nothing in them is read
+    as text; mailto: targets and addresses are the other alternatives.
+    Every alternative a page cannot need costs a try at each word, so the
+    flags leave out character references, percent-encoded mailto: targets,
+    [at]/(dot) and spelled-out addresses when the page has none.
+    """
+    if entities:
+        local = rf'[{LOCAL_CHARS}]*+(?:{ENTITY}[{LOCAL_CHARS}]*+)*+'
+        label = rf'[a-zA-Z0-9-]*+(?:{ENTITY}[a-zA-Z0-9-]*+)*+'
+        at, dot = '@|' + ENTITY_AT, r'\.|' + ENTITY_DOT
+    else:
+        local, label, at, dot = rf'[{LOCAL_CHARS}]++', r'[a-zA-Z0-9-]*+', '@', r'\.'
+    if bracketed:
+        at, dot = at + '|' + BRACKETED_AT, dot + '|' + BRACKETED_DOT
+    address = rf'(?P<local>{local})(?:(?:{at}){label}(?:(?:{dot}){label})+'
+    if spelled:
+        address += rf'|(?P<spelled>{SPELLED})'
+    branches = [SCRIPT_BLOCK, MAILTO, address + ')'] if mailto else [SCRIPT_BLOCK, address + ')']
+    return re.compile(rf'(?<![{LOCAL_CHARS}])(?:{"|".join(branches)})', re.S)
+
+
+def is_asset(email):
+    return email.rsplit('.', 1)[-1].lower() in ASSET_SUFFIXES
+
+
+def _separator(match):
+    return '@' if match.group('at') is not None else '.'
+
+
+def spelled_address(local, spelled):
+    """local@domain for a spelled-out address, or None if it reads as prose"""
+    words = SPELLED_WORD.split(spelled)
+    labels = words[2::2]
+    tld = labels[-1]
+    if not (tld.isalpha() and (len(tld) == 2 or tld.lower() in GENERIC_TLDS)):
+        return None
+    if not (local.lower() in MAILBOXES or not local.isalpha() or words[1] == 'AT' or len(labels) >= 3):
+        return None
+    return local + '@' + '.'.join(labels)
+
+
+def extract_emails(html, scripts=True):
+    """Return the set of email addresses in an HTML page.
+
+    Script and style bodies are not read as text; with `scripts`, emails in
+    JSON payloads and string literals of inline scripts are taken instead
+    (see ScriptExtract). Addresses written with character references,
+    percent-encoded in mailto: targets or obfuscated as [at]/(dot) or
+    "info at example dot com" are decoded.
+    """
+    entities = '&#' in html or '&commat;' in html
+    mailto = '%40' in html
+    # Substring tests decide first; a regex runs only behind a match
+    lowered = html.lower()
+    bracketed = any(token in lowered for token in BRACKET_TOKENS) and BRACKETED.search(html) is not None
+    spelled = ' dot ' in lowered and ' at ' in lowered
+    if not ('@' in html or entities or mailto or bracketed or spelled):
+        return set()
+    found = set()
+    for match in engine(entities, mailto, bracketed, spelled).finditer(html):
+        if match.group('tag') is not None:
+            # Keeps the inline scripts that could hold an address
+            body = match.group('body')
+            if scripts and match.group('tag').lower() == 'script' and ('@' in body or '%40' in body) \
+                    and 'src=' not in match.group('attrs').lower():
+                for value in script_texts(script_type(match.group('attrs')), body):
+                    found.update(EMAIL_PATTERN.findall(unquote(value)))
+        elif mailto and match.group('mailto') is not None:
+            target = unquote(match.group('mailto'))
+            found.update(EMAIL_PATTERN.findall(unescape(target) if '&' in target else target))
+        elif spelled and match.group('spelled') is not None:
+            address = spelled_address(match.group('local'), match.group('spelled'))
+            if address is not None:
+                found.update(EMAIL_PATTERN.findall(address))
+        else:
+            candidate = match.group(0)
+            if '&' in candidate or '[' in candidate or '(' in candidate or '{' in candidate:
+                candidate = unescape(SEPARATOR.sub(_separator, candidate))
+            found.update(EMAIL_PATTERN.findall(candidate))
+    return {email for email in found if not is_asset(email)}
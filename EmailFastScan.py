@@ -1,67 +1,65 @@
-import re
-import requests
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from collections import deque
-
-class EmailScraper:
-    def __init__(self, start_url, max_pages, writetofile):
-        self.start_url = start_url
-        self.max_pages = max_pages
-        self.visited_urls = set()
-        self.urls_to_visit = deque()
-        self.urls_to_visit.append(start_url)
-        self.domain = urlparse(start_url).netloc
-        self.email_pattern = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'})
+from urllib.parse import urljoin
+from LinkParser import extract_links
+from UrlCanon import canonicalize
+from Frontier import UrlScorer, EMAIL_KEYWORDS
+from EmailExtract import EMAIL_PATTERN, extract_emails
+from SiteScraper import SiteScraper
+from Sitemap import sitemap_seeds, seed_frontier
+from ScanArgs import scan_args, open_state, open_sink, open_visited, open_fetcher, open_metrics
+
+
+def parse_page(html):
+    page = extract_links(html)
+    page['emails'] = sorted(extract_emails(html))
+    return page
+
+
+class EmailScraper(SiteScraper):
+    parse_kind = 'EmailFastScan+scripts'
+    parse_func = staticmethod(parse_page)
+
+
+    def __init__(self, start_url, max_pages, writetofile, fetcher=None, state=None, visited=None, sink=None, enqueued=None):
+        super().__init__(start_url, max_pages, fetcher, state, visited, sink, enqueued)
+        self.email_pattern = EMAIL_PATTERN
         self.found_emails = set()
+        if state:
+            self.found_emails.update(email for email, _ in state.findings('email'))
 
         self.writetofile = writetofile
 
-    def is_valid_url(self, url):
-        parsed = urlparse(url)
-        return bool(parsed.netloc) and parsed.netloc == self.domain
-
-    def get_all_links(self, url):
-        try:
-            response = self.session.get(url, timeout=5)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find emails in the current page
-            self.find_emails(response.text, url)
-            
-            # Extract all links
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                full_url = urljoin(url, href)
-                if self.is_valid_url(full_url) and full_url not in self.visited_urls:
-                    self.urls_to_visit.append(full_url)
-                    
-        except requests.RequestException as e:
-            print(f"Error fetching {url}: {e}")
+    def handle_page(self, url, page):
+        # Find emails in the current page
+        self.add_emails(page['emails'], url)
+
+        # Extract all links
+        anchors = page.get('anchors', {})
+        hits = len(page['emails'])
+        seen = duplicates = 0
+        for href in page['hrefs']:
+            full_url = canonicalize(urljoin(url, href))
+            if self.is_valid_url(full_url):
+                seen += 1
+                if full_url in self.enqueued:
+                    duplicates += 1
+                else:
+                    self.enqueue(full_url, self.link_score(full_url, anchors.get(href, ''), hits))
+        self.fetcher.metrics.count_links(seen, duplicates)
 
     def find_emails(self, text, source_url):
-        emails = set(self.email_pattern.findall(text))
+        self.add_emails(extract_emails(text), source_url)
+
+    def add_emails(self, emails, source_url):
         for email in emails:
             if email not in self.found_emails:
                 self.found_emails.add(email)
+                if self.state:
+                    self.state.add_finding('email', email, source_url)
+                if self.sink:
+                    self.sink.write('email', email, source_url)
                 print(f"Found email: {email} (on {source_url})")
 
-    def scrape(self):
-        while self.urls_to_visit and len(self.visited_urls) < self.max_pages:
-            current_url = self.urls_to_visit.popleft()
-            
-            if current_url in self.visited_urls:
-                continue
-                
-            print(f"Scraping: {current_url}")
-            self.visited_urls.add(current_url)
-            
-            self.get_all_links(current_url)
-        
-        
+    def report(self):
         if not self.writetofile == "":
             print("\nScraping complete!")
             with open(self.writetofile, "w") as r:
@@ -84,6 +82,8 @@ class EmailScraper:
         
 
 if __name__ == "__main__":
+    args = scan_args("Scan a site for email addresses")
+
     start_url = input("Enter the starting URL (e.g., https://example.com): ").strip()
     if not start_url.startswith(('http://', 'https://')):
         start_url = 'https://' + start_url
@@ -93,5 +93,23 @@ if __name__ == "__main__":
 
     writetofile = input("Enter the Save File for the scan (e.g., emailscan.txt): ")
     
-    scraper = EmailScraper(start_url, max_pages, writetofile)
-    scraper.scrape()
+    state = open_state(args)
+    visited = open_visited(args)
+    fetcher = open_fetcher(args)
+    reporter = open_metrics(args, fetcher)
+    sink = open_sink(args)
+    scraper = EmailScraper(start_url, max_pages, writetofile, fetcher=fetcher, state=state, visited=visited, sink=sink,
+                           enqueued=open_visited(args))
+    scraper.max_page_bytes = args.max_page_size * 1024 * 1024
+    if args.priority:
+        scraper.scorer = UrlScorer(EMAIL_KEYWORDS)
+    if args.sitemap:
+        seed_frontier(scraper, sitemap_seeds(start_url, fetcher, scraper.headers, args.since))
+    scraper.scrape(workers=args.workers)
+    if state:
+        state.close()
+    if sink:
+        sink.close()
+    if reporter:
+        reporter.stop()
+    fetcher.close()
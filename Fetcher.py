@@ -0,0 +1,398 @@
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from Connector import Connector, ResolvingAdapter, resolving_transport
+from HostCache import HostCache
+from Metrics import CrawlMetrics
+from RateControl import THROTTLE_STATUSES, backoff_delay, parse_retry_after
+
+# urllib3 decodes brotli bodies only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+# HTTP/2 needs httpx with the h2 extra; plain requests is HTTP/1.1 only
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+# Page fetches read at most this much and only types a page parser can use
+MAX_PAGE_BYTES = 10 * 1024 * 1024
+HTML_TYPES = ('html',)
+
+# Failures worth another try; a longer Retry-After than this is not waited out
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+MAX_RETRY_WAIT = 120.0
+
+
+class SkippedContent(requests.RequestException):
+    """A response was abandoned before its body was read in full"""
+
+
+def check_headers(headers, max_bytes, content_types):
+    """Raise SkippedContent if the headers alone rule the body out"""
+    content_type = headers.get('Content-Type', '').lower()
+    # A missing Content-Type is given the benefit of the doubt
+    if content_types and content_type and not any(t in content_type for t in content_types):
+        raise SkippedContent(f"skipped {content_type} content")
+    length = headers.get('Content-Length', '')
+    if max_bytes is not None and length.isdigit() and int(length) > max_bytes:
+        raise SkippedContent(f"skipped {length} byte body (limit {max_bytes})")
+
+
+def read_capped(chunks, max_bytes):
+    """Join body chunks, giving up as soon as they pass max_bytes"""
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if max_bytes is not None and len(body) > max_bytes:
+            raise SkippedContent(f"body exceeds {max_bytes} bytes")
+    return bytes(body)
+
+
+class FetchStats:
+    """Aggregate and recent per-request timings for one Fetcher"""
+    def __init__(self, keep=1000):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.by_host = {}
+        self.recent = deque(maxlen=keep)
+
+    def record(self, url, host, status, elapsed, total, size):
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            self.seconds += total
+            if status is None or status >= 400:
+                self.errors += 1
+            count, seconds = self.by_host.get(host, (0, 0.0))
+            self.by_host[host] = (count + 1, seconds + total)
+            # elapsed is time to headers, total includes the body download
+            self.recent.append((url, status, elapsed, total, size))
+
+    def skip(self):
+        with self.lock:
+            self.skipped += 1
+
+    def summary(self):
+        with self.lock:
+            avg = self.seconds / self.requests if self.requests else 0.0
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'skipped': self.skipped,
+                'bytes': self.bytes,
+                'seconds': round(self.seconds, 3),
+                'avg_seconds': round(avg, 4),
+                'hosts': len(self.by_host),
+            }
+
+
+class Fetcher:
+    """Pooled keep-alive HTTP client shared by all scrapers in a process"""
+    def __init__(self, pool_connections=32, pool_maxsize=32, http2=True, headers=None, cache=None,
+                 retries=2, rate=None, hosts=None):
+        self.pool_connections = pool_connections
+        self.cache = cache
+        self.hosts = hosts or HostCache()  # robots.txt rules and DNS answers
+        self.retries = retries
+        self.rate = rate  # a RateController paces each host adaptively
+        self.pool_maxsize = pool_maxsize
+        self.stats = FetchStats()
+        self.metrics = CrawlMetrics()
+        self.connector = Connector(self.hosts, self.metrics)  # opens the connections of both clients
+        self.headers = {
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        }
+        if headers:
+            self.headers.update(headers)
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.mount_adapters()
+
+        self.client = None
+        self.retired_clients = []  # replaced by resize_pool, closed with the fetcher
+        if http2 and httpx is not None:
+            self.client = self.open_client()
+
+    def mount_adapters(self):
+        adapter = ResolvingAdapter(self.connector, pool_connections=self.pool_connections,
+                                   pool_maxsize=self.pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def open_client(self):
+        limits = httpx.Limits(max_connections=self.pool_maxsize * self.pool_connections,
+                              max_keepalive_connections=self.pool_maxsize)
+        transport = resolving_transport(self.connector, http2=True, limits=limits)
+        return httpx.Client(transport=transport, headers=self.headers, follow_redirects=True)
+
+    def resize_pool(self, maxsize):
+        """Grow the per-host pool so `maxsize` threads can share it"""
+        if maxsize > self.pool_maxsize:
+            self.pool_maxsize = maxsize
+            self.mount_adapters()
+            if self.client is not None:
+                # Requests in flight may still be reading from the old one
+                self.retired_clients.append(self.client)
+                self.client = self.open_client()
+
+    def get(self, url, headers=None, timeout=10, **kwargs):
+        return self.request('GET', url, headers=headers, timeout=timeout, **kwargs)
+
+    def head(self, url, headers=None, timeout=10, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('HEAD', url, headers=headers, timeout=timeout, **kwargs)
+
+    def request(self, method, url, headers=None, timeout=10, **kwargs):
+        """Send a request, retrying transient failures.
+
+        Connection errors, timeouts, 429 and 503 are retried up to `retries`
+        times after the Retry-After time or a jittered exponential backoff;
+        the last 429/503 response is returned as is. With a RateController
+        every attempt waits for its turn at the host, and a new host starts
+        at its robots.txt Crawl-delay.
+        """
+        host = urlparse(url).netloc
+        if self.rate is not None and self.rate.claim(host):
+            self.learn_crawl_delay(url, host)
+
+        attempt = 0
+        while True:
+            if self.rate is not None:
+                self.rate.acquire(host)
+            start = time.perf_counter()
+            try:
+                response = self.send(method, url, host, headers, timeout, **kwargs)
+            except SkippedContent:
+                self.release(host, time.perf_counter() - start)
+                raise
+            except TRANSIENT_ERRORS as e:
+                self.release(host)
+                if attempt >= self.retries or isinstance(e, requests.exceptions.SSLError):
+                    raise
+                wait = backoff_delay(attempt)
+                print(f"Retrying {url} in {wait:.1f}s: {e}")
+            except BaseException:
+                if self.rate is not None:
+                    self.rate.cancel(host)
+                raise
+            else:
+                status = response.status_code
+                retry_after = parse_retry_after(response.headers.get('Retry-After')) \
+                    if status in THROTTLE_STATUSES else None
+                self.release(host, response.elapsed.total_seconds(), status, retry_after)
+                wait = retry_after if retry_after is not None else backoff_delay(attempt)
+                if status not in THROTTLE_STATUSES or attempt >= self.retries or wait > MAX_RETRY_WAIT:
+                    return response
+                print(f"Retrying {url} in {wait:.1f}s: HTTP {status}")
+                response.close()
+            # The controller already blocks the host for the backoff
+            if self.rate is None:
+                time.sleep(wait)
+            attempt += 1
+
+    def release(self, host, latency=None, status=None, retry_after=None):
+        if self.rate is not None:
+            self.rate.release(host, latency, status, retry_after)
+
+    def learn_crawl_delay(self, url, host):
+        """Start pacing a new host at its robots.txt Crawl-delay"""
+        try:
+            delay = self.robots(url).crawl_delay()
+            if delay:
+                print(f"Crawl-delay for {host}: {delay}s")
+                self.rate.set_delay(host, delay)
+        finally:
+            self.rate.learned(host)
+
+    def robots(self, url):
+        """robots.txt rules for the site of `url`, fetched once per host and cached"""
+        parts = urlparse(url)
+        return self.hosts.robots(f'{parts.scheme}://{parts.netloc}', self.fetch_robots)
+
+    def allowed(self, url, agent='*'):
+        return self.robots(url).allowed(url, agent)
+
+    def fetch_robots(self, origin):
+        # Bypasses the rate controller: robots.txt is what sets the pace
+        try:
+            response = self.send('GET', origin + '/robots.txt', urlparse(origin).netloc, timeout=10)
+        except requests.RequestException as e:
+            print(f"Robots.txt error: {e}")
+            return None, ''
+        return response.status_code, response.text
+
+    def send(self, method, url, host, headers=None, timeout=10, max_bytes=None, content_types=None, **kwargs):
+        """Send one request through the pool, the HTTP/2 client and the cache.
+
+        With `max_bytes` or `content_types` the body is streamed: a response
+        whose Content-Type matches none of `content_types` (substrings) or
+        whose body is larger than `max_bytes` is dropped with SkippedContent
+        without being downloaded in full.
+        """
+        gated = max_bytes is not None or content_types is not None
+        cacheable = self.cache is not None and method == 'GET' and not kwargs.get('stream')
+        cached = self.cache.lookup(url) if cacheable else None
+        if cached is not None:
+            headers = dict(headers or {})
+            headers.update(cached.validators())
+
+        start = time.perf_counter()
+        try:
+            if self.client is not None and not kwargs.get('stream'):
+                response = self.request_h2(method, url, headers, timeout, max_bytes, content_types, **kwargs)
+            elif gated and not kwargs.get('stream'):
+                response = self.session.request(method, url, headers=headers,
+                                                timeout=timeout, stream=True, **kwargs)
+                try:
+                    if 200 <= response.status_code < 300:
+                        check_headers(response.headers, max_bytes, content_types)
+                    response._content = read_capped(response.iter_content(64 * 1024), max_bytes)
+                finally:
+                    response.close()
+            else:
+                response = self.session.request(method, url, headers=headers,
+                                                timeout=timeout, **kwargs)
+        except SkippedContent:
+            self.stats.skip()
+            raise
+        except requests.RequestException as e:
+            self.stats.record(url, host, None, 0.0, time.perf_counter() - start, 0)
+            self.metrics.record_error(type(e).__name__)
+            raise
+
+        size = 0 if kwargs.get('stream') else len(response.content)
+        total = time.perf_counter() - start
+        self.stats.record(url, host, response.status_code, response.elapsed.total_seconds(), total, size)
+        self.metrics.record_response(response.status_code, response.elapsed.total_seconds(), total, size)
+
+        response.from_cache = False
+        if cached is not None and response.status_code == 304:
+            response = cached.to_response(response)
+            response.from_cache = True
+        elif cacheable and response.status_code == 200:
+            self.cache.store(url, response)
+        if cacheable:
+            response.cache_key = url
+        return response
+
+    def extract(self, response, kind, parse):
+        """Return parse(response.text), reusing the cached result for a 304.
+
+        `kind` names the parse so different scrapers can share the cache;
+        the result must be JSON-serialisable.
+        """
+        result = self.cached_extract(response, kind)
+        if result is None:
+            with self.metrics.timer('parse'):
+                result = parse(response.text)
+            self.store_extract(response, kind, result)
+        return result
+
+    def cached_extract(self, response, kind):
+        url = getattr(response, 'cache_key', None)
+        if url is None or not response.from_cache:
+            return None
+        return self.cache.get_extracted(url, kind)
+
+    def store_extract(self, response, kind, result):
+        url = getattr(response, 'cache_key', None)
+        if url is not None:
+            self.cache.put_extracted(url, kind, result)
+
+    def request_h2(self, method, url, headers, timeout, max_bytes=None, content_types=None, **kwargs):
+        """Send through the HTTP/2 client but hand back a requests.Response"""
+        follow = kwargs.pop('allow_redirects', True)
+        try:
+            with self.client.stream(method, url, headers=headers, timeout=timeout,
+                                    follow_redirects=follow) as r:
+                if 200 <= r.status_code < 300:
+                    check_headers(r.headers, max_bytes, content_types)
+                content = read_capped(r.iter_bytes(64 * 1024), max_bytes)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+
+        response = requests.Response()
+        response.status_code = r.status_code
+        response.reason = r.reason_phrase
+        response.headers = CaseInsensitiveDict(r.headers)
+        response.url = str(r.url)
+        response.encoding = r.encoding
+        response.elapsed = r.elapsed
+        response._content = content
+        return response
+
+    def probe(self, url, headers=None, timeout=10):
+        """HEAD a download link; return (content_type, length or None), or None if it is unreachable"""
+        try:
+            response = self.head(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code >= 400:
+            return None
+        length = response.headers.get('Content-Length', '')
+        return response.headers.get('Content-Type', '').lower(), int(length) if length.isdigit() else None
+
+    def close(self):
+        global _shared
+        with _shared_lock:
+            if _shared is self:
+                _shared = None
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+        self.hosts.close()
+        if self.client is not None:
+            self.client.close()
+        for client in self.retired_clients:
+            client.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide Fetcher: the one given to share_fetcher(),
+    else a default one created on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Fetcher()
+        return _shared
+
+
+def share_fetcher(fetcher):
+    """Make `fetcher` the process-wide Fetcher and return it.
+
+    Scrapers may already hold the shared one, so replacing it with a
+    differently configured Fetcher is an error rather than a silent split.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is not None and _shared is not fetcher:
+            raise RuntimeError('the process-wide Fetcher is already in use')
+        _shared = fetcher
+        return fetcher
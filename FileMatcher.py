@@ -0,0 +1,145 @@
+import re
+
+# (category, match, pattern). `name` matches the whole file name, `contains`
+# any part of it and `ext` its last extension; all are compared lower-case.
+# When a pattern is listed twice the first wins.
+DEFAULT_RULES = [
+    # Configuration files
+    ('config', 'contains', '.env'), ('config', 'contains', '.htaccess'),
+    ('config', 'contains', '.htpasswd'), ('config', 'contains', '.conf'),
+    ('config', 'contains', '.config'), ('config', 'contains', '.yml'),
+    ('config', 'contains', '.yaml'), ('config', 'contains', '.ini'),
+    ('config', 'contains', '.cfg'), ('config', 'contains', '.properties'),
+    ('config', 'contains', '.gitignore'), ('config', 'contains', '.gitconfig'),
+    ('config', 'contains', 'php.ini'), ('config', 'contains', 'web.config'),
+    ('config', 'contains', 'robots.txt'),
+    ('config', 'name', 'env'), ('config', 'name', 'htaccess'), ('config', 'name', 'htpasswd'),
+    ('config', 'name', 'robots'), ('config', 'name', 'phpinfo'), ('config', 'name', 'web'),
+    ('config', 'name', 'gitignore'),
+    # Keys and credentials
+    ('key', 'contains', 'id_rsa'), ('key', 'contains', 'id_dsa'), ('key', 'contains', '.pem'),
+    ('key', 'contains', '.key'), ('key', 'contains', '.kdbx'), ('key', 'contains', 'oauth'),
+    ('key', 'contains', 'token'), ('key', 'ext', '.kdbx'),
+    ('key', 'name', 'id_rsa'), ('key', 'name', 'id_dsa'), ('key', 'name', 'oauth'),
+    ('key', 'name', 'token'),
+    # Backups and editor leftovers
+    ('backup', 'ext', '.bak'), ('backup', 'ext', '.backup'), ('backup', 'ext', '.wbcat'),
+    ('backup', 'contains', '.bak'), ('backup', 'contains', '.backup'), ('backup', 'contains', '.swp'),
+    ('backup', 'contains', '.swo'), ('backup', 'contains', '~'),
+    # Databases and dumps
+    ('db', 'ext', '.sql'), ('db', 'ext', '.db'), ('db', 'ext', '.dbf'), ('db', 'ext', '.mdb'),
+    ('db', 'ext', '.accdb'), ('db', 'ext', '.accd'),
+    ('db', 'contains', '.sql'), ('db', 'contains', '.dump'), ('db', 'contains', '.db'),
+    ('db', 'contains', '.mdb'),
+    # Logs and shell history
+    ('log', 'ext', '.log'), ('log', 'contains', '.log'), ('log', 'contains', 'error.log'),
+    ('history', 'contains', '.bash_history'), ('history', 'contains', '.zsh_history'),
+    ('history', 'contains', '_history'), ('history', 'name', 'bash_history'),
+    # Dependency manifests
+    ('dependency', 'contains', 'package-lock.json'), ('dependency', 'contains', 'yarn.lock'),
+    ('dependency', 'contains', 'pipfile.lock'), ('dependency', 'contains', 'requirements.txt'),
+    # Documents
+    ('document', 'ext', '.pdf'), ('document', 'ext', '.doc'), ('document', 'ext', '.docx'),
+    ('document', 'ext', '.xls'), ('document', 'ext', '.xlsx'), ('document', 'ext', '.ppt'),
+    ('document', 'ext', '.pptx'), ('document', 'ext', '.rtf'), ('document', 'ext', '.txt'),
+    ('document', 'ext', '.odt'), ('document', 'ext', '.ods'), ('document', 'ext', '.odp'),
+    ('document', 'ext', '.tex'), ('document', 'ext', '.csv'),
+    # Images, audio and video
+    ('image', 'ext', '.jpg'), ('image', 'ext', '.jpeg'), ('image', 'ext', '.png'),
+    ('image', 'ext', '.gif'), ('image', 'ext', '.bmp'), ('image', 'ext', '.tiff'),
+    ('image', 'ext', '.psd'), ('image', 'ext', '.ai'), ('image', 'ext', '.svg'),
+    ('image', 'ext', '.raw'), ('image', 'ext', '.cr2'), ('image', 'ext', '.nef'),
+    ('audio', 'ext', '.mp3'), ('audio', 'ext', '.wav'), ('audio', 'ext', '.flac'),
+    ('audio', 'ext', '.midi'), ('audio', 'ext', '.ogg'),
+    ('video', 'ext', '.avi'), ('video', 'ext', '.mov'), ('video', 'ext', '.mp4'),
+    ('video', 'ext', '.mpeg'), ('video', 'ext', '.mpeg2'), ('video', 'ext', '.mpeg3'),
+    ('video', 'ext', '.mpg'), ('video', 'ext', '.mkv'), ('video', 'ext', '.flv'),
+    ('video', 'ext', '.3gp'), ('video', 'ext', '.m4v'), ('video', 'ext', '.wmv'),
+    # Archives
+    ('archive', 'ext', '.zip'), ('archive', 'ext', '.rar'), ('archive', 'ext', '.7z'),
+    ('archive', 'ext', '.tar'), ('archive', 'ext', '.gz'),
+    # Source and server-side pages
+    ('code', 'ext', '.py'), ('code', 'ext', '.html'), ('code', 'ext', '.htm'), ('code', 'ext', '.php'),
+    ('code', 'ext', '.js'), ('code', 'ext', '.css'), ('code', 'ext', '.cpp'), ('code', 'ext', '.c'),
+    ('code', 'ext', '.java'), ('code', 'ext', '.cs'), ('code', 'ext', '.vb'), ('code', 'ext', '.asp'),
+    ('code', 'ext', '.aspx'), ('code', 'ext', '.cgi'), ('code', 'ext', '.pl'), ('code', 'ext', '.sh'),
+    ('code', 'ext', '.ps1'),
+]
+
+KINDS = ('ext', 'name', 'contains')
+
+
+def url_basename(url):
+    """Lower-cased last path segment of an absolute URL, without ;params.
+
+    Sliced out directly rather than through urlparse, which is most of the
+    cost of classifying a link.
+    """
+    path = url.partition('#')[0].partition('?')[0]
+    host = path.find('://')
+    if host >= 0 and path.find('/', host + 3) < 0:
+        return ''  # bare host, empty path
+    return path[path.rfind('/') + 1:].partition(';')[0].lower()
+
+
+def is_pdf_url(url):
+    """A .pdf path, or 'pdf' in the file name before its first dot"""
+    basename = url_basename(url)
+    return basename.endswith('.pdf') or 'pdf' in basename.partition('.')[0]
+
+
+def load_rules(path):
+    """Read `category match pattern` lines; blank lines and # comments are skipped"""
+    rules = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            if len(parts) != 3 or parts[1] not in KINDS:
+                raise ValueError(f"{path}:{number}: expected 'category {'|'.join(KINDS)} pattern', got {line!r}")
+            rules.append(tuple(parts))
+    return rules
+
+
+class FileMatcher:
+    """Classifies file URLs by category in one pass over the file name.
+
+    Whole names and extensions are hash lookups; all `contains` patterns
+    are compiled into a single alternation, longest first, so a name is
+    scanned once however many patterns there are; the leftmost match
+    decides the category. Names and patterns are tried before extensions,
+    so `robots.txt` is a config file rather than a document.
+    """
+    def __init__(self, rules=DEFAULT_RULES):
+        self.extensions = {}
+        self.names = {}
+        self.contains = {}
+        tables = {'ext': self.extensions, 'name': self.names, 'contains': self.contains}
+        for category, kind, pattern in rules:
+            tables[kind].setdefault(pattern.lower(), category)
+        self.pattern = None
+        if self.contains:
+            ordered = sorted(self.contains, key=len, reverse=True)
+            self.pattern = re.compile('|'.join(re.escape(p) for p in ordered))
+
+    @classmethod
+    def with_rules_file(cls, path):
+        """The default rules extended by those in `path`"""
+        return cls(load_rules(path) + DEFAULT_RULES)
+
+    def classify(self, url):
+        """Return the category of the file a URL points to, or None"""
+        basename = url_basename(url)
+        category = self.names.get(basename)
+        if category:
+            return category
+        if self.pattern is not None:
+            match = self.pattern.search(basename)
+            if match:
+                return self.contains[match.group()]
+        dot = basename.rfind('.')
+        if dot >= 0:
+            return self.extensions.get(basename[dot:])
+        return None
@@ -0,0 +1,106 @@
+import heapq
+import itertools
+import re
+from urllib.parse import urlparse
+
+# Path and anchor-text words that tend to lead to contact details
+EMAIL_KEYWORDS = {
+    'contact': 5, 'kontakt': 5, 'impressum': 5, 'imprint': 4, 'about': 4, 'team': 4,
+    'staff': 4, 'people': 4, 'directory': 4, 'faculty': 3, 'leadership': 3,
+    'management': 3, 'support': 3, 'press': 3, 'media': 2, 'career': 2, 'jobs': 2,
+    'office': 2, 'legal': 2, 'privacy': 1, 'help': 1,
+}
+
+# ... and to documents and stray files
+DOCUMENT_KEYWORDS = {
+    'download': 5, 'document': 5, 'docs': 4, 'file': 4, 'publication': 4, 'report': 4,
+    'pdf': 4, 'resource': 3, 'library': 3, 'archive': 3, 'brochure': 3, 'manual': 3,
+    'paper': 3, 'upload': 3, 'attachment': 3, 'media': 2, 'backup': 2, 'data': 2,
+    'form': 2, 'policy': 2, 'annual': 2,
+}
+
+WORD = re.compile(r'[a-z]+')
+
+
+def merge_keywords(*tables):
+    merged = {}
+    for table in tables:
+        for word, weight in table.items():
+            merged[word] = max(weight, merged.get(word, 0))
+    return merged
+
+
+class UrlScorer:
+    """Scores a link by how likely the page behind it is to yield results.
+
+    Keywords in the path and in the anchor text add their weight (a word
+    counts if it starts with a keyword, so "contacts" matches "contact").
+    Links from pages that already produced hits get `hit_bonus` per hit,
+    up to `max_hits`; every path segment and a query string cost a little,
+    which keeps the crawl from drowning in deep or faceted pages.
+    """
+    def __init__(self, keywords, hit_bonus=2.0, max_hits=5, segment_penalty=0.5, query_penalty=1.0):
+        self.keywords = keywords
+        self.hit_bonus = hit_bonus
+        self.max_hits = max_hits
+        self.segment_penalty = segment_penalty
+        self.query_penalty = query_penalty
+
+    def word_score(self, text):
+        score = 0
+        for word in set(WORD.findall(text.lower())):
+            best = 0
+            for keyword, weight in self.keywords.items():
+                if weight > best and word.startswith(keyword):
+                    best = weight
+            score += best
+        return score
+
+    def score(self, url, text='', parent_hits=0):
+        parsed = urlparse(url)
+        score = self.word_score(parsed.path)
+        if text:
+            score += self.word_score(text)
+        score += self.hit_bonus * min(parent_hits, self.max_hits)
+        score -= self.segment_penalty * parsed.path.strip('/').count('/')
+        if parsed.query:
+            score -= self.query_penalty
+        return score
+
+
+class PriorityFrontier:
+    """deque-compatible frontier that pops the highest-scored item first.
+
+    `append(item, score=0.0, level=0)` takes an optional score; items with
+    equal scores come out in insertion order, so without scores it behaves
+    exactly like the FIFO deque it replaces. A lower `level` (the crawl
+    depth) comes out before any score, so a scored breadth-first crawl
+    stays breadth-first.
+    """
+    def __init__(self, items=()):
+        self.heap = []
+        self.counter = itertools.count()
+        for item in items:
+            self.append(item)
+
+    def append(self, item, score=0.0, level=0):
+        heapq.heappush(self.heap, (level, -score, next(self.counter), item))
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        if not self.heap:
+            raise IndexError('pop from an empty frontier')
+        return heapq.heappop(self.heap)[-1]
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
+
+    def __iter__(self):
+        for entry in sorted(self.heap):
+            yield entry[-1]
@@ -0,0 +1,223 @@
+import json
+import re
+import socket
+import sqlite3
+import threading
+import time
+
+from UrlCanon import normalize_escapes, QUERY_SAFE
+
+# How long an unreachable or failing robots.txt is trusted before retrying
+RETRY_TTL = 300
+# Request-rate periods: 1/5m is one request every five minutes
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def rule_pattern(path):
+    """Compile a robots.txt path pattern: * matches anything, a final $ anchors"""
+    anchored = path.endswith('$')
+    if anchored:
+        path = path[:-1]
+    regex = '.*'.join(re.escape(part) for part in normalize_escapes(path, QUERY_SAFE + '*').split('*'))
+    return re.compile(regex + (r'\Z' if anchored else ''))
+
+
+class RobotsRules:
+    """Parsed robots.txt following RFC 9309.
+
+    The group for the most specific matching user-agent applies, falling
+    back to '*'. Within it the longest matching rule wins, Allow on a tie;
+    a path no rule matches is allowed.
+    """
+    def __init__(self, text='', allow_all=False, disallow_all=False):
+        self.allow_all = allow_all
+        self.disallow_all = disallow_all
+        self.groups = {}  # user-agent token -> [(length, allow, regex)]
+        self.delays = {}  # user-agent token -> seconds
+        self.sitemaps = []
+        agents = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            field, sep, value = line.partition(':')
+            if not sep:
+                continue
+            field = field.strip().lower()
+            value = value.strip()
+            if field == 'sitemap':
+                self.sitemaps.append(value)
+            elif field == 'user-agent':
+                if in_rules:
+                    agents = []
+                    in_rules = False
+                agents.append(value.lower())
+                self.groups.setdefault(value.lower(), [])
+            elif field in ('allow', 'disallow'):
+                in_rules = True
+                if not value:
+                    continue  # an empty Disallow allows everything
+                rule = (len(value), field == 'allow', rule_pattern(value))
+                for agent in agents:
+                    self.groups[agent].append(rule)
+            elif field in ('crawl-delay', 'request-rate'):
+                in_rules = True
+                delay = self.parse_delay(field, value)
+                if delay is not None:
+                    for agent in agents:
+                        self.delays[agent] = delay
+
+    @staticmethod
+    def parse_delay(field, value):
+        try:
+            if field == 'crawl-delay':
+                return float(value)
+            requests, _, period = value.partition('/')
+            # A time window may follow: 1/10s 0800-1300
+            period = period.split()[0].lower() if period.strip() else ''
+            unit = RATE_UNITS.get(period[-1:], 1)
+            return float(period.rstrip('smhd') or 1) * unit / float(requests)
+        except (ValueError, ZeroDivisionError):
+            return None
+
+    @classmethod
+    def from_response(cls, status, text):
+        """Rules for a robots.txt answer; `status` is None if the site was unreachable.
+
+        As RFC 9309 has it, any 4xx means there are no rules, while a server
+        error or an unreachable site means nothing may be crawled for now.
+        """
+        if status is None or status >= 500:
+            return cls(disallow_all=True)
+        if status >= 400:
+            return cls(allow_all=True)
+        return cls(text)
+
+    def agent_key(self, agent):
+        token = agent.split('/', 1)[0].lower()
+        if token in self.groups:
+            return token
+        return '*'
+
+    def allowed(self, url, agent='*'):
+        if self.allow_all:
+            return True
+        if self.disallow_all:
+            return False
+        rules = self.groups.get(self.agent_key(agent))
+        if not rules:
+            return True
+        path = url.split('://', 1)[-1]
+        slash = path.find('/')
+        path = path[slash:].partition('#')[0] if slash >= 0 else '/'
+        best = None
+        for length, allow, regex in rules:
+            if regex.match(path) and (best is None or length > best[0] or (length == best[0] and allow)):
+                best = (length, allow)
+        return best is None or best[1]
+
+    def crawl_delay(self, agent='*'):
+        return self.delays.get(self.agent_key(agent))
+
+
+class HostCache:
+    """robots.txt rules and DNS answers shared by every scraper of a Fetcher.
+
+    Entries expire after `robots_ttl` / `dns_ttl` seconds. With a `path`
+    they are also kept in SQLite, so the next run starts without the
+    robots.txt and DNS round trips; without one the cache lives in memory.
+    """
+    def __init__(self, path=None, robots_ttl=24 * 3600, dns_ttl=3600):
+        self.robots_ttl = robots_ttl
+        self.dns_ttl = dns_ttl
+        self.lock = threading.Lock()
+        self.origin_locks = {}
+        self.rules = {}  # origin -> (RobotsRules, expires)
+        self.addresses = {}  # (host, port, family) -> (getaddrinfo results, expires)
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('CREATE TABLE IF NOT EXISTS robots (origin TEXT PRIMARY KEY, status INTEGER, '
+                            'body TEXT, expires REAL)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS dns (host TEXT, port INTEGER, family INTEGER, '
+                            'infos TEXT, expires REAL, PRIMARY KEY (host, port, family))')
+            self.db.commit()
+
+    def robots(self, origin, fetch):
+        """Rules for `origin` (scheme://host[:port]); `fetch(origin)` returns
+        (status or None, text) and is called once per origin when they are
+        missing or expired"""
+        rules = self.cached_robots(origin)
+        if rules is not None:
+            return rules
+        with self.lock:
+            origin_lock = self.origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            # Another thread may have fetched it meanwhile
+            rules = self.cached_robots(origin)
+            if rules is not None:
+                return rules
+            status, text = fetch(origin)
+            ok = status is not None and status < 500
+            expires = time.time() + (self.robots_ttl if ok else RETRY_TTL)
+            rules = RobotsRules.from_response(status, text)
+            with self.lock:
+                self.rules[origin] = (rules, expires)
+                if self.db is not None and ok:
+                    self.db.execute('INSERT OR REPLACE INTO robots VALUES (?, ?, ?, ?)',
+                                    (origin, status, text, expires))
+                    self.db.commit()
+            return rules
+
+    def cached_robots(self, origin):
+        now = time.time()
+        with self.lock:
+            entry = self.rules.get(origin)
+            if entry is None and self.db is not None:
+                row = self.db.execute('SELECT status, body, expires FROM robots WHERE origin = ?',
+                                      (origin,)).fetchone()
+                if row is not None:
+                    entry = self.rules[origin] = (RobotsRules.from_response(row[0], row[1]), row[2])
+            if entry is not None and entry[1] > now:
+                return entry[0]
+        return None
+
+    def resolve(self, host, port, family=socket.AF_UNSPEC):
+        """getaddrinfo(host, port, family, SOCK_STREAM), answered from the cache while fresh"""
+        key = (host, port, int(family))
+        now = time.time()
+        with self.lock:
+            entry = self.addresses.get(key)
+            if entry is None and self.db is not None:
+                row = self.db.execute('SELECT infos, expires FROM dns WHERE host = ? AND port = ? AND family = ?',
+                                      key).fetchone()
+                if row is not None:
+                    infos = [(f, t, p, name, tuple(addr)) for f, t, p, name, addr in json.loads(row[0])]
+                    entry = self.addresses[key] = (infos, row[1])
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+        infos = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+        expires = now + self.dns_ttl
+        with self.lock:
+            self.addresses[key] = (infos, expires)
+            if self.db is not None:
+                self.db.execute('INSERT OR REPLACE INTO dns VALUES (?, ?, ?, ?, ?)',
+                                key + (json.dumps([list(info) for info in infos]), expires))
+                self.db.commit()
+        return infos
+
+    def forget(self, host, port, family=socket.AF_UNSPEC):
+        """Drop addresses that no longer accept connections"""
+        key = (host, port, int(family))
+        with self.lock:
+            self.addresses.pop(key, None)
+            if self.db is not None:
+                self.db.execute('DELETE FROM dns WHERE host = ? AND port = ? AND family = ?', key)
+                self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from UrlCanon import canonicalize
+
+
+def cache_key(url):
+    return canonicalize(url)
+
+
+class CachedPage:
+    """A stored response and the validators to revalidate it with"""
+    def __init__(self, url, etag, last_modified, headers, body):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers
+        self.body = body
+
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self, not_modified):
+        """Turn a 304 into the 200 response it stands for"""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.elapsed = not_modified.elapsed
+        response._content = self.body
+        return response
+
+
+class HttpCache:
+    """On-disk conditional-GET cache with LRU eviction by total body size.
+
+    Besides the body it keeps the parse results scrapers store through
+    Fetcher.extract, so an unchanged page is neither downloaded nor parsed.
+    """
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, '
+                        'last_modified TEXT, headers TEXT, body BLOB, size INTEGER, accessed REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS extracted (url TEXT, kind TEXT, result TEXT, '
+                        'PRIMARY KEY (url, kind))')
+        self.db.commit()
+        self.total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def lookup(self, url):
+        key = cache_key(url)
+        with self.lock:
+            row = self.db.execute('SELECT etag, last_modified, headers, body FROM pages WHERE url = ?',
+                                  (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE pages SET accessed = ? WHERE url = ?', (time.time(), key))
+            self.db.commit()
+        return CachedPage(url, row[0], row[1], json.loads(row[2]), row[3])
+
+    def store(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        key = cache_key(url)
+        body = response.content
+        # Bodies are stored decoded
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+        with self.lock:
+            old = self.db.execute('SELECT size FROM pages WHERE url = ?', (key,)).fetchone()
+            if old:
+                self.total -= old[0]
+            self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (key, etag, last_modified, json.dumps(headers), body, len(body), time.time()))
+            # New content invalidates earlier parse results
+            self.db.execute('DELETE FROM extracted WHERE url = ?', (key,))
+            self.total += len(body)
+            if self.total > self.max_bytes:
+                self.evict()
+            self.db.commit()
+
+    def evict(self):
+        """Drop least recently used pages until the cache is at 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        while self.total > target:
+            rows = self.db.execute('SELECT url, size FROM pages ORDER BY accessed LIMIT 100').fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                if self.total <= target:
+                    break
+                self.db.execute('DELETE FROM pages WHERE url = ?', (url,))
+                self.db.execute('DELETE FROM extracted WHERE url = ?', (url,))
+                self.total -= size
+
+    def get_extracted(self, url, kind):
+        with self.lock:
+            row = self.db.execute('SELECT result FROM extracted WHERE url = ? AND kind = ?',
+                                  (cache_key(url), kind)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_extracted(self, url, kind, result):
+        key = cache_key(url)
+        with self.lock:
+            # Only pages still in the cache can be revalidated later
+            if self.db.execute('SELECT 1 FROM pages WHERE url = ?', (key,)).fetchone() is None:
+                return
+            self.db.execute('INSERT OR REPLACE INTO extracted VALUES (?, ?, ?)',
+                            (key, kind, json.dumps(result)))
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
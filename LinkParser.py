@@ -0,0 +1,137 @@
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+from ScriptExtract import script_links
+
+MAX_ANCHOR_TEXT = 80
+
+
+class HrefParser(HTMLParser):
+    """Collects href values of the given tags while streaming, without a DOM.
+
+    With `with_text`, the text of each <a> is kept in `anchors` (first
+    occurrence of an href wins). With `scripts`, links found in inline
+    scripts and JSON payloads (see ScriptExtract) are added to `hrefs`.
+    """
+    def __init__(self, tags=('a',), with_text=False, scripts=True):
+        super().__init__(convert_charrefs=True)
+        self.tags = set(tags)
+        self.hrefs = []
+        self.with_text = with_text
+        self.anchors = {}
+        self.text_href = None
+        self.text = []
+        self.scripts = scripts
+        self.script_type = None
+        self.script = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script' and self.scripts:
+            # The parser hands over the body as raw data up to </script>
+            attrs = dict(attrs)
+            if 'src' not in attrs:
+                self.script_type = (attrs.get('type') or '').strip().lower()
+            return
+        if tag not in self.tags:
+            return
+        href = None
+        # Last duplicate wins, like BeautifulSoup
+        for name, value in attrs:
+            if name == 'href' and value is not None:
+                href = value
+        if href is not None:
+            self.hrefs.append(href)
+            if self.with_text and tag == 'a':
+                self.close_anchor()
+                self.text_href = href
+
+    def handle_data(self, data):
+        if self.script_type is not None:
+            self.script.append(data)
+        elif self.text_href is not None:
+            self.text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self.script_type is not None:
+            self.hrefs.extend(script_links(self.script_type, ''.join(self.script)))
+            self.script_type = None
+            self.script = []
+        if tag == 'a' and self.text_href is not None:
+            self.close_anchor()
+
+    def close_anchor(self):
+        if self.text_href is None:
+            return
+        text = ' '.join(''.join(self.text).split())[:MAX_ANCHOR_TEXT]
+        if text and self.text_href not in self.anchors:
+            self.anchors[self.text_href] = text
+        self.text_href = None
+        self.text = []
+
+
+def soup_tags(soup, tags, scripts):
+    """Tags of `tags` with an href and, with `scripts`, inline scripts, in document order"""
+    names = list(tags) + ['script'] if scripts else list(tags)
+    for tag in soup.find_all(names):
+        if tag.name == 'script' and 'script' not in tags:
+            if not tag.has_attr('src'):
+                yield tag
+        elif tag.has_attr('href'):
+            yield tag
+
+
+def script_tag_links(tag):
+    return script_links(tag.get('type', '').strip().lower(), tag.string or '')
+
+
+def soup_hrefs(html, tags=('a',), scripts=True):
+    soup = BeautifulSoup(html, 'html.parser')
+    hrefs = []
+    for tag in soup_tags(soup, tags, scripts):
+        if tag.has_attr('href'):
+            hrefs.append(tag['href'])
+        else:
+            hrefs.extend(script_tag_links(tag))
+    return hrefs
+
+
+def soup_links(html, tags=('a',), scripts=True):
+    soup = BeautifulSoup(html, 'html.parser')
+    hrefs = []
+    anchors = {}
+    for tag in soup_tags(soup, tags, scripts):
+        if not tag.has_attr('href'):
+            hrefs.extend(script_tag_links(tag))
+            continue
+        hrefs.append(tag['href'])
+        if tag.name == 'a':
+            text = ' '.join(tag.get_text(' ').split())[:MAX_ANCHOR_TEXT]
+            if text:
+                anchors.setdefault(tag['href'], text)
+    return {'hrefs': hrefs, 'anchors': anchors}
+
+
+def extract_links(html, tags=('a',), scripts=True):
+    """Return {'hrefs': [...], 'anchors': {href: text}} for scoring links"""
+    parser = HrefParser(tags, with_text=True, scripts=scripts)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        return soup_links(html, tags, scripts)
+    parser.close_anchor()
+    return {'hrefs': parser.hrefs, 'anchors': parser.anchors}
+
+
+def extract_hrefs(html, tags=('a',), scripts=True):
+    """Return raw href values of `tags` and links in inline scripts, in document order.
+
+    Falls back to BeautifulSoup if the streaming parser chokes on the markup.
+    """
+    parser = HrefParser(tags, scripts=scripts)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        return soup_hrefs(html, tags, scripts)
+    return parser.hrefs
@@ -0,0 +1,217 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Where a page's time goes: name resolution, TCP connect, waiting for the
+# response headers, reading the body, parsing the HTML and extracting
+# findings and links from the parsed page
+PHASES = ('dns', 'connect', 'ttfb', 'download', 'parse', 'extract')
+
+# Upper bounds in seconds, Prometheus style
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile; 0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float('inf') else self.buckets[-2]
+        return self.buckets[-2]
+
+    def summary(self):
+        return {'count': self.count, 'seconds': round(self.sum, 3),
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95)}
+
+
+class CrawlMetrics:
+    """Counters and per-phase latency histograms for one Fetcher.
+
+    Fetcher records requests, bytes, statuses and the network phases;
+    scrapers time parsing and extraction and report how many discovered
+    links were already queued. A page counts once its extract phase ran.
+    Queues handed to `watch` are summed for the queue-depth gauge.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.histograms = {phase: Histogram() for phase in PHASES}
+        self.requests = 0
+        self.bytes = 0
+        self.errors = {}  # status code or exception name -> count
+        self.links = 0
+        self.duplicates = 0
+        self.queues = []
+
+    def observe(self, phase, seconds):
+        with self.lock:
+            self.histograms[phase].observe(seconds)
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def record_response(self, status, ttfb, total, size):
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            self.histograms['ttfb'].observe(ttfb)
+            self.histograms['download'].observe(max(0.0, total - ttfb))
+            if status >= 400:
+                self.errors[str(status)] = self.errors.get(str(status), 0) + 1
+
+    def record_error(self, kind):
+        with self.lock:
+            self.requests += 1
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def count_links(self, seen, duplicates):
+        """`seen` in-scope links found on a page, `duplicates` of them already queued"""
+        with self.lock:
+            self.links += seen
+            self.duplicates += duplicates
+
+    def watch(self, queue):
+        if not any(q is queue for q in self.queues):
+            self.queues.append(queue)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'elapsed': round(time.monotonic() - self.started, 3),
+                'pages': self.histograms['extract'].count,
+                'requests': self.requests,
+                'bytes': self.bytes,
+                'errors': dict(self.errors),
+                'queue': sum(len(q) for q in self.queues),
+                'links': self.links,
+                'duplicates': self.duplicates,
+                'dedup_rate': round(self.duplicates / self.links, 4) if self.links else 0.0,
+                'phases': {phase: h.summary() for phase, h in self.histograms.items()},
+            }
+
+    def prometheus(self):
+        """The metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{labels} {value}')
+
+        with self.lock:
+            metric('crawl_pages_total', 'counter', 'Pages fetched and processed.',
+                   [('', self.histograms['extract'].count)])
+            metric('crawl_requests_total', 'counter', 'HTTP requests sent.', [('', self.requests)])
+            metric('crawl_bytes_total', 'counter', 'Response body bytes read.', [('', self.bytes)])
+            metric('crawl_errors_total', 'counter', 'Failed requests by status code or error.',
+                   [(f'{{status="{kind}"}}', count) for kind, count in sorted(self.errors.items())])
+            metric('crawl_links_total', 'counter', 'In-scope links found on pages.', [('', self.links)])
+            metric('crawl_duplicate_links_total', 'counter', 'Links that were already queued.',
+                   [('', self.duplicates)])
+            metric('crawl_queue_depth', 'gauge', 'URLs waiting in the frontier.',
+                   [('', sum(len(q) for q in self.queues))])
+            samples = []
+            for phase, h in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    samples.append((f'_bucket{{phase="{phase}",le="{le}"}}', cumulative))
+                samples.append((f'_sum{{phase="{phase}"}}', round(h.sum, 6)))
+                samples.append((f'_count{{phase="{phase}"}}', h.count))
+            metric('crawl_phase_seconds', 'histogram', 'Time spent per page in each crawl phase.', samples)
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsReporter:
+    """Prints a JSON metrics line every `interval` seconds and, with `port`,
+    serves the Prometheus text format at http://host:port/metrics.
+
+    Rates in the log line are over the interval since the previous line.
+    """
+    def __init__(self, metrics, interval=10.0, port=None, host='127.0.0.1'):
+        self.metrics = metrics
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.last = metrics.snapshot()
+        self.thread = None
+        self.server = None
+        if interval:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        if port is not None:
+            self.server = serve_metrics(metrics, port, host)
+            print(f"Serving metrics on http://{host}:{self.server.server_address[1]}/metrics")
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.log()
+
+    def log(self):
+        snapshot = self.metrics.snapshot()
+        seconds = max(snapshot['elapsed'] - self.last['elapsed'], 1e-9)
+        line = {'event': 'metrics',
+                'pages_per_sec': round((snapshot['pages'] - self.last['pages']) / seconds, 2),
+                'bytes_per_sec': round((snapshot['bytes'] - self.last['bytes']) / seconds, 1)}
+        line.update(snapshot)
+        self.last = snapshot
+        print(json.dumps(line))
+
+    def stop(self):
+        """Stop reporting and print a final line"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.log()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def serve_metrics(metrics, port, host='127.0.0.1'):
+    """Serve metrics.prometheus() at /metrics from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+
+def parse_body(parse, content, encoding):
+    """Decode and parse a page inside a worker process; returns (page, seconds)"""
+    start = time.perf_counter()
+    try:
+        html = content.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        # A charset Python does not know; requests falls back the same way
+        html = content.decode('utf-8', errors='replace')
+    return parse(html), time.perf_counter() - start
+
+
+class ParsePipeline:
+    """Fetch on threads, parse/extract in worker processes, apply in this thread.
+
+    The scraper supplies `claim_next()`, `fetch_page(url)`, a picklable
+    `parse_func(html)` with its `parse_kind`, `handle_page(url, page)` and
+    `handle_error(url, e)`. At most `max_pending` pages are fetched or being
+    parsed at any time, which bounds the raw bodies held in memory. With a
+    CrawlState the pipeline drains every `checkpoint_every` pages and
+    checkpoints, so a saved state never contains half-processed pages; an
+    interrupt rolls back to the last checkpoint for the same reason.
+    """
+    def __init__(self, scraper, workers=None, fetch_threads=8, max_pending=None, checkpoint_every=50):
+        self.scraper = scraper
+        self.workers = workers or os.cpu_count() or 1
+        self.fetch_threads = fetch_threads
+        self.max_pending = max_pending or max(2 * self.workers, fetch_threads)
+        self.checkpoint_every = checkpoint_every
+
+    def run(self):
+        state = getattr(self.scraper, 'state', None)
+        self.scraper.fetcher.resize_pool(self.fetch_threads)
+
+        with ThreadPoolExecutor(self.fetch_threads) as io_pool, \
+                ProcessPoolExecutor(self.workers) as cpu_pool:
+            try:
+                self.pump(io_pool, cpu_pool, state)
+            except KeyboardInterrupt:
+                io_pool.shutdown(wait=False, cancel_futures=True)
+                cpu_pool.shutdown(wait=False, cancel_futures=True)
+                # Claimed but unfinished pages must be crawled again on --resume
+                if state is not None:
+                    state.rollback()
+                raise
+
+    def pump(self, io_pool, cpu_pool, state):
+        scraper = self.scraper
+        fetcher = scraper.fetcher
+        pending = {}  # future -> (stage, url, response)
+        handled = 0
+        next_checkpoint = self.checkpoint_every
+
+        while True:
+            draining = state is not None and handled >= next_checkpoint
+            while not draining and len(pending) < self.max_pending:
+                url = scraper.claim_next()
+                if url is None:
+                    break
+                pending[io_pool.submit(scraper.fetch_page, url)] = ('fetch', url, None)
+
+            if not pending:
+                if not draining:
+                    break
+                state.checkpoint()
+                next_checkpoint = handled + self.checkpoint_every
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, url, response = pending.pop(future)
+                try:
+                    if stage == 'fetch':
+                        response = future.result()
+                        page = fetcher.cached_extract(response, scraper.parse_kind)
+                        if page is None:
+                            job = cpu_pool.submit(parse_body, scraper.parse_func,
+                                                  response.content, response.encoding)
+                            pending[job] = ('parse', url, response)
+                            continue
+                    else:
+                        page, seconds = future.result()
+                        fetcher.metrics.observe('parse', seconds)
+                        fetcher.store_extract(response, scraper.parse_kind, page)
+                    with fetcher.metrics.timer('extract'):
+                        scraper.handle_page(url, page)
+                    handled += 1
+                except requests.RequestException as e:
+                    scraper.handle_error(url, e)
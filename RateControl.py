@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Answers that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date); None if absent or invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with jitter: about base * 2**attempt, capped"""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class HostRate:
+    """Pacing and concurrency of requests to one host"""
+    def __init__(self, delay, concurrency):
+        self.base_delay = delay
+        self.delay = delay
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.blocked_until = 0.0
+        self.window = []  # times to first byte since the last adjustment
+        self.baseline = None  # lowest window mean seen
+        self.strikes = 0  # throttles in a row
+        self.learning = False  # robots.txt is being read
+
+
+class RateController:
+    """Adaptive per-host politeness shared by every request of a Fetcher.
+
+    Each host starts at `initial_concurrency` requests in flight with
+    request starts `delay` (or its robots.txt Crawl-delay, if larger)
+    seconds apart. Latency is judged per window of successful requests
+    (at least as many as are allowed in flight): while the mean time to
+    first byte stays within `latency_slack` times the best window seen,
+    concurrency grows by one up to `max_concurrency`; when it climbs past
+    twice that it shrinks again. A 429/503, a timeout or a connection error
+    halves concurrency, doubles the delay and blocks the host for the
+    Retry-After time or an exponential backoff; the delay recovers
+    towards its base as requests succeed again.
+    """
+    def __init__(self, delay=0.0, initial_concurrency=2, max_concurrency=8, max_delay=60.0,
+                 latency_slack=1.5, backoff_base=1.0):
+        self.delay = delay
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_delay = max_delay
+        self.latency_slack = latency_slack
+        self.backoff_base = backoff_base
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    def claim(self, host):
+        """True for the first request to a new host, whose caller should look
+        up the Crawl-delay; other requests to it wait until learned(host)"""
+        with self.condition:
+            if host in self.hosts:
+                return False
+            self.host(host).learning = True
+            return True
+
+    def learned(self, host):
+        with self.condition:
+            self.host(host).learning = False
+            self.condition.notify_all()
+
+    def host(self, host):
+        # Callers hold self.condition
+        rate = self.hosts.get(host)
+        if rate is None:
+            rate = self.hosts[host] = HostRate(self.delay, self.initial_concurrency)
+        return rate
+
+    def set_delay(self, host, seconds):
+        """Raise the base delay of a host, e.g. to its Crawl-delay"""
+        with self.condition:
+            rate = self.host(host)
+            rate.base_delay = min(self.max_delay, max(rate.base_delay, seconds or 0.0))
+            rate.delay = max(rate.delay, rate.base_delay)
+
+    def acquire(self, host):
+        """Block until a request to `host` may start"""
+        with self.condition:
+            rate = self.host(host)
+            while True:
+                now = time.monotonic()
+                start = max(rate.next_start, rate.blocked_until)
+                if not rate.learning and rate.in_flight < rate.concurrency and start <= now:
+                    break
+                self.condition.wait(start - now if start > now and not rate.learning else None)
+            rate.in_flight += 1
+            rate.next_start = now + rate.delay
+
+    def release(self, host, latency=None, status=None, retry_after=None):
+        """Record how a request went; `latency` is None when it failed outright"""
+        with self.condition:
+            rate = self.host(host)
+            rate.in_flight -= 1
+            if latency is None or status in THROTTLE_STATUSES:
+                self.slow_down(rate, retry_after)
+            else:
+                self.speed_up(rate, latency)
+            self.condition.notify_all()
+
+    def cancel(self, host):
+        """Give back the slot of a request that says nothing about the host"""
+        with self.condition:
+            self.host(host).in_flight -= 1
+            self.condition.notify_all()
+
+    def slow_down(self, rate, retry_after):
+        rate.strikes += 1
+        rate.window = []
+        rate.concurrency = max(1, rate.concurrency // 2)
+        rate.delay = min(self.max_delay, max(rate.delay * 2, rate.base_delay, 0.1))
+        pause = retry_after
+        if pause is None:
+            pause = backoff_delay(rate.strikes - 1, self.backoff_base, self.max_delay)
+        rate.blocked_until = max(rate.blocked_until, time.monotonic() + min(pause, self.max_delay))
+
+    def speed_up(self, rate, latency):
+        rate.strikes = 0
+        rate.delay = max(rate.base_delay, rate.delay * 0.8)
+        rate.window.append(latency)
+        if len(rate.window) < max(4, rate.concurrency):
+            return
+        mean = sum(rate.window) / len(rate.window)
+        rate.window = []
+        rate.baseline = mean if rate.baseline is None else min(rate.baseline, mean)
+        if mean <= rate.baseline * self.latency_slack:
+            rate.concurrency = min(self.max_concurrency, rate.concurrency + 1)
+        elif mean > rate.baseline * 2 * self.latency_slack:
+            rate.concurrency = max(1, rate.concurrency - 1)
+
+    def summary(self):
+        with self.condition:
+            return {host: {'concurrency': r.concurrency, 'delay': round(r.delay, 3)}
+                    for host, r in self.hosts.items()}
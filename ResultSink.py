@@ -0,0 +1,82 @@
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+FIELDS = ('kind', 'value', 'source', 'time')
+
+
+class ResultSink:
+    """Appends each finding to a file as soon as it is discovered.
+
+    Rows are buffered and flushed every `flush_every` rows or
+    `flush_interval` seconds, whichever comes first, so another process
+    can follow the file while the crawl is running. A resumed crawl
+    appends to the existing file and may repeat findings that were not
+    checkpointed, so readers should dedupe on (kind, value, source).
+    """
+    def __init__(self, path, append=False, flush_every=100, flush_interval=1.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.file = open(path, 'a' if append else 'w', newline='', encoding='utf-8', buffering=1024 * 1024)
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.count = 0
+
+    def write(self, kind, value, source=''):
+        row = {'kind': kind, 'value': value, 'source': source,
+               'time': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+        with self.lock:
+            self.write_row(row)
+            self.count += 1
+            self.pending += 1
+            if self.pending >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush_locked()
+
+    def write_row(self, row):
+        raise NotImplementedError
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        self.file.flush()
+        self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class JsonlSink(ResultSink):
+    def write_row(self, row):
+        self.file.write(json.dumps(row) + '\n')
+
+
+class CsvSink(ResultSink):
+    def __init__(self, path, append=False, **kwargs):
+        has_header = append and os.path.exists(path) and os.path.getsize(path) > 0
+        super().__init__(path, append, **kwargs)
+        self.writer = csv.DictWriter(self.file, FIELDS)
+        if not has_header:
+            self.writer.writeheader()
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+
+SINKS = {'jsonl': JsonlSink, 'csv': CsvSink}
+
+
+def make_sink(path, fmt=None, append=False):
+    """Open a sink for `path`; the format defaults to the file extension"""
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    return SINKS[fmt](path, append)
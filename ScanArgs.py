@@ -0,0 +1,107 @@
+import argparse
+
+from CrawlState import CrawlState
+from Fetcher import Fetcher, share_fetcher
+from FileMatcher import FileMatcher
+from HostCache import HostCache
+from Metrics import MetricsReporter
+from RateControl import RateController
+from HttpCache import HttpCache
+from ResultSink import make_sink, SINKS
+from Sitemap import parse_lastmod
+from VisitedStore import make_visited_store
+
+
+def since_date(text):
+    value = parse_lastmod(text)
+    if value is None:
+        raise argparse.ArgumentTypeError(f"invalid date: {text!r} (use e.g. 2024-05-01)")
+    return value
+
+
+def scan_parser(description):
+    """Return a parser with the command-line options shared by every scanner"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--state', help='SQLite file holding the crawl state (default: in memory only)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the scan saved in --state instead of starting over')
+    parser.add_argument('--visited', choices=('exact', 'hashed', 'bloom'), default='exact',
+                        help='in-memory store for visited and queued URLs; ignored with --state (default: exact)')
+    parser.add_argument('--error-rate', type=float, default=0.001,
+                        help='false-positive rate of the bloom visited store (default: 0.001)')
+    parser.add_argument('--cache', help='SQLite file for the conditional-GET response cache')
+    parser.add_argument('--cache-size', type=int, default=512,
+                        help='maximum size of cached bodies in MB (default: 512)')
+    parser.add_argument('--host-cache', help='SQLite file keeping robots.txt rules and DNS answers between runs')
+    parser.add_argument('--robots-ttl', type=float, default=24,
+                        help='hours a cached robots.txt is trusted (default: 24)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='parse/extract worker processes; 0 parses in-process (default: 0)')
+    parser.add_argument('--output', help='append each finding to this file as it is found')
+    parser.add_argument('--output-format', choices=sorted(SINKS),
+                        help='format of --output (default: from its extension, else jsonl)')
+    parser.add_argument('--max-page-size', type=int, default=10,
+                        help='skip pages whose body is larger than this many MB (default: 10)')
+    parser.add_argument('--probe', action='store_true',
+                        help='HEAD candidate PDF/sensitive-file links to confirm them before recording')
+    parser.add_argument('--rules',
+                        help='file of extra sensitive-file rules, one "category ext|name|contains pattern" per line')
+    parser.add_argument('--priority', action='store_true',
+                        help='crawl the links most likely to yield results first instead of breadth-first')
+    parser.add_argument('--sitemap', action='store_true',
+                        help='also queue every page listed in the site\'s sitemaps')
+    parser.add_argument('--since', type=since_date,
+                        help='skip sitemap entries whose lastmod is older than this date')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='retries of connection errors, timeouts, 429 and 503 answers (default: 2)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='pace each host adaptively: honour Crawl-delay, back off on 429/503 '
+                             'and raise concurrency while latency stays flat')
+    parser.add_argument('--max-host-concurrency', type=int, default=8,
+                        help='upper bound for --adaptive requests in flight per host (default: 8)')
+    parser.add_argument('--metrics-interval', type=float, default=0,
+                        help='print a JSON metrics line every this many seconds; 0 disables (default: 0)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='serve Prometheus metrics at http://127.0.0.1:PORT/metrics during the scan')
+    return parser
+
+
+def scan_args(description, parser=None):
+    parser = parser or scan_parser(description)
+    args = parser.parse_args()
+    if args.resume and not args.state:
+        parser.error('--resume requires --state')
+    return args
+
+
+def open_state(args, path=None):
+    path = path or args.state
+    return CrawlState(path, resume=args.resume) if path else None
+
+
+def open_sink(args):
+    if not args.output:
+        return None
+    # A resumed scan continues the file the interrupted run started
+    return make_sink(args.output, args.output_format, append=args.resume)
+
+
+def open_visited(args):
+    return make_visited_store(args.visited, args.error_rate)
+
+
+def open_matcher(args):
+    return FileMatcher.with_rules_file(args.rules) if args.rules else FileMatcher()
+
+
+def open_metrics(args, fetcher):
+    if not args.metrics_interval and args.metrics_port is None:
+        return None
+    return MetricsReporter(fetcher.metrics, args.metrics_interval, args.metrics_port)
+
+
+def open_fetcher(args):
+    cache = HttpCache(args.cache, args.cache_size * 1024 * 1024) if args.cache else None
+    rate = RateController(max_concurrency=args.max_host_concurrency) if args.adaptive else None
+    hosts = HostCache(args.host_cache, robots_ttl=args.robots_ttl * 3600)
+    return share_fetcher(Fetcher(cache=cache, retries=args.retries, rate=rate, hosts=hosts))
@@ -0,0 +1,127 @@
+import json
+import re
+from functools import lru_cache
+
+# Inline scripts larger than this are bundled code, not page data
+MAX_SCRIPT_CHARS = 2 * 1024 * 1024
+MAX_URL_CHARS = 2000
+
+JSON_TYPES = ('application/ld+json', 'application/json')
+TYPE_ATTR = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.I)
+
+# window.__NEXT_DATA__ = {...}, window.__INITIAL_STATE__ = [...], ...
+STATE_ASSIGNMENT = re.compile(r'__[A-Za-z0-9_]+__\s*=\s*(?=[\[{])')
+# fetch("/api"), window.open('/x'), location.assign(...), href = "/y", {url: "/z"}, "src": "..."
+JS_URL = re.compile(r'(?:\bfetch\s*\(|\b(?:open|assign|replace)\s*\(|'
+                    r'\b(?:href|src|action|url|location)["\']?\s*[:=])\s*(["\'`])([^"\'`\s<>{}\\]+)\1')
+# Any string literal with an @ or a percent-encoded one, for the email extractor
+AT_LITERAL = re.compile(r'(["\'`])([^"\'`\n]*?(?:@|%40)[^"\'`\n]*?)\1')
+
+# Relative URLs count as links under JSON keys containing one of these
+URL_KEY = re.compile(r'url|href|link|src|@id|sameas|contenturl|mainentityofpage', re.I)
+URL_PREFIXES = ('http://', 'https://', '//', '/', './', '../')
+# Relative paths to these count as links under any JSON key
+DOCUMENT_EXTENSIONS = {'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'odt', 'ods', 'csv', 'zip'}
+# What scripts load rather than link to
+ASSET_EXTENSIONS = {
+    'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'avif', 'ico', 'bmp', 'css', 'js', 'mjs', 'map',
+    'woff', 'woff2', 'ttf', 'eot', 'otf', 'mp4', 'webm', 'mp3', 'ogg',
+}
+
+
+def script_type(attrs):
+    """The lower-cased type of a <script> from its attribute text"""
+    match = TYPE_ATTR.search(attrs)
+    return match.group(1).lower() if match else ''
+
+
+def is_candidate(value):
+    return value.startswith(URL_PREFIXES) or '@' in value or '%40' in value
+
+
+def json_strings(value, key=''):
+    """(key, string) for the strings of a parsed JSON value that may be
+    links or hold an email, in document order; list items take the key of
+    their list"""
+    found = []
+    stack = [(key, value)]
+    while stack:
+        key, value = stack.pop()
+        if type(value) is str:
+            if is_candidate(value):
+                found.append((key, value))
+        elif type(value) is dict:
+            stack.extend(reversed(value.items()))
+        elif type(value) is list:
+            stack.extend((key, item) for item in reversed(value))
+    return found
+
+
+# The link and the email extractor both read the scripts of a page
+@lru_cache(maxsize=8)
+def script_values(type_, body):
+    """(key, string) pairs from one inline script that may be links or hold
+    an email.
+
+    A JSON script (JSON-LD, Next.js __NEXT_DATA__) gives the strings in
+    it; JavaScript gives the strings of state objects assigned to
+    __NAME__ globals plus URL-like and @-containing string literals, which
+    is also the fallback for JSON that does not parse.
+    """
+    if len(body) > MAX_SCRIPT_CHARS or not body.strip():
+        return ()
+    values = []
+    if type_ in JSON_TYPES:
+        try:
+            return tuple(json_strings(json.loads(body)))
+        except ValueError:
+            pass
+    elif '__' in body:
+        decoder = json.JSONDecoder()
+        for match in STATE_ASSIGNMENT.finditer(body):
+            try:
+                values.extend(json_strings(decoder.raw_decode(body, match.end())[0]))
+            except ValueError:
+                continue
+    values.extend(('url', match.group(2)) for match in JS_URL.finditer(body))
+    if '@' in body or '%40' in body:
+        values.extend(('', match.group(2)) for match in AT_LITERAL.finditer(body))
+    return tuple(values)
+
+
+@lru_cache(maxsize=1024)
+def is_link_key(key):
+    return URL_KEY.search(key) is not None
+
+
+def is_link(key, value):
+    """Whether a script string is a page or document worth following:
+    absolute URLs anywhere, relative ones under link-like keys or when
+    they name a document"""
+    if len(value) > MAX_URL_CHARS or not value.startswith(URL_PREFIXES):
+        return False
+    if ' ' in value or '\n' in value or '${' in value:
+        return False
+    name = value.partition('?')[0].partition('#')[0].rpartition('/')[2]
+    extension = name.rpartition('.')[2].lower() if '.' in name else ''
+    if extension in ASSET_EXTENSIONS:
+        return False
+    return value.startswith(('http://', 'https://', '//')) or is_link_key(key) or extension in DOCUMENT_EXTENSIONS
+
+
+def script_links(type_, body):
+    """Link targets in one inline script, in order of appearance"""
+    links = []
+    seen = set()
+    for key, value in script_values(type_, body):
+        if value not in seen and is_link(key, value):
+            seen.add(value)
+            links.append(value)
+    return links
+
+
+def script_texts(type_, body):
+    """Strings in one inline script that may hold email addresses"""
+    if '@' not in body and '%40' not in body:
+        return []
+    return [value for key, value in script_values(type_, body) if '@' in value or '%40' in value]
@@ -0,0 +1,118 @@
+import requests
+from urllib.parse import urlparse
+from contextlib import nullcontext
+from Fetcher import get_fetcher, MAX_PAGE_BYTES, HTML_TYPES
+from LinkParser import extract_links
+from UrlCanon import canonicalize
+from Frontier import PriorityFrontier
+from ParsePool import ParsePipeline
+
+
+class SiteScraper:
+    """Frontier, fetching and crawl loop shared by the single-site scanners.
+
+    Subclasses implement `handle_page(url, page)` to record a parsed page
+    and queue its links, and `report()`; scanners that extract more than
+    links also set `parse_kind` and a picklable `parse_func(html)`.
+    """
+    parse_kind = 'links+scripts'
+    parse_func = staticmethod(extract_links)
+
+    def __init__(self, start_url, max_pages=50, fetcher=None, state=None, visited=None, sink=None, enqueued=None):
+        self.start_url = start_url
+        self.max_pages = max_pages
+        self.state = state
+        self.sink = sink
+        if state:
+            self.visited_urls = state.visited
+            self.urls_to_visit = state.queue
+            self.enqueued = state.enqueued
+        else:
+            self.visited_urls = visited if visited is not None else set()
+            self.urls_to_visit = PriorityFrontier()
+            self.enqueued = enqueued if enqueued is not None else set()
+        if not state or state.is_new():
+            self.enqueue(canonicalize(start_url))
+        self.domain = urlparse(canonicalize(start_url)).netloc
+        self.fetcher = fetcher or get_fetcher()
+        self.headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+        self.max_page_bytes = MAX_PAGE_BYTES
+        self.scorer = None  # a UrlScorer makes the frontier best-first
+
+    def is_valid_url(self, url):
+        parsed = urlparse(url)
+        return bool(parsed.netloc) and parsed.netloc == self.domain
+
+    def get_all_links(self, url):
+        try:
+            response = self.fetch_page(url)
+            page = self.fetcher.extract(response, self.parse_kind, self.parse_func)
+            with self.fetcher.metrics.timer('extract'):
+                self.handle_page(url, page)
+        except requests.RequestException as e:
+            self.handle_error(url, e)
+
+    def fetch_page(self, url):
+        response = self.fetcher.get(url, headers=self.headers, timeout=5,
+                                    max_bytes=self.max_page_bytes, content_types=HTML_TYPES)
+        response.raise_for_status()
+        return response
+
+    def handle_page(self, url, page):
+        raise NotImplementedError
+
+    def link_score(self, url, text='', parent_hits=0):
+        return self.scorer.score(url, text, parent_hits) if self.scorer else 0.0
+
+    def enqueue(self, url, score=0.0):
+        """Queue a canonical URL unless it has been queued before"""
+        if url not in self.enqueued:
+            self.enqueued.add(url)
+            self.urls_to_visit.append(url, score)
+
+    def handle_error(self, url, e):
+        print(f"Error fetching {url}: {e}")
+
+    def claim_next(self):
+        """Pop the next unvisited URL and mark it visited; None when done"""
+        while self.urls_to_visit and len(self.visited_urls) < self.max_pages:
+            current_url = self.urls_to_visit.popleft()
+
+            if current_url in self.visited_urls:
+                continue
+
+            if not self.fetcher.allowed(current_url):
+                print(f"Skipping disallowed URL: {current_url}")
+                continue
+
+            print(f"Scraping: {current_url}")
+            self.visited_urls.add(current_url)
+            return current_url
+        return None
+
+    def scrape(self, workers=0):
+        self.fetcher.metrics.watch(self.urls_to_visit)
+        try:
+            if workers:
+                ParsePipeline(self, workers).run()
+            else:
+                while True:
+                    with self.page_scope():
+                        current_url = self.claim_next()
+                        if current_url is None:
+                            break
+                        self.get_all_links(current_url)
+        except KeyboardInterrupt:
+            if not self.state:
+                raise
+            print("\nInterrupted! Progress saved, rerun with --resume to continue.")
+        if self.state:
+            self.state.checkpoint()
+
+        self.report()
+
+    def page_scope(self):
+        return self.state.page() if self.state else nullcontext()
+
+    def report(self):
+        raise NotImplementedError
@@ -0,0 +1,192 @@
+import gzip
+import io
+import zlib
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlparse
+from xml.etree import ElementTree as ET
+
+import requests
+
+from UrlCanon import canonicalize
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_lastmod(text):
+    """Parse a W3C datetime such as 2024-05-01 or 2024-05-01T10:00:00Z; None if invalid"""
+    if not text:
+        return None
+    text = text.strip()
+    if text.endswith(('Z', 'z')):
+        text = text[:-1] + '+00:00'
+    try:
+        value = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class ChunkStream(io.RawIOBase):
+    """Readable raw stream over an iterator of byte chunks"""
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.rest = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.rest:
+            self.rest = next(self.chunks, None)
+            if self.rest is None:
+                self.rest = b''
+                return 0
+        size = min(len(buffer), len(self.rest))
+        buffer[:size] = self.rest[:size]
+        self.rest = self.rest[size:]
+        return size
+
+
+def open_stream(raw):
+    """Wrap a binary stream, transparently gunzipping .xml.gz content"""
+    stream = io.BufferedReader(raw, 64 * 1024)
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        stream = io.BufferedReader(gzip.GzipFile(fileobj=stream), 64 * 1024)
+    return stream
+
+
+def iter_entries(stream):
+    """Yield ('sitemap' | 'url', loc, lastmod) from a sitemap stream.
+
+    XML is read with iterparse and every finished entry is cleared, so
+    memory stays flat however large the file is. Anything that does not
+    start with '<' is read as a plain-text sitemap, one URL per line.
+    """
+    head = stream.peek(64).lstrip()
+    if not head.startswith((b'<', b'\xef\xbb\xbf<')):
+        for line in stream:
+            line = line.decode('utf-8', errors='replace').strip()
+            if line and not line.startswith('#'):
+                yield 'url', line, None
+        return
+
+    root = None
+    loc = lastmod = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if tag == 'loc':
+            loc = (elem.text or '').strip()
+        elif tag == 'lastmod':
+            lastmod = parse_lastmod(elem.text)
+        elif tag in ('url', 'sitemap'):
+            if loc:
+                yield tag, loc, lastmod
+            loc = lastmod = None
+            root.clear()
+
+
+def parse_sitemap(content):
+    """Return the set of locations in an in-memory sitemap (bytes or str)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    urls = set()
+    try:
+        for _, loc, _ in iter_entries(open_stream(io.BytesIO(content))):
+            urls.add(loc)
+    except (ET.ParseError, OSError, EOFError, zlib.error):
+        pass
+    return urls
+
+
+class SitemapReader:
+    """Streams URLs out of sitemaps and sitemap indexes.
+
+    Indexes are followed recursively up to `max_depth`. With `since`, URLs
+    and child sitemaps whose <lastmod> is older are skipped; entries
+    without a lastmod are always kept.
+    """
+    def __init__(self, fetcher, headers=None, since=None, max_depth=5, max_sitemaps=1000):
+        self.fetcher = fetcher
+        self.headers = headers
+        self.since = since
+        self.max_depth = max_depth
+        self.max_sitemaps = max_sitemaps
+        self.seen = set()
+
+    def is_stale(self, lastmod):
+        return self.since is not None and lastmod is not None and lastmod < self.since
+
+    def discover(self, base_url):
+        """Sitemaps listed in robots.txt, else the conventional /sitemap.xml"""
+        sitemaps = list(self.fetcher.robots(base_url).sitemaps)
+        return sitemaps or [urljoin(base_url, '/sitemap.xml')]
+
+    def entries(self, sitemap_url, depth=0):
+        """Yield (url, lastmod) from one sitemap and, recursively, its children"""
+        if sitemap_url in self.seen or len(self.seen) >= self.max_sitemaps:
+            return
+        self.seen.add(sitemap_url)
+
+        children = []
+        try:
+            response = self.fetcher.get(sitemap_url, headers=self.headers, timeout=30, stream=True)
+            try:
+                if response.status_code != 200:
+                    return
+                print(f"Reading sitemap: {sitemap_url}")
+                stream = open_stream(ChunkStream(response.iter_content(64 * 1024)))
+                for kind, loc, lastmod in iter_entries(stream):
+                    if self.is_stale(lastmod):
+                        continue
+                    if kind == 'sitemap':
+                        children.append(loc)
+                    else:
+                        yield loc, lastmod
+            finally:
+                response.close()
+        except (requests.RequestException, ET.ParseError, OSError, EOFError, zlib.error) as e:
+            print(f"Sitemap error ({sitemap_url}): {e}")
+
+        # Children are read after the parent's connection is released
+        if depth < self.max_depth:
+            for child in children:
+                yield from self.entries(child, depth + 1)
+
+    def urls(self, sitemap_urls, domain=None):
+        """URLs from all sitemaps on `domain`, most recently modified first"""
+        found = {}
+        for sitemap_url in sitemap_urls:
+            for url, lastmod in self.entries(sitemap_url):
+                if domain and urlparse(url).netloc != domain:
+                    continue
+                if url not in found or (lastmod and (found[url] is None or lastmod > found[url])):
+                    found[url] = lastmod
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        return sorted(found, key=lambda url: found[url] or oldest, reverse=True)
+
+
+def sitemap_seeds(base_url, fetcher, headers=None, since=None):
+    """Enumerate a site from its sitemaps, most recently modified first"""
+    reader = SitemapReader(fetcher, headers, since)
+    return reader.urls(reader.discover(base_url), urlparse(base_url).netloc)
+
+
+def seed_frontier(scraper, urls):
+    """Queue sitemap URLs behind the start URL of a link-following scraper"""
+    # A resumed crawl already has its frontier
+    if scraper.state and len(scraper.visited_urls):
+        return 0
+    count = 0
+    for url in urls:
+        url = canonicalize(url)
+        if scraper.is_valid_url(url) and url not in scraper.enqueued:
+            scraper.enqueue(url)
+            count += 1
+    print(f"Queued {count} URLs from sitemaps")
+    return count
@@ -0,0 +1,199 @@
+from functools import partial
+from urllib.parse import urlparse, urljoin
+from LinkParser import extract_links
+from UrlCanon import canonicalize
+from Frontier import UrlScorer, merge_keywords, EMAIL_KEYWORDS, DOCUMENT_KEYWORDS
+from SiteScraper import SiteScraper
+from Sitemap import sitemap_seeds, seed_frontier
+from ScanArgs import scan_args, open_state, open_sink, open_visited, open_fetcher, open_metrics, open_matcher
+from EmailFastScan import EmailScraper
+from EmailExtract import extract_emails
+from pdfFastScan import PDFScraper
+from FastSensitiveFilesScan import SensitiveFileScraper, PAGE_EXTENSIONS
+
+
+def parse_emails(html):
+    return sorted(extract_emails(html))
+
+
+def parse_unified(parsers, html):
+    page = extract_links(html)
+    for name, parse in parsers:
+        page[name] = parse(html) if parse else None
+    return page
+
+
+class EmailExtractor:
+    """Finds emails in page text using EmailFastScan's logic"""
+    name = 'emails'
+    parse_func = staticmethod(parse_emails)
+    keywords = EMAIL_KEYWORDS
+
+    def __init__(self, start_url, fetcher=None, writetofile="", state=None, sink=None):
+        self.scraper = EmailScraper(start_url, 0, writetofile, fetcher=fetcher, state=state, sink=sink)
+
+    def process_page(self, url, emails):
+        self.scraper.add_emails(emails, url)
+
+    def claim_link(self, link, source_url):
+        return False
+
+    def results(self):
+        return self.scraper.found_emails
+
+    def report(self):
+        self.scraper.report()
+
+
+class PDFExtractor:
+    """Records links that pdfFastScan would treat as PDFs"""
+    name = 'pdfs'
+    parse_func = None
+    keywords = DOCUMENT_KEYWORDS
+
+    def __init__(self, start_url, fetcher=None, state=None, sink=None, probe=False):
+        self.scraper = PDFScraper(start_url, 0, fetcher=fetcher, state=state, sink=sink)
+        self.scraper.probe = probe
+
+    def process_page(self, url, parsed):
+        pass
+
+    def claim_link(self, link, source_url):
+        if self.scraper.is_pdf_link(link) and self.scraper.confirm_pdf(link):
+            self.scraper.add_pdf(link, source_url)
+            return True
+        return False
+
+    def results(self):
+        return self.scraper.found_pdfs
+
+    def report(self):
+        self.scraper.report()
+
+
+class SensitiveFileExtractor:
+    """Records links that FastSensitiveFilesScan would treat as sensitive"""
+    name = 'files'
+    parse_func = None
+    keywords = DOCUMENT_KEYWORDS
+    # Recorded as findings but still crawled, otherwise the other
+    # extractors would never see pages linked through them
+    page_extensions = PAGE_EXTENSIONS
+
+    def __init__(self, start_url, fetcher=None, state=None, sink=None, probe=False, matcher=None):
+        self.scraper = SensitiveFileScraper(start_url, 0, fetcher=fetcher, state=state, sink=sink)
+        self.scraper.probe = probe
+        if matcher:
+            self.scraper.matcher = matcher
+
+    def process_page(self, url, parsed):
+        pass
+
+    def claim_link(self, link, source_url):
+        if self.scraper.is_sensitive_file(link) and self.scraper.confirm_file(link):
+            self.scraper.add_file(link, source_url)
+            return not urlparse(link).path.lower().endswith(self.page_extensions)
+        return False
+
+    def results(self):
+        return self.scraper.found_files
+
+    def report(self):
+        self.scraper.report()
+
+
+class UnifiedScraper(SiteScraper):
+    """Crawls a site once and runs every extractor on each fetched page.
+
+    An extractor has a module-level `parse_func(html)` (or None) returning
+    a JSON-serialisable result that is cached with the page and can run in
+    a worker process, `process_page(url, parsed)` to record it, and
+    `claim_link(link, source_url)` for outgoing links, which returns True
+    when the link is a download that should not be crawled.
+    """
+    def __init__(self, start_url, max_pages=50, extractors=None, fetcher=None, state=None, visited=None, enqueued=None):
+        super().__init__(start_url, max_pages, fetcher, state, visited, enqueued=enqueued)
+        if extractors is None:
+            extractors = [
+                EmailExtractor(start_url, self.fetcher, state=state),
+                PDFExtractor(start_url, self.fetcher, state),
+                SensitiveFileExtractor(start_url, self.fetcher, state),
+            ]
+        self.extractors = extractors
+        self.parse_kind = 'UnifiedScan+scripts:' + ','.join(e.name for e in extractors)
+        self.parse_func = partial(parse_unified, [(e.name, e.parse_func) for e in extractors])
+
+    def priority_scorer(self):
+        """A UrlScorer weighted for what the extractors look for"""
+        return UrlScorer(merge_keywords(*(e.keywords for e in self.extractors)))
+
+    def handle_page(self, url, page):
+        for extractor in self.extractors:
+            extractor.process_page(url, page[extractor.name])
+
+        anchors = page.get('anchors', {})
+        links = []
+        duplicates = 0
+        hits = len(page.get('emails') or ())
+        for href in page['hrefs']:
+            full_url = canonicalize(urljoin(url, href))
+
+            # Every extractor sees the link, e.g. a .pdf is also a sensitive file
+            claimed = False
+            for extractor in self.extractors:
+                if extractor.claim_link(full_url, url):
+                    claimed = True
+            if claimed:
+                hits += 1
+            elif self.is_valid_url(full_url):
+                if full_url in self.enqueued:
+                    duplicates += 1
+                else:
+                    links.append((full_url, anchors.get(href, '')))
+
+        self.fetcher.metrics.count_links(len(links) + duplicates, duplicates)
+        for full_url, text in links:
+            self.enqueue(full_url, self.link_score(full_url, text, hits))
+
+    def report(self):
+        print(f"\nPages crawled: {len(self.visited_urls)}")
+        for extractor in self.extractors:
+            extractor.report()
+
+
+if __name__ == "__main__":
+    args = scan_args("Scan a site for emails, PDFs and sensitive files in one crawl")
+
+    start_url = input("Enter the starting URL (e.g., https://example.com): ").strip()
+    if not start_url.startswith(('http://', 'https://')):
+        start_url = 'https://' + start_url
+
+    max_pages = input("Enter maximum number of pages to scrape (default 50): ").strip()
+    max_pages = int(max_pages) if max_pages.isdigit() else 50
+
+    writetofile = input("Enter the Save File for the email results (e.g., emailscan.txt): ")
+
+    state = open_state(args)
+    visited = open_visited(args)
+    fetcher = open_fetcher(args)
+    reporter = open_metrics(args, fetcher)
+    sink = open_sink(args)
+    extractors = [
+        EmailExtractor(start_url, fetcher, writetofile, state, sink),
+        PDFExtractor(start_url, fetcher, state, sink, args.probe),
+        SensitiveFileExtractor(start_url, fetcher, state, sink, args.probe, open_matcher(args)),
+    ]
+    scraper = UnifiedScraper(start_url, max_pages, extractors, fetcher, state, visited, open_visited(args))
+    scraper.max_page_bytes = args.max_page_size * 1024 * 1024
+    if args.priority:
+        scraper.scorer = scraper.priority_scorer()
+    if args.sitemap:
+        seed_frontier(scraper, sitemap_seeds(start_url, fetcher, scraper.headers, args.since))
+    scraper.scrape(workers=args.workers)
+    if state:
+        state.close()
+    if sink:
+        sink.close()
+    if reporter:
+        reporter.stop()
+    fetcher.close()
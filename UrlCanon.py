@@ -0,0 +1,87 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, quote
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that only identify a campaign or click, never content
+TRACKING_PARAMS = {
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'oly_anon_id',
+    'oly_enc_id', 'vero_id', 'wickedid', 'ref_src',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'piwik_', 'matomo_')
+
+PERCENT = re.compile(r'%([0-9A-Fa-f]{2})')
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+# Everything RFC 3986 allows unescaped in a path or query, plus '%'
+PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+QUERY_SAFE = PATH_SAFE + '?'
+
+
+def _percent(match):
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else '%' + match.group(1).upper()
+
+
+def normalize_escapes(text, safe):
+    """Decode escaped unreserved characters, upper-case other escapes and
+    escape characters that must not appear raw"""
+    return quote(PERCENT.sub(_percent, text), safe=safe)
+
+
+def remove_dot_segments(path):
+    segments = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(segments) > 1:
+                segments.pop()
+        elif segment != '.':
+            segments.append(segment)
+    if path.endswith(('/.', '/..')):
+        segments.append('')
+    return '/'.join(segments)
+
+
+def is_tracking(param):
+    name = param.split('=', 1)[0].lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def param_name(param):
+    return param.split('=', 1)[0]
+
+
+def canonicalize(url):
+    """Return one spelling for all equivalent forms of an http(s) URL.
+
+    Lower-cases scheme and host, drops the default port and the fragment,
+    resolves ./ and ../ segments, removes tracking parameters, sorts the
+    remaining query parameters by name (repeated names keep their order,
+    which the server may rely on) and normalizes percent-encoding. Other
+    schemes and unparsable URLs come back unchanged.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip('.')
+    if ':' in host:
+        host = f'[{host}]'  # IPv6 literal
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f'{host}:{port}'
+    if parts.username is not None:
+        userinfo = parts.username + (f':{parts.password}' if parts.password is not None else '')
+        netloc = f'{userinfo}@{netloc}'
+
+    path = normalize_escapes(parts.path, PATH_SAFE) or '/'
+    if '/.' in path:
+        path = remove_dot_segments(path)
+    params = [normalize_escapes(p, QUERY_SAFE) for p in parts.query.split('&') if p and not is_tracking(p)]
+    params.sort(key=param_name)
+    return urlunsplit((scheme, netloc, path, '&'.join(params), ''))
@@ -0,0 +1,149 @@
+import hashlib
+import math
+from array import array
+
+
+def url_hash(url):
+    """64-bit hash of a URL"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+
+class HashedURLSet:
+    """set-like store keeping only 64-bit URL hashes in a flat array.
+
+    Open addressing with linear probing; about 16 bytes per URL instead of
+    the full string. Two distinct URLs collide with probability ~n/2**64.
+    """
+    def __init__(self, capacity=1024):
+        size = 1
+        while size < capacity * 2:
+            size *= 2
+        self.slots = array('Q', bytes(8 * size))
+        self.mask = size - 1
+        self.size = 0
+
+    def key(self, url):
+        # 0 marks an empty slot
+        return url_hash(url) or 1
+
+    def find(self, key):
+        i = key & self.mask
+        slots = self.slots
+        while True:
+            slot = slots[i]
+            if slot == 0 or slot == key:
+                return i
+            i = (i + 1) & self.mask
+
+    def add(self, url):
+        key = self.key(url)
+        i = self.find(key)
+        if self.slots[i] == key:
+            return
+        self.slots[i] = key
+        self.size += 1
+        if self.size * 2 > len(self.slots):
+            self.grow()
+
+    def grow(self):
+        old = self.slots
+        self.slots = array('Q', bytes(16 * len(old)))
+        self.mask = len(self.slots) - 1
+        for key in old:
+            if key:
+                self.slots[self.find(key)] = key
+
+    def __contains__(self, url):
+        key = self.key(url)
+        return self.slots[self.find(key)] == key
+
+    def __len__(self):
+        return self.size
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` items at `error_rate`"""
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def positions(self, h1, h2):
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add_hashes(self, h1, h2):
+        bits = self.bits
+        for pos in self.positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains_hashes(self, h1, h2):
+        bits = self.bits
+        for pos in self.positions(h1, h2):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, url):
+        self.add_hashes(*bloom_hashes(url))
+
+    def __contains__(self, url):
+        return self.contains_hashes(*bloom_hashes(url))
+
+
+def bloom_hashes(url):
+    """Two 64-bit hashes for double hashing: position i is h1 + i * h2"""
+    digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class ScalableBloomFilter:
+    """set-like visited store that grows by chaining Bloom filters.
+
+    Each new filter has twice the capacity and half the error rate of the
+    previous one, so the overall false-positive rate stays below
+    `error_rate`. A false positive means a URL is wrongly skipped as seen.
+    """
+    def __init__(self, error_rate=0.001, initial_capacity=100000):
+        self.error_rate = error_rate
+        # Filter i gets error_rate / 2**(i + 1), so the sum stays below error_rate
+        self.filters = [BloomFilter(initial_capacity, error_rate * 0.5)]
+        self.size = 0
+
+    def add(self, url):
+        h1, h2 = bloom_hashes(url)
+        if self.contains_hashes(h1, h2):
+            return
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, current.error_rate * 0.5)
+            self.filters.append(current)
+        current.add_hashes(h1, h2)
+        self.size += 1
+
+    def contains_hashes(self, h1, h2):
+        for f in reversed(self.filters):
+            if f.contains_hashes(h1, h2):
+                return True
+        return False
+
+    def __contains__(self, url):
+        return self.contains_hashes(*bloom_hashes(url))
+
+    def __len__(self):
+        return self.size
+
+
+def make_visited_store(kind='exact', error_rate=0.001):
+    """Return an empty visited store: 'exact' (set), 'hashed' or 'bloom'"""
+    if kind == 'exact':
+        return set()
+    if kind == 'hashed':
+        return HashedURLSet()
+    if kind == 'bloom':
+        return ScalableBloomFilter(error_rate)
+    raise ValueError(f"Unknown visited store: {kind}")
@@ -0,0 +1,261 @@
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# URL states
+PENDING, LEASED, DONE, SKIPPED, FAILED = range(5)
+
+
+class WorkQueue:
+    """Frontier, dedup set and findings of a distributed crawl in one SQLite file.
+
+    Workers lease batches of URLs for `ttl` seconds and complete them one
+    by one, pushing the links and findings of each page; every completion
+    also extends the worker's other leases. Leases that run out (a worker
+    died or hung) go back to the queue on the next lease() or progress()
+    call, and a URL that has been handed out `max_attempts` times is given
+    up on. Each site stops leasing once `max_pages` of its URLs have been
+    leased or done.
+
+    Any number of processes on the same machine can open the file; workers
+    on other machines go through serve_queue() and RemoteQueue.
+    """
+    def __init__(self, path, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS sites (site TEXT PRIMARY KEY, start_url TEXT, max_pages INTEGER)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, site TEXT, score REAL, '
+                        'state INTEGER DEFAULT 0, owner TEXT, expires REAL, attempts INTEGER DEFAULT 0)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS urls_site_state ON urls (site, state, score)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS urls_owner ON urls (owner)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS findings (site TEXT, kind TEXT, value TEXT, source TEXT, '
+                        'PRIMARY KEY (site, kind, value, source))')
+
+    def transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers
+        # cannot lease the same rows
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def add_site(self, site, start_url, max_pages):
+        """Register a site and queue its start URL; a site already in the queue keeps its progress"""
+        with self.lock:
+            db = self.transaction()
+            try:
+                db.execute('INSERT OR IGNORE INTO sites VALUES (?, ?, ?)', (site, start_url, max_pages))
+                db.execute('INSERT OR IGNORE INTO urls (url, site, score) VALUES (?, ?, ?)', (start_url, site, 0.0))
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+
+    def sites(self):
+        with self.lock:
+            return {site: {'start_url': start_url, 'max_pages': max_pages}
+                    for site, start_url, max_pages in self.db.execute('SELECT * FROM sites')}
+
+    def push(self, site, links):
+        """Queue (url, score) pairs of `site` that have never been queued"""
+        with self.lock:
+            db = self.transaction()
+            try:
+                db.executemany('INSERT OR IGNORE INTO urls (url, site, score) VALUES (?, ?, ?)',
+                               [(url, site, score) for url, score in links])
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+
+    def expire_leases(self, db, now):
+        """Put URLs whose lease ran out back in the queue, giving up on
+        those handed out `max_attempts` times; runs inside a transaction"""
+        db.execute('UPDATE urls SET state = ?, owner = NULL, attempts = attempts + 1 '
+                   'WHERE state = ? AND expires < ?', (PENDING, LEASED, now))
+        db.execute('UPDATE urls SET state = ? WHERE state = ? AND attempts >= ?',
+                   (FAILED, PENDING, self.max_attempts))
+
+    def lease(self, owner, count=10, ttl=60.0):
+        """Up to `count` (url, site) pairs leased to `owner` for `ttl` seconds"""
+        now = time.time()
+        with self.lock:
+            db = self.transaction()
+            try:
+                self.expire_leases(db, now)
+                batch = []
+                # Random site order spreads the workers over the hosts
+                for site, max_pages in db.execute('SELECT site, max_pages FROM sites ORDER BY RANDOM()').fetchall():
+                    used = db.execute('SELECT COUNT(*) FROM urls WHERE site = ? AND state IN (?, ?)',
+                                      (site, LEASED, DONE)).fetchone()[0]
+                    room = min(count - len(batch), max_pages - used)
+                    if room > 0:
+                        batch.extend(db.execute('SELECT url, site FROM urls WHERE site = ? AND state = ? '
+                                                'ORDER BY score DESC, rowid LIMIT ?', (site, PENDING, room)))
+                    if len(batch) >= count:
+                        break
+                db.executemany('UPDATE urls SET state = ?, owner = ?, expires = ? WHERE url = ?',
+                               [(LEASED, owner, now + ttl, url) for url, site in batch])
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return batch
+
+    def complete(self, owner, url, links=(), findings=(), ttl=60.0, skipped=False):
+        """Finish a leased URL: queue its (url, score) links, store its
+        (kind, value, source) findings and extend the owner's other leases.
+
+        Links and findings are deduplicated, so a URL completed twice after
+        its lease ran out does no harm.
+        """
+        with self.lock:
+            db = self.transaction()
+            try:
+                site = db.execute('SELECT site FROM urls WHERE url = ?', (url,)).fetchone()[0]
+                db.executemany('INSERT OR IGNORE INTO urls (url, site, score) VALUES (?, ?, ?)',
+                               [(link, site, score) for link, score in links])
+                db.executemany('INSERT OR IGNORE INTO findings VALUES (?, ?, ?, ?)',
+                               [(site, kind, value, source) for kind, value, source in findings])
+                db.execute('UPDATE urls SET state = ?, owner = NULL WHERE url = ?', (SKIPPED if skipped else DONE, url))
+                db.execute('UPDATE urls SET expires = ? WHERE owner = ? AND state = ?', (time.time() + ttl, owner, LEASED))
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+
+    def release(self, owner):
+        """Give back every URL still leased to `owner`, e.g. on shutdown"""
+        with self.lock:
+            self.db.execute('UPDATE urls SET state = ?, owner = NULL WHERE owner = ? AND state = ?',
+                            (PENDING, owner, LEASED))
+
+    def progress(self):
+        """URL counts by state; `ready` is how many pending URLs are still within their site's budget.
+
+        Leases that ran out are expired first, so URLs held by dead workers
+        count as ready rather than leased.
+        """
+        with self.lock:
+            db = self.transaction()
+            try:
+                self.expire_leases(db, time.time())
+                counts = {PENDING: 0, LEASED: 0, DONE: 0, SKIPPED: 0, FAILED: 0}
+                ready = 0
+                for site, max_pages in db.execute('SELECT site, max_pages FROM sites').fetchall():
+                    by_state = dict(db.execute('SELECT state, COUNT(*) FROM urls WHERE site = ? GROUP BY state',
+                                               (site,)))
+                    for state, count in by_state.items():
+                        counts[state] += count
+                    room = max_pages - by_state.get(LEASED, 0) - by_state.get(DONE, 0)
+                    ready += max(0, min(room, by_state.get(PENDING, 0)))
+                findings = db.execute('SELECT COUNT(*) FROM findings').fetchone()[0]
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return {'ready': ready, 'pending': counts[PENDING], 'leased': counts[LEASED], 'done': counts[DONE],
+                'skipped': counts[SKIPPED], 'failed': counts[FAILED], 'findings': findings}
+
+    def results(self, site):
+        """Pages crawled and {kind: {value: [sources]}} found for one site"""
+        with self.lock:
+            pages = self.db.execute('SELECT COUNT(*) FROM urls WHERE site = ? AND state = ?',
+                                    (site, DONE)).fetchone()[0]
+            rows = self.db.execute('SELECT kind, value, source FROM findings WHERE site = ? '
+                                   'ORDER BY kind, value, source', (site,)).fetchall()
+        found = {}
+        for kind, value, source in rows:
+            found.setdefault(kind, {}).setdefault(value, []).append(source)
+        return pages, found
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+# Methods workers may call over HTTP
+REMOTE_METHODS = ('sites', 'push', 'lease', 'complete', 'release', 'progress')
+
+
+def serve_queue(queue, port, host='127.0.0.1'):
+    """Serve `queue` to RemoteQueue workers from a daemon thread.
+
+    Each method is a POST to /<method> with its keyword arguments as a JSON
+    object; the answer is {"result": ...} or {"error": ...}.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            name = self.path.strip('/')
+            if name not in REMOTE_METHODS:
+                self.send_error(404)
+                return
+            try:
+                kwargs = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                answer = {'result': getattr(queue, name)(**kwargs)}
+                status = 200
+            except (TypeError, ValueError, KeyError, sqlite3.Error) as e:
+                answer = {'error': f"{type(e).__name__}: {e}"}
+                status = 400
+            body = json.dumps(answer).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class RemoteQueue:
+    """The WorkQueue methods a worker needs, called on a coordinator's serve_queue()"""
+    def __init__(self, url, timeout=60):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def call(self, name, **kwargs):
+        response = self.session.post(f'{self.url}/{name}', json=kwargs, timeout=self.timeout)
+        answer = response.json()
+        if 'error' in answer:
+            raise RuntimeError(f"{name}: {answer['error']}")
+        return answer['result']
+
+    def sites(self):
+        return self.call('sites')
+
+    def push(self, site, links):
+        self.call('push', site=site, links=links)
+
+    def lease(self, owner, count=10, ttl=60.0):
+        return [tuple(item) for item in self.call('lease', owner=owner, count=count, ttl=ttl)]
+
+    def complete(self, owner, url, links=(), findings=(), ttl=60.0, skipped=False):
+        self.call('complete', owner=owner, url=url, links=list(links), findings=list(findings),
+                  ttl=ttl, skipped=skipped)
+
+    def release(self, owner):
+        self.call('release', owner=owner)
+
+    def progress(self):
+        return self.call('progress')
+
+    def close(self):
+        self.session.close()
+
+
+def open_queue(target):
+    """A RemoteQueue for an http(s) coordinator URL, else a WorkQueue on that SQLite file"""
+    if target.startswith(('http://', 'https://')):
+        return RemoteQueue(target)
+    return WorkQueue(target)
@@ -0,0 +1,152 @@
+"""Run every scraper against a local mock or replayed site and report
+throughput, peak memory and whether the findings are complete.
+
+Usage: python benchmarks/bench_crawl.py [--pages N] [--fanout N] [--slow-rate R]
+                                        [--error-rate R] [--warc FILE] [--only NAME,...]
+
+Nothing leaves the machine, so runs before and after a change can be
+compared directly. Peak memory is measured with tracemalloc, which slows
+the crawl down; --no-memory gives cleaner timings.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from mock_site import MockSite, ReplaySite, serve
+from Fetcher import Fetcher
+import EmailDeepScan
+import EmailFastScan
+import FastSensitiveFilesScan
+import pdfFastScan
+import UnifiedScan
+
+
+def paths(urls):
+    return {urlsplit(url).path or '/' for url in urls}
+
+
+def run_email_fast(start_url, fetcher, args):
+    scraper = EmailFastScan.EmailScraper(start_url, args.max_pages, '', fetcher=fetcher)
+    scraper.scrape(workers=args.workers)
+    return len(scraper.visited_urls), {'emails': set(scraper.found_emails)}
+
+
+def run_pdf_fast(start_url, fetcher, args):
+    scraper = pdfFastScan.PDFScraper(start_url, args.max_pages, fetcher=fetcher)
+    scraper.scrape(workers=args.workers)
+    return len(scraper.visited_urls), {'pdfs': paths(scraper.found_pdfs)}
+
+
+def run_sensitive_fast(start_url, fetcher, args):
+    scraper = FastSensitiveFilesScan.SensitiveFileScraper(start_url, args.max_pages, fetcher=fetcher)
+    scraper.scrape(workers=args.workers)
+    return len(scraper.visited_urls), {'files': paths(scraper.found_files)}
+
+
+def run_unified(start_url, fetcher, args):
+    extractors = [
+        UnifiedScan.EmailExtractor(start_url, fetcher),
+        UnifiedScan.PDFExtractor(start_url, fetcher),
+        UnifiedScan.SensitiveFileExtractor(start_url, fetcher),
+    ]
+    scraper = UnifiedScan.UnifiedScraper(start_url, args.max_pages, extractors, fetcher)
+    scraper.scrape(workers=args.workers)
+    return len(scraper.visited_urls), {'emails': set(extractors[0].results()),
+                                       'pdfs': paths(extractors[1].results()),
+                                       'files': paths(extractors[2].results())}
+
+
+def run_deep(start_url, fetcher, args, concurrency=1):
+    scraper = EmailDeepScan.EmailScraper(start_url, fetcher=fetcher)
+    scraper.crawl(max_depth=args.max_depth, delay=0.0, concurrency=concurrency)
+    return len(scraper.visited), {'emails': set(scraper.emails), 'broken': paths(scraper.broken_links)}
+
+
+SCRAPERS = {
+    'email-fast': run_email_fast,
+    'pdf-fast': run_pdf_fast,
+    'files-fast': run_sensitive_fast,
+    'unified': run_unified,
+    'deep': run_deep,
+    'deep-async': lambda start_url, fetcher, args: run_deep(start_url, fetcher, args, concurrency=8),
+}
+
+
+def check(found, expected):
+    """'ok' or a short description of what is missing and what is extra"""
+    if expected is None:
+        return '-'
+    problems = []
+    for kind, values in sorted(found.items()):
+        missing = len(expected[kind] - values)
+        extra = len(values - expected[kind])
+        if missing or extra:
+            problems.append(f"{kind} -{missing}/+{extra}")
+    return ', '.join(problems) or 'ok'
+
+
+def bench(name, start_url, args, expected):
+    fetcher = Fetcher()
+    if args.memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pages, found = SCRAPERS[name](start_url, fetcher, args)
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1e6 if args.memory else 0.0
+        if args.memory:
+            tracemalloc.stop()
+        fetcher.close()
+    mb = fetcher.metrics.bytes / 1e6
+    counts = ' '.join(f"{kind}={len(values)}" for kind, values in sorted(found.items()))
+    print(f"{name:<11} {pages:6d} {elapsed:8.2f}s {pages / elapsed:8.1f} {mb / elapsed:7.2f} "
+          f"{peak:8.1f}  {check(found, expected):<16} {counts}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, default=300, help='pages in the generated site (default: 300)')
+    parser.add_argument('--fanout', type=int, default=10, help='links per page (default: 10)')
+    parser.add_argument('--email-rate', type=float, default=0.2)
+    parser.add_argument('--pdf-rate', type=float, default=0.1)
+    parser.add_argument('--file-rate', type=float, default=0.05)
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='share of pages answering slowly')
+    parser.add_argument('--slow-delay', type=float, default=0.2, help='seconds a slow page takes (default: 0.2)')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='share of pages that are 404s')
+    parser.add_argument('--page-kb', type=int, default=5, help='approximate page size (default: 5)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warc', help='replay this WARC file instead of generating a site')
+    parser.add_argument('--only', help=f'comma-separated scrapers to run (default: all of {",".join(SCRAPERS)})')
+    parser.add_argument('--workers', type=int, default=0, help='parse worker processes for the fast scrapers')
+    parser.add_argument('--max-depth', type=int, default=100, help='depth limit of the deep scrapers')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip tracemalloc')
+    args = parser.parse_args()
+
+    if args.warc:
+        site = ReplaySite(args.warc)
+    else:
+        site = MockSite(args.pages, args.fanout, args.email_rate, args.pdf_rate, args.file_rate,
+                        args.slow_rate, args.slow_delay, args.error_rate, args.page_kb, args.seed)
+    server, start_url = serve(site)
+    expected = site.expected()
+    # Enough budget to visit every page and file link, so the results are complete
+    args.max_pages = len(site.resources)
+    if expected:
+        print(f"Site: {expected['pages']} reachable pages, {len(expected['emails'])} emails, "
+              f"{len(expected['pdfs'])} PDFs, {len(expected['files'])} files, {len(expected['broken'])} broken")
+    else:
+        print(f"Replaying {len(site.resources)} responses from {site.origin}")
+
+    names = args.only.split(',') if args.only else list(SCRAPERS)
+    print(f"{'scraper':<11} {'pages':>6} {'time':>9} {'pages/s':>8} {'MB/s':>7} {'peak MB':>8}  {'check':<16} found")
+    for name in names:
+        bench(name, start_url, args, expected)
+    server.shutdown()
@@ -0,0 +1,68 @@
+"""Email extraction throughput (MB/s) of the shared engine vs the old patterns.
+
+Usage: python benchmarks/bench_emails.py [DIR_OF_SAVED_HTML_PAGES]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_links import load_corpus
+from EmailExtract import extract_emails
+
+DEEP_PATTERN = r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b'
+FAST_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+
+def old_deep(html):
+    return set(re.findall(DEEP_PATTERN, html))
+
+
+def old_fast(html):
+    return set(FAST_PATTERN.findall(html))
+
+
+def synthetic_corpus(count=300, seed=2):
+    """Mostly address-free pages plus some with plain and obfuscated addresses"""
+    rng = random.Random(seed)
+    filler = '<div class="item"><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div>'
+    samples = ['sales@example.com', 'info[at]example(dot)org', 'bob at acme dot co dot uk',
+               '<a href="mailto:help%40example.net">help</a>', 'jobs&#64;example.io',
+               '<img src="/img/logo@2x.png">']
+    pages = []
+    for i in range(count):
+        parts = ['<html><head><style>.a{color:red}</style>',
+                 '<script>var cfg = {"x": 1};</script></head><body>']
+        parts.extend(filler for _ in range(rng.randint(100, 400)))
+        if i % 3 == 0:
+            parts.extend('<p>%s</p>' % rng.choice(samples) for _ in range(5))
+        parts.append('</body></html>')
+        pages.append(''.join(parts))
+    return pages
+
+
+def bench(name, func, pages, rounds=3):
+    best = None
+    found = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        found = sum(len(func(p)) for p in pages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    size = sum(len(p) for p in pages) / 1e6
+    print(f"{name:<10} {size / best:8.1f} MB/s  {found:6d} addresses")
+
+
+if __name__ == "__main__":
+    pages = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    print(f"Pages: {len(pages)}  size: {sum(len(p) for p in pages) / 1e6:.1f} MB")
+    bench('old deep', old_deep, pages)
+    bench('old fast', old_fast, pages)
+    bench('engine', extract_emails, pages)
+    # Most pages have no address and are skipped by the substring gates
+    with_addresses = [p for p in pages if '@' in p or '%40' in p or '&#' in p or ' dot ' in p or '(dot)' in p]
+    print(f"Pages with addresses: {len(with_addresses)}")
+    bench('old deep', old_deep, with_addresses)
+    bench('engine', extract_emails, with_addresses)
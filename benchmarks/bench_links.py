@@ -0,0 +1,62 @@
+"""Compare streaming href extraction against BeautifulSoup.
+
+Usage: python benchmarks/bench_links.py [DIR_OF_SAVED_HTML_PAGES]
+
+Without a directory a synthetic corpus is generated in memory.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from LinkParser import extract_hrefs, soup_hrefs
+
+
+def load_corpus(directory):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    return pages
+
+
+def synthetic_corpus(count=200, seed=1):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        parts = ['<html><head><title>Page %d</title>' % i,
+                 '<link rel="stylesheet" href="/static/site.css">',
+                 '<script>var x = "<a href=\'/not-a-link\'>";</script></head><body>']
+        for _ in range(rng.randint(50, 300)):
+            parts.append('<div class="row"><p>Lorem ipsum dolor sit amet &amp; more text</p>'
+                         '<a href="/page/%d?x=%d&amp;y=1">link</a></div>' % (rng.randrange(10000), i))
+        parts.append('</body></html>')
+        pages.append(''.join(parts))
+    return pages
+
+
+def bench(name, func, pages, tags, rounds=3):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for page in pages:
+            func(page, tags)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    size = sum(len(p) for p in pages) / 1e6
+    print(f"{name:<12} {best:8.3f}s  {len(pages) / best:8.1f} pages/s  {size / best:6.2f} MB/s")
+    return best
+
+
+if __name__ == "__main__":
+    pages = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    tags = ('a', 'link')
+
+    mismatches = sum(1 for p in pages if extract_hrefs(p, tags) != soup_hrefs(p, tags))
+    print(f"Pages: {len(pages)}  href mismatches: {mismatches}")
+
+    soup_time = bench('soup', soup_hrefs, pages, tags)
+    stream_time = bench('streaming', extract_hrefs, pages, tags)
+    print(f"Speedup: {soup_time / stream_time:.2f}x")
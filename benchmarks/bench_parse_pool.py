@@ -0,0 +1,43 @@
+"""Measure how parse/extract throughput scales with worker processes.
+
+Usage: python benchmarks/bench_parse_pool.py [DIR_OF_SAVED_HTML_PAGES]
+
+Pages are parsed with EmailFastScan's parse function, the same work the
+ParsePipeline hands to its process pool.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_links import load_corpus, synthetic_corpus
+from EmailFastScan import parse_page
+from ParsePool import parse_body
+
+
+def run(bodies, workers):
+    start = time.perf_counter()
+    if workers == 0:
+        for body in bodies:
+            parse_body(parse_page, body, 'utf-8')
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(parse_body, [parse_page] * len(bodies), bodies,
+                          ['utf-8'] * len(bodies), chunksize=4))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    pages = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus(400)
+    bodies = [p.encode('utf-8') for p in pages]
+    print(f"Pages: {len(bodies)}  CPUs: {os.cpu_count()}")
+
+    baseline = run(bodies, 0)
+    print(f"in-process   {baseline:7.3f}s  {len(bodies) / baseline:8.1f} pages/s")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        elapsed = run(bodies, workers)
+        print(f"{workers:2d} workers   {elapsed:7.3f}s  {len(bodies) / elapsed:8.1f} pages/s"
+              f"  speedup {baseline / elapsed:5.2f}x")
+        workers *= 2
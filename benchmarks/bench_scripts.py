@@ -0,0 +1,126 @@
+"""Cost and yield of reading inline scripts (JSON-LD, __NEXT_DATA__, state
+objects, fetch/href literals) on top of the markup-only link and email
+extraction, which is the browser-free baseline.
+
+Usage: python benchmarks/bench_scripts.py [DIR_OF_SAVED_HTML_PAGES]
+
+Without a directory a synthetic corpus of plain, JSON-LD, Next.js and
+client-state pages is generated in memory.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from LinkParser import extract_links
+from EmailExtract import extract_emails
+from bench_links import load_corpus
+
+FILLER = '<div class="row"><p>Lorem ipsum dolor sit amet &amp; more text</p><a href="/page/%d">link</a></div>'
+ANALYTICS = ('<script>(function(w,d){w.dataLayer=w.dataLayer||[];w.dataLayer.push({"event":"view"});'
+             'var s=d.createElement("script");s.src="https://cdn.example.net/a.js";})(window,document);</script>')
+
+
+def plain_page(rng, i):
+    return ''.join(['<html><head><title>Page %d</title>' % i, ANALYTICS, '</head><body>'] +
+                   [FILLER % rng.randrange(10000) for _ in range(rng.randint(50, 200))] + ['</body></html>'])
+
+
+def jsonld_page(rng, i):
+    data = {'@context': 'https://schema.org', '@type': 'Organization', 'url': 'https://example.com/',
+            'logo': 'https://example.com/logo.png', 'sameAs': ['https://twitter.com/example'],
+            'contactPoint': {'@type': 'ContactPoint', 'email': f'mailto:support{i}@example.com',
+                             'url': f'/contact/{i}'}}
+    page = plain_page(rng, i)
+    return page.replace('</head>', f'<script type="application/ld+json">{json.dumps(data)}</script></head>')
+
+
+def nextjs_page(rng, i):
+    items = [{'id': k, 'title': f'Item {k}', 'summary': 'Lorem ipsum dolor sit amet ' * 4,
+              'href': f'/items/{i}-{k}', 'image': f'/img/{k}.webp'} for k in range(rng.randint(50, 400))]
+    team = [{'name': f'Person {k}', 'email': f'person{k}.{i}@example.com'} for k in range(3)]
+    data = {'props': {'pageProps': {'items': items, 'team': team,
+                                    'brochure': f'https://example.com/files/brochure-{i}.pdf'}},
+            'page': '/catalog', 'buildId': 'abc123'}
+    return ('<html><head><title>App %d</title>%s</head><body><div id="__next"></div>'
+            '<script id="__NEXT_DATA__" type="application/json">%s</script></body></html>'
+            % (i, ANALYTICS, json.dumps(data)))
+
+
+def state_page(rng, i):
+    state = {'user': None, 'contact': {'mail': f'office{i}@example.com'},
+             'links': [f'/section/{k}' for k in range(20)]}
+    script = (f'<script>window.__INITIAL_STATE__ = {json.dumps(state)};\n'
+              f'fetch("/api/v1/directory?page={i}").then(function(r) {{ return r.json(); }});\n'
+              f'document.getElementById("more").onclick = function() {{ location.href = "/more/{i}"; }};</script>')
+    return plain_page(rng, i).replace('</body>', script + '</body>')
+
+
+KINDS = (('plain', plain_page, 0.6), ('json-ld', jsonld_page, 0.15),
+         ('next.js', nextjs_page, 0.15), ('state', state_page, 0.1))
+
+
+def synthetic_corpus(count=400, seed=1):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        roll = rng.random()
+        for name, make, share in KINDS:
+            if roll < share:
+                break
+            roll -= share
+        pages.append((name, make(rng, i)))
+    return pages
+
+
+def parse(html, scripts):
+    return extract_links(html, scripts=scripts)['hrefs'], extract_emails(html, scripts)
+
+
+def bench(pages, rounds=5):
+    """Best time of each mode; the modes alternate so background load hits both alike"""
+    best = {}
+    for _ in range(rounds):
+        for scripts in (False, True):
+            start = time.perf_counter()
+            for _, html in pages:
+                parse(html, scripts)
+            elapsed = time.perf_counter() - start
+            best[scripts] = min(elapsed, best.get(scripts, elapsed))
+    return best[False], best[True]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        pages = [('saved', html) for html in load_corpus(sys.argv[1])]
+    else:
+        pages = synthetic_corpus()
+    size = sum(len(html) for _, html in pages) / 1e6
+    print(f"Pages: {len(pages)}  {size:.1f} MB")
+
+    print(f"{'kind':<9} {'pages':>6} {'links':>7} {'+links':>7} {'emails':>7} {'+emails':>8}")
+    for kind in sorted({kind for kind, _ in pages}):
+        subset = [html for k, html in pages if k == kind]
+        links = emails = extra_links = extra_emails = 0
+        for html in subset:
+            base_links, base_emails = parse(html, False)
+            all_links, all_emails = parse(html, True)
+            links += len(set(base_links))
+            emails += len(base_emails)
+            extra_links += len(set(all_links) - set(base_links))
+            extra_emails += len(all_emails - base_emails)
+        print(f"{kind:<9} {len(subset):6d} {links:7d} {extra_links:7d} {emails:7d} {extra_emails:8d}")
+
+    baseline, scripts = bench(pages)
+    for name, elapsed in (('markup', baseline), ('+scripts', scripts)):
+        print(f"{name:<9} {elapsed:8.3f}s  {len(pages) / elapsed:8.1f} pages/s  "
+              f"{elapsed / len(pages) * 1e6:8.0f} us/page  {size / elapsed:6.2f} MB/s")
+    print(f"Overhead: {(scripts / baseline - 1) * 100:+.1f}%")
+    # Pages without data scripts should cost the same either way; the
+    # spread between runs shows how much of that is noise
+    for kind in sorted({kind for kind, _ in pages}):
+        subset = [(k, html) for k, html in pages if k == kind]
+        baseline, scripts = bench(subset)
+        print(f"  {kind:<9} {(scripts / baseline - 1) * 100:+6.1f}%")
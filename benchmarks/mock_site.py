@@ -0,0 +1,270 @@
+"""Synthetic and recorded sites served from a local HTTP server.
+
+MockSite generates a deterministic site of configurable size and shape
+and knows which findings a complete crawl must produce; ReplaySite serves
+the responses recorded in a WARC file. Both are served by `serve(site)`.
+
+Usage: python benchmarks/mock_site.py [--pages N] [--warc FILE]
+"""
+import argparse
+import gzip
+import random
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FILLER = '<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.</p>\n'
+SENSITIVE_FILES = ('/backup/site-{i}.sql', '/config/app-{i}.yml', '/keys/id_rsa-{i}',
+                   '/logs/error-{i}.log', '/dump/users-{i}.bak')
+
+
+class Resource:
+    def __init__(self, status, content_type, body, delay=0.0, headers=None):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.delay = delay
+        self.headers = headers or {}
+
+
+class MockSite:
+    """A generated site: `pages` HTML pages, each linking to the next one
+    and to `fanout - 1` random others, some with email addresses, PDF and
+    sensitive-file links. `slow_rate` of the pages answer after
+    `slow_delay` seconds and `error_rate` of them are 404s.
+    """
+    def __init__(self, pages=200, fanout=10, email_rate=0.2, pdf_rate=0.1, file_rate=0.05,
+                 slow_rate=0.0, slow_delay=0.2, error_rate=0.02, page_kb=5, seed=0):
+        rng = random.Random(seed)
+        self.resources = {'/robots.txt': Resource(200, 'text/plain', b'User-agent: *\nAllow: /\n')}
+        self.start_path = '/'
+        self.links = {}
+        self.emails = {}
+        self.pdfs = {}
+        self.files = {}
+        self.errors = set()
+        fillers = max(1, page_kb * 1024 // len(FILLER))
+
+        for i in range(pages):
+            path = self.page_path(i)
+            if i and rng.random() < error_rate:
+                self.errors.add(path)
+                self.resources[path] = Resource(404, 'text/html', b'<html><body>Not found</body></html>')
+                continue
+            targets = {self.page_path((i + 1) % pages)}
+            targets.update(self.page_path(rng.randrange(pages)) for _ in range(fanout - 1))
+            self.links[path] = sorted(targets)
+            self.emails[path] = [f'staff{i}.{k}@example.com' for k in range(rng.randint(1, 3))] \
+                if rng.random() < email_rate else []
+            self.pdfs[path] = [f'/docs/report-{i}.pdf'] if rng.random() < pdf_rate else []
+            self.files[path] = [rng.choice(SENSITIVE_FILES).format(i=i)] if rng.random() < file_rate else []
+
+            body = [f'<html><head><title>Page {i}</title></head><body>\n<nav>']
+            body.extend(f'<a href="{t}">Page {t.rsplit("/", 1)[-1] or 0}</a> ' for t in self.links[path])
+            body.append('</nav>\n')
+            body.extend(FILLER for _ in range(fillers))
+            body.extend(f'<p>Contact: {email}</p>\n' for email in self.emails[path])
+            body.extend(f'<a href="{link}">Download</a>\n' for link in self.pdfs[path] + self.files[path])
+            body.append('</body></html>\n')
+            delay = slow_delay if rng.random() < slow_rate else 0.0
+            self.resources[path] = Resource(200, 'text/html; charset=utf-8', ''.join(body).encode('utf-8'), delay)
+
+            for link in self.pdfs[path]:
+                self.resources[link] = Resource(200, 'application/pdf', b'%PDF-1.4\n%%EOF\n')
+            for link in self.files[path]:
+                self.resources[link] = Resource(200, 'text/plain', b'secret=1\n')
+
+    @staticmethod
+    def page_path(i):
+        return f'/p/{i}' if i else '/'
+
+    def lookup(self, path):
+        return self.resources.get(path)
+
+    def expected(self):
+        """What a crawl of every reachable page must find, as paths"""
+        reachable = {self.start_path}
+        queue = deque([self.start_path])
+        while queue:
+            for target in self.links.get(queue.popleft(), ()):
+                if target not in reachable:
+                    reachable.add(target)
+                    queue.append(target)
+        pages = reachable - self.errors
+        pdfs = {link for page in pages for link in self.pdfs[page]}
+        return {
+            'pages': len(reachable),
+            'emails': {email for page in pages for email in self.emails[page]},
+            'pdfs': pdfs,
+            'files': pdfs | {link for page in pages for link in self.files[page]},
+            'broken': reachable & self.errors,
+        }
+
+
+def dechunk(body):
+    out = bytearray()
+    while body:
+        size_line, _, body = body.partition(b'\r\n')
+        size = int(size_line.split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        out += body[:size]
+        body = body[size + 2:]
+    return bytes(out)
+
+
+def read_warc(path):
+    """Yield (target URI, HTTP response block) for each WARC response record.
+
+    Plain and gzipped (whole-file or per-record) WARC files are read with
+    the standard library only.
+    """
+    with open(path, 'rb') as raw:
+        gzipped = raw.read(2) == b'\x1f\x8b'
+    with (gzip.open(path, 'rb') if gzipped else open(path, 'rb')) as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b'WARC/'):
+                raise ValueError(f"{path}: expected a WARC record header, got {line[:40]!r}")
+            headers = {}
+            for line in iter(f.readline, b''):
+                if not line.strip():
+                    break
+                name, _, value = line.decode('utf-8', errors='replace').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            block = f.read(int(headers.get('content-length', 0)))
+            if headers.get('warc-type') == 'response' and block.startswith(b'HTTP/'):
+                yield headers.get('warc-target-uri', '').strip('<>'), block
+
+
+class ReplaySite:
+    """Serves the HTTP responses recorded in a WARC file.
+
+    Only responses from the host of the first record are kept, and that
+    origin is rewritten to the local server's in bodies and redirects, so
+    absolute links keep pointing into the replayed site.
+    """
+    def __init__(self, path):
+        self.resources = {}
+        self.origin = None
+        self.start_path = None
+        for uri, block in read_warc(path):
+            parts = urlsplit(uri)
+            origin = f'{parts.scheme}://{parts.netloc}'
+            if self.origin is None:
+                self.origin = origin
+                self.start_path = parts.path or '/'
+            if origin != self.origin:
+                continue
+            key = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+            self.resources.setdefault(key, self.parse_response(block))
+        if self.origin is None:
+            raise ValueError(f"{path}: no response records")
+
+    @staticmethod
+    def parse_response(block):
+        head, _, body = block.partition(b'\r\n\r\n')
+        lines = head.decode('iso-8859-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            body = dechunk(body)
+        extra = {}
+        for name in ('content-encoding', 'location'):
+            if name in headers:
+                extra[name] = headers[name]
+        return Resource(status, headers.get('content-type', 'application/octet-stream'), body, headers=extra)
+
+    def bind(self, base_url):
+        """Point recorded absolute URLs at the local server"""
+        local = base_url.rstrip('/')
+        host = self.origin.split('://', 1)[1]
+        for resource in self.resources.values():
+            if 'html' in resource.content_type and 'content-encoding' not in resource.headers:
+                resource.body = resource.body.replace(self.origin.encode(), local.encode()) \
+                    .replace(f'//{host}'.encode(), local.split(':', 1)[1].encode())
+            if 'location' in resource.headers:
+                resource.headers['location'] = resource.headers['location'].replace(self.origin, local)
+
+    def lookup(self, path):
+        return self.resources.get(path)
+
+    def expected(self):
+        return None
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Crawlers that stop early hang up mid-response; that is not an error here"""
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve(site, host='127.0.0.1', port=0):
+    """Serve `site` from a daemon thread; returns (server, start URL)"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            # Headers and body are separate writes; without this every
+            # response stalls on Nagle and delayed ACKs
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def respond(self, send_body):
+            resource = site.lookup(self.path)
+            if resource is None:
+                resource = Resource(404, 'text/html', b'<html><body>Not found</body></html>')
+            if resource.delay:
+                time.sleep(resource.delay)
+            self.send_response(resource.status)
+            self.send_header('Content-Type', resource.content_type)
+            self.send_header('Content-Length', str(len(resource.body)))
+            for name, value in resource.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if send_body:
+                self.wfile.write(resource.body)
+
+        def do_GET(self):
+            self.respond(True)
+
+        def do_HEAD(self):
+            self.respond(False)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = QuietServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://{host}:{server.server_address[1]}'
+    if hasattr(site, 'bind'):
+        site.bind(base_url)
+    return server, base_url + site.start_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a mock or replayed site until interrupted")
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--warc', help='replay this WARC file instead of generating a site')
+    args = parser.parse_args()
+    site = ReplaySite(args.warc) if args.warc else MockSite(args.pages)
+    server, start_url = serve(site, port=args.port)
+    print(f"Serving {len(site.resources)} resources, start at {start_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
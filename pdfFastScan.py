@@ -1,72 +1,73 @@
 import re
-import requests
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from collections import deque
+from urllib.parse import urljoin
+from FileMatcher import is_pdf_url
+from UrlCanon import canonicalize
+from Frontier import UrlScorer, DOCUMENT_KEYWORDS
+from SiteScraper import SiteScraper
+from Sitemap import sitemap_seeds, seed_frontier
+from ScanArgs import scan_args, open_state, open_sink, open_visited, open_fetcher, open_metrics
 
-class PDFScraper:
-    def __init__(self, start_url, max_pages=50):
-        self.start_url = start_url
-        self.max_pages = max_pages
-        self.visited_urls = set()
-        self.urls_to_visit = deque()
-        self.urls_to_visit.append(start_url)
-        self.domain = urlparse(start_url).netloc
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'})
+class PDFScraper(SiteScraper):
+    def __init__(self, start_url, max_pages=50, fetcher=None, state=None, visited=None, sink=None, enqueued=None):
+        super().__init__(start_url, max_pages, fetcher, state, visited, sink, enqueued)
         self.found_pdfs = {}  # Dictionary: PDF URL -> set of source URLs
-
-    def is_valid_url(self, url):
-        parsed = urlparse(url)
-        return bool(parsed.netloc) and parsed.netloc == self.domain
+        self.probe = False  # HEAD candidate links to confirm they are PDFs
+        self.probed = {}
+        if state:
+            for pdf_url, source_url in state.findings('pdf'):
+                self.found_pdfs.setdefault(pdf_url, set()).add(source_url)
 
     def is_pdf_link(self, url):
         """Check if URL points to a PDF resource"""
-        parsed = urlparse(url)
-        path = parsed.path.lower()
-        
-        # Check common PDF indicators
-        if path.endswith('.pdf'):
-            return True
-        if 'pdf' in path.split('/')[-1].split('.')[0].lower():
+        return is_pdf_url(url)
+
+    def confirm_pdf(self, url):
+        """With probing on, HEAD the link once and keep it only if it serves a PDF"""
+        if not self.probe:
             return True
-        return False
+        if url not in self.probed:
+            info = self.fetcher.probe(url, headers=self.headers)
+            confirmed = info is not None and (not info[0] or 'pdf' in info[0] or 'octet-stream' in info[0])
+            if confirmed and info[1] is not None:
+                print(f"Confirmed PDF: {url} ({info[1]} bytes)")
+            self.probed[url] = confirmed
+        return self.probed[url]
+
+    def add_pdf(self, pdf_url, source_url):
+        if pdf_url not in self.found_pdfs:
+            self.found_pdfs[pdf_url] = set()
+        if self.sink and source_url not in self.found_pdfs[pdf_url]:
+            self.sink.write('pdf', pdf_url, source_url)
+        self.found_pdfs[pdf_url].add(source_url)
+        if self.state:
+            self.state.add_finding('pdf', pdf_url, source_url)
+        print(f"Found PDF: {pdf_url} (on {source_url})")
 
-    def get_all_links(self, url):
-        try:
-            response = self.session.get(url, timeout=5)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract all links
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                full_url = urljoin(url, href)
-                
-                # Handle PDF links separately
-                if self.is_pdf_link(full_url):
-                    if full_url not in self.found_pdfs:
-                        self.found_pdfs[full_url] = set()
-                    self.found_pdfs[full_url].add(url)
-                    print(f"Found PDF: {full_url} (on {url})")
-                # Process regular links
-                elif self.is_valid_url(full_url) and full_url not in self.visited_urls:
-                    self.urls_to_visit.append(full_url)
-                    
-        except requests.RequestException as e:
-            print(f"Error fetching {url}: {e}")
+    def handle_page(self, url, page):
+        anchors = page.get('anchors', {})
+        links = []
+        duplicates = 0
+        hits = 0
+        # Extract all links
+        for href in page['hrefs']:
+            full_url = canonicalize(urljoin(url, href))
 
-    def scrape(self):
-        while self.urls_to_visit and len(self.visited_urls) < self.max_pages:
-            current_url = self.urls_to_visit.popleft()
-            
-            if current_url in self.visited_urls:
-                continue
-                
-            print(f"Scraping: {current_url}")
-            self.visited_urls.add(current_url)
-            self.get_all_links(current_url)
-        
+            # Handle PDF links separately
+            if self.is_pdf_link(full_url) and self.confirm_pdf(full_url):
+                self.add_pdf(full_url, url)
+                hits += 1
+            # Process regular links
+            elif self.is_valid_url(full_url):
+                if full_url in self.enqueued:
+                    duplicates += 1
+                else:
+                    links.append((full_url, anchors.get(href, '')))
+
+        self.fetcher.metrics.count_links(len(links) + duplicates, duplicates)
+        for full_url, text in links:
+            self.enqueue(full_url, self.link_score(full_url, text, hits))
+
+    def report(self):
         print("\nScraping complete!")
         if self.found_pdfs:
             print(f"\n------------------------------------- Found {len(self.found_pdfs)} PDF documents -------------------------------------")
@@ -79,6 +80,8 @@ class PDFScraper:
             print("No PDFs found.")
 
 if __name__ == "__main__":
+    args = scan_args("Scan a site for linked PDF documents")
+
     start_url = input("Enter the starting URL (e.g., https://example.com): ").strip()
     if not start_url.startswith(('http://', 'https://')):
         start_url = 'https://' + start_url
@@ -86,5 +89,24 @@ if __name__ == "__main__":
     max_pages = input("Enter maximum number of pages to scrape (default 50): ").strip()
     max_pages = int(max_pages) if max_pages.isdigit() else 50
     
-    scraper = PDFScraper(start_url, max_pages)
-    scraper.scrape()
+    state = open_state(args)
+    visited = open_visited(args)
+    fetcher = open_fetcher(args)
+    reporter = open_metrics(args, fetcher)
+    sink = open_sink(args)
+    scraper = PDFScraper(start_url, max_pages, fetcher=fetcher, state=state, visited=visited, sink=sink,
+                         enqueued=open_visited(args))
+    scraper.max_page_bytes = args.max_page_size * 1024 * 1024
+    if args.priority:
+        scraper.scorer = UrlScorer(DOCUMENT_KEYWORDS)
+    scraper.probe = args.probe
+    if args.sitemap:
+        seed_frontier(scraper, sitemap_seeds(start_url, fetcher, scraper.headers, args.since))
+    scraper.scrape(workers=args.workers)
+    if state:
+        state.close()
+    if sink:
+        sink.close()
+    if reporter:
+        reporter.stop()
+    fetcher.close()
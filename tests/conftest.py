@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from mock_site import Resource, serve
+
+
+class PageSite:
+    """A site given as {path: html or Resource}; other paths are 404s"""
+    def __init__(self, pages):
+        self.start_path = '/'
+        self.resources = {path: html if isinstance(html, Resource) else
+                          Resource(200, 'text/html; charset=utf-8', html.encode('utf-8'))
+                          for path, html in pages.items()}
+
+    def lookup(self, path):
+        return self.resources.get(path)
+
+
+@pytest.fixture
+def serve_pages():
+    """Serve {path: html} on a local port; returns the start URL"""
+    servers = []
+
+    def start(pages):
+        server, start_url = serve(PageSite(pages))
+        servers.append(server)
+        return start_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def finish_within():
+    """Run func(*args, **kwargs) and fail the test instead of hanging if it takes longer than `timeout`"""
+    def run(timeout, func, *args, **kwargs):
+        outcome = {}
+
+        def target():
+            try:
+                outcome['result'] = func(*args, **kwargs)
+            except BaseException as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            pytest.fail(f"{getattr(func, '__name__', func)} did not finish within {timeout}s")
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+    return run
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import BatchScan
+from BatchScan import BatchScheduler, extractor_names, make_extractors
+from FileMatcher import FileMatcher
+from Metrics import CrawlMetrics
+
+
+class SlowFetcher:
+    """Stands in for Fetcher: responses are the URL, parsed as itself"""
+    def __init__(self):
+        self.metrics = CrawlMetrics()
+
+    def extract(self, response, kind, parse):
+        return response
+
+
+class SlowSite:
+    """A scraper stand-in with `pages` pages that each take `seconds` to fetch"""
+    parse_kind = 'links'
+    parse_func = None
+
+    def __init__(self, name, pages, seconds, fetcher):
+        self.domain = name
+        self.state = None
+        self.fetcher = fetcher
+        self.urls_to_visit = [f'http://{name}/{i}' for i in range(pages)]
+        self.seconds = seconds
+        self.handled = []
+
+    def claim_next(self):
+        return self.urls_to_visit.pop(0) if self.urls_to_visit else None
+
+    def fetch_page(self, url):
+        time.sleep(self.seconds)
+        return url
+
+    def handle_page(self, url, page):
+        self.handled.append(url)
+
+    def handle_error(self, url, e):
+        raise AssertionError(f"{url}: {e}")
+
+
+@pytest.fixture
+def count_waits(monkeypatch):
+    calls = []
+    real_wait = BatchScan.wait
+
+    def counting_wait(*args, **kwargs):
+        calls.append(kwargs.get('timeout'))
+        return real_wait(*args, **kwargs)
+
+    monkeypatch.setattr(BatchScan, 'wait', counting_wait)
+    return calls
+
+
+@pytest.mark.parametrize('connections, per_host, delay', [
+    (1, 1, 0.0),   # the global budget is full while the other site is ready
+    (4, 1, 0.0),   # every site is at its per-host limit
+    (4, 2, 0.05),  # sites wait out their delay between requests
+])
+def test_scheduler_waits_instead_of_spinning(count_waits, connections, per_host, delay):
+    fetcher = SlowFetcher()
+    sites = [SlowSite(f'site{i}', 3, 0.05, fetcher) for i in range(3)]
+    BatchScheduler(sites, connections, per_host, delay).run()
+    assert all(len(site.handled) == 3 for site in sites)
+    # At most one wake per finished request and one per delay expiry
+    assert len(count_waits) <= 2 * 9
+
+
+def test_matcher_goes_only_to_the_file_extractor():
+    matcher = FileMatcher()
+    extractors = make_extractors(['emails', 'pdfs', 'files'], 'http://example.com/', SlowFetcher(),
+                                 probe=True, matcher=matcher)
+    emails, pdfs, files = (extractor.scraper for extractor in extractors)
+    assert files.matcher is matcher and files.probe
+    assert pdfs.probe and not hasattr(pdfs, 'matcher')
+    assert not hasattr(emails, 'matcher') and not hasattr(emails, 'probe')
+
+
+def test_extractor_names_are_stripped():
+    assert extractor_names(' emails, pdfs ,,files') == ['emails', 'pdfs', 'files']
+
+
+def test_unknown_extractor_is_an_error():
+    with pytest.raises(ValueError):
+        make_extractors(['emails', 'phones'], 'http://example.com/', SlowFetcher())
@@ -0,0 +1,70 @@
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from Fetcher import Fetcher, SkippedContent, check_headers, read_capped
+from mock_site import Resource
+from pdfFastScan import PDFScraper
+
+PDF = Resource(200, 'application/pdf', b'%PDF-1.4\n' + b'0' * 4096)
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = Fetcher(http2=False, retries=0)
+    yield fetcher
+    fetcher.close()
+
+
+@pytest.mark.parametrize('headers, max_bytes, types, skipped', [
+    ({'Content-Type': 'text/html; charset=utf-8'}, None, ('html',), False),
+    ({'Content-Type': 'TEXT/HTML'}, None, ('html',), False),
+    ({'Content-Type': 'application/pdf'}, None, ('html',), True),
+    ({}, None, ('html',), False),
+    ({'Content-Length': '2048'}, 1024, None, True),
+    ({'Content-Length': '1024'}, 1024, None, False),
+    ({'Content-Length': 'lots'}, 1024, None, False),
+])
+def test_check_headers(headers, max_bytes, types, skipped):
+    if skipped:
+        with pytest.raises(SkippedContent):
+            check_headers(CaseInsensitiveDict(headers), max_bytes, types)
+    else:
+        check_headers(CaseInsensitiveDict(headers), max_bytes, types)
+
+
+def test_read_capped_stops_at_the_first_chunk_past_the_cap():
+    read = []
+
+    def chunks():
+        for i in range(10):
+            read.append(i)
+            yield b'x' * 100
+
+    assert read_capped(iter([b'ab', b'cd']), 4) == b'abcd'
+    with pytest.raises(SkippedContent):
+        read_capped(chunks(), 250)
+    assert read == [0, 1, 2]
+
+
+def test_fetches_are_gated_on_type_and_size(serve_pages, fetcher):
+    url = serve_pages({'/': '<p>small</p>', '/big': '<p>' + 'x' * 5000 + '</p>', '/doc.pdf': PDF})
+    assert fetcher.get(url, max_bytes=1000, content_types=('html',)).text == '<p>small</p>'
+    with pytest.raises(SkippedContent, match='application/pdf'):
+        fetcher.get(url + 'doc.pdf', content_types=('html',))
+    with pytest.raises(SkippedContent, match='limit 1000'):
+        fetcher.get(url + 'big', max_bytes=1000)
+    # Error pages are returned whatever their type, for raise_for_status
+    assert fetcher.get(url + 'missing', content_types=('pdf',)).status_code == 404
+    summary = fetcher.stats.summary()
+    assert summary['skipped'] == 2 and summary['errors'] == 1
+
+
+def test_scrapers_skip_binary_pages_and_probe_candidates(serve_pages, fetcher):
+    url = serve_pages({'/': '<a href="/doc.pdf">doc</a><a href="/gone.pdf">gone</a>', '/doc.pdf': PDF})
+    scraper = PDFScraper(url, fetcher=fetcher)
+    with pytest.raises(SkippedContent):
+        scraper.fetch_page(url + 'doc.pdf')
+    scraper.probe = True
+    assert scraper.confirm_pdf(url + 'doc.pdf')
+    assert not scraper.confirm_pdf(url + 'gone.pdf')
+    assert not scraper.confirm_pdf(url)
@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import DistributedScan
+from WorkQueue import RemoteQueue, WorkQueue, serve_queue
+
+
+def test_progress_expires_dead_leases(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'))
+    try:
+        queue.add_site('example.com', 'https://example.com/', 10)
+        assert queue.lease('dead-worker', ttl=0.01) == [('https://example.com/', 'example.com')]
+        time.sleep(0.05)
+        progress = queue.progress()
+        assert (progress['ready'], progress['pending'], progress['leased']) == (1, 1, 0)
+        assert queue.lease('live-worker') == [('https://example.com/', 'example.com')]
+    finally:
+        queue.close()
+
+
+def test_remote_workers_see_expired_leases_as_ready(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'))
+    server = serve_queue(queue, 0)
+    remote = RemoteQueue(f'http://127.0.0.1:{server.server_address[1]}')
+    try:
+        queue.add_site('example.com', 'https://example.com/', 10)
+        assert remote.lease('dead-worker', ttl=0.01) == [('https://example.com/', 'example.com')]
+        time.sleep(0.05)
+        assert remote.progress()['ready'] == 1
+        assert remote.lease('live-worker') == [('https://example.com/', 'example.com')]
+    finally:
+        remote.close()
+        server.shutdown()
+        server.server_close()
+        queue.close()
+
+
+class DeadProcess:
+    """A worker process that has already crashed"""
+    exitcode = 1
+
+    def __init__(self, target=None, args=()):
+        pass
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return False
+
+    def join(self):
+        pass
+
+
+class DeadContext:
+    Process = DeadProcess
+
+
+def test_coordinator_stops_when_every_worker_is_dead(tmp_path, monkeypatch, finish_within):
+    monkeypatch.setattr(DistributedScan.multiprocessing, 'get_context', lambda method: DeadContext())
+    seeds = tmp_path / 'seeds.txt'
+    seeds.write_text('https://example.com/\n')
+    args = argparse.Namespace(queue=str(tmp_path / 'queue.db'), seeds=str(seeds), sitemap=False, max_pages=10,
+                              port=None, host='127.0.0.1', spawn=2, poll=0.01, out=str(tmp_path / 'out'),
+                              metrics_port=None)
+    finish_within(10, DistributedScan.run_coordinator, args)
+    assert (tmp_path / 'out' / 'example.com.json').exists()
+
+
+def test_worker_extractor_names_are_stripped():
+    args = argparse.Namespace(extract=' emails, files ', visited='exact', error_rate=0.001, probe=False,
+                              max_page_size=10, priority=False)
+    scraper = DistributedScan.make_scraper(args, 'http://example.com/', None, None, None)
+    assert [extractor.name for extractor in scraper.extractors] == ['emails', 'files']
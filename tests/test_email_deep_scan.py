@@ -0,0 +1,73 @@
+import pytest
+
+from CrawlState import CrawlState
+from EmailDeepScan import EmailScraper
+from Fetcher import Fetcher
+from Frontier import UrlScorer, EMAIL_KEYWORDS
+
+
+class FailingSink:
+    def write(self, kind, value, source=''):
+        raise RuntimeError('sink is full')
+
+
+def site_with_emails():
+    pages = {'/': '<html><body>' + ''.join(f'<a href="/p{i}">{i}</a>' for i in range(6)) + '</body></html>'}
+    for i in range(6):
+        pages[f'/p{i}'] = f'<html><body><p>Write to staff{i}@example.com</p></body></html>'
+    return pages
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_unexpected_errors_stop_the_crawl(serve_pages, finish_within, concurrency):
+    fetcher = Fetcher()
+    try:
+        scraper = EmailScraper(serve_pages(site_with_emails()), fetcher=fetcher, sink=FailingSink())
+        with pytest.raises(RuntimeError, match='sink is full'):
+            finish_within(30, scraper.crawl, max_depth=3, delay=0.0, concurrency=concurrency)
+    finally:
+        fetcher.close()
+
+
+def test_async_crawl_finds_every_email(serve_pages, finish_within):
+    fetcher = Fetcher()
+    try:
+        scraper = EmailScraper(serve_pages(site_with_emails()), fetcher=fetcher)
+        finish_within(30, scraper.crawl, max_depth=3, delay=0.0, concurrency=4)
+    finally:
+        fetcher.close()
+    assert scraper.emails == {f'staff{i}@example.com' for i in range(6)}
+    assert len(scraper.visited) == 7
+
+
+def site_with_two_paths():
+    """/target is two links deep through a low-scored page and three deep
+    through a chain of high-scored ones"""
+    return {
+        '/': '<html><body><a href="/contact">Contact</a> <a href="/misc">Misc</a></body></html>',
+        '/contact': '<html><body><a href="/contact/team/people">Our people</a></body></html>',
+        '/contact/team/people': '<html><body><a href="/target">Target</a></body></html>',
+        '/misc': '<html><body><a href="/target">Target</a></body></html>',
+        '/target': '<html><body><p>Write to target@example.com</p></body></html>',
+    }
+
+
+@pytest.mark.parametrize('with_state', [False, True])
+def test_priority_crawl_claims_pages_at_their_shallowest_depth(serve_pages, finish_within, tmp_path, with_state):
+    start_url = serve_pages(site_with_two_paths())
+
+    def crawl():
+        # SQLite state belongs to the thread that opened it
+        fetcher = Fetcher()
+        state = CrawlState(str(tmp_path / 'state.db')) if with_state else None
+        try:
+            scraper = EmailScraper(start_url, fetcher=fetcher, state=state)
+            scraper.scorer = UrlScorer(EMAIL_KEYWORDS)
+            scraper.crawl(max_depth=2, delay=0.0)
+            return scraper.emails
+        finally:
+            fetcher.close()
+            if state:
+                state.close()
+
+    assert finish_within(30, crawl) == {'target@example.com'}
@@ -0,0 +1,35 @@
+import pytest
+
+from EmailExtract import extract_emails
+
+
+@pytest.mark.parametrize('html, expected', [
+    ('<p>Write to sales@example.com today</p>', {'sales@example.com'}),
+    ('<p>info[at]example(dot)org</p>', {'info@example.org'}),
+    ('<p>info at example dot com</p>', {'info@example.com'}),
+    ('<p>John AT example DOT com</p>', {'John@example.com'}),
+    ('<p>bob at acme dot co dot uk</p>', {'bob@acme.co.uk'}),
+    ('<p>jobs&#64;example&#46;io</p>', {'jobs@example.io'}),
+    ('<a href="mailto:help%40example.net">help</a>', {'help@example.net'}),
+    ('<SCRIPT type="application/ld+json">{"email": "data@example.org"}</SCRIPT>', {'data@example.org'}),
+])
+def test_addresses_are_found(html, expected):
+    assert extract_emails(html) == expected
+
+
+@pytest.mark.parametrize('html', [
+    '<p>We met at Google dot com headquarters</p>',
+    '<p>look at this dot com boom</p>',
+    '<p>Doors open at 10 dot 30</p>',
+    '<p>Meet at noon dot com</p>',
+    '<img src="/img/logo@2x.png">',
+    '<style>@media print { a { color: red } }</style>',
+])
+def test_prose_and_assets_are_not_addresses(html):
+    assert extract_emails(html) == set()
+
+
+def test_script_addresses_need_scripts():
+    html = '<script>var contact = "office@example.com";</script>'
+    assert extract_emails(html) == {'office@example.com'}
+    assert extract_emails(html, scripts=False) == set()
@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+import requests
+from urllib3.util import connection
+
+import Fetcher
+from Fetcher import SkippedContent, get_fetcher, share_fetcher
+from HostCache import HostCache
+
+# Only the fetcher's HostCache knows this name
+TEST_HOST = 'crawl.test'
+
+
+class RecordingHosts(HostCache):
+    """A HostCache that resolves TEST_HOST to the loopback address and records every lookup"""
+    def __init__(self):
+        super().__init__()
+        self.lookups = []
+
+    def resolve(self, host, port, family=0):
+        self.lookups.append(host)
+        return super().resolve('127.0.0.1' if host == TEST_HOST else host, port, family)
+
+
+@pytest.fixture(autouse=True)
+def no_shared_fetcher(monkeypatch):
+    monkeypatch.setattr(Fetcher, '_shared', None)
+
+
+def test_closing_the_shared_fetcher_releases_it():
+    first = get_fetcher()
+    first.close()
+    second = get_fetcher()
+    try:
+        assert second is not first
+        # Closing another fetcher leaves the shared one in place
+        Fetcher.Fetcher(http2=False).close()
+        assert get_fetcher() is second
+    finally:
+        second.close()
+    assert Fetcher._shared is None
+
+
+def test_shared_fetcher_is_returned_everywhere():
+    fetcher = Fetcher.Fetcher(retries=5, http2=False)
+    try:
+        assert share_fetcher(fetcher) is fetcher
+        assert get_fetcher() is fetcher
+        assert share_fetcher(fetcher) is fetcher
+    finally:
+        fetcher.close()
+
+
+def test_second_configuration_is_rejected():
+    first = get_fetcher()
+    second = Fetcher.Fetcher(retries=5, http2=False)
+    try:
+        with pytest.raises(RuntimeError):
+            share_fetcher(second)
+        assert get_fetcher() is first
+    finally:
+        first.close()
+        second.close()
+
+
+def test_fetcher_resolves_through_its_host_cache(serve_pages):
+    url = serve_pages({'/': '<p>hello</p>'}).replace('127.0.0.1', TEST_HOST)
+    hosts = RecordingHosts()
+    fetcher = Fetcher.Fetcher(http2=False, hosts=hosts)
+    try:
+        assert fetcher.get(url).text == '<p>hello</p>'
+        assert hosts.lookups == [TEST_HOST]
+        # Other sessions in the process resolve the usual way
+        with pytest.raises(requests.ConnectionError):
+            requests.get(url, timeout=5)
+        assert hosts.lookups == [TEST_HOST]
+    finally:
+        fetcher.close()
+
+
+def test_http2_client_resolves_through_the_host_cache(serve_pages):
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    url = serve_pages({'/': '<p>hello</p>'}).replace('127.0.0.1', TEST_HOST)
+    hosts = RecordingHosts()
+    fetcher = Fetcher.Fetcher(hosts=hosts)
+    try:
+        assert fetcher.client is not None
+        assert fetcher.get(url).text == '<p>hello</p>'
+        assert hosts.lookups == [TEST_HOST]
+    finally:
+        fetcher.close()
+
+
+def test_importing_metrics_leaves_urllib3_alone():
+    import Metrics  # noqa: F401
+    assert connection.create_connection.__module__ == 'urllib3.util.connection'
+
+
+@pytest.mark.parametrize('http2', [False, True])
+def test_connect_phases_are_timed_on_any_thread(serve_pages, http2):
+    if http2:
+        pytest.importorskip('httpx')
+        pytest.importorskip('h2')
+    url = serve_pages({'/': '<p>hello</p>'})
+    fetcher = Fetcher.Fetcher(http2=http2)
+    try:
+        thread = threading.Thread(target=fetcher.get, args=(url,))
+        thread.start()
+        thread.join(10)
+        snapshot = fetcher.metrics.snapshot()
+        assert snapshot['requests'] == 1
+        assert snapshot['phases']['dns']['count'] == 1
+        assert snapshot['phases']['connect']['count'] == 1
+    finally:
+        fetcher.close()
+
+
+def test_http2_client_answers_like_requests(serve_pages):
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    url = serve_pages({'/': '<p>hello</p>', '/big': '<p>' + 'x' * 5000 + '</p>'})
+    fetcher = Fetcher.Fetcher(retries=0)
+    try:
+        fetcher.resize_pool(64)
+        response = fetcher.get(url)
+        assert isinstance(response, requests.Response)
+        assert response.status_code == 200 and response.text == '<p>hello</p>'
+        assert response.headers['content-type'] == 'text/html; charset=utf-8'
+        assert fetcher.get(url + 'missing').status_code == 404
+        with pytest.raises(SkippedContent):
+            fetcher.get(url + 'big', max_bytes=1000)
+        with pytest.raises(SkippedContent):
+            fetcher.get(url, content_types=('pdf',))
+        assert fetcher.stats.summary()['skipped'] == 2
+    finally:
+        fetcher.close()
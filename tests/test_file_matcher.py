@@ -0,0 +1,49 @@
+import pytest
+
+from bench_matcher import old_is_pdf_link, old_is_sensitive_file, synthetic_urls
+from FileMatcher import FileMatcher, is_pdf_url, load_rules
+
+EDGE_URLS = [
+    'https://example.com', 'https://example.com/', 'https://example.com/.ENV',
+    'https://example.com/files/Report.PDF?download=1#page=2', 'https://example.com/a;jsessionid=1',
+    'https://example.com/dump.sql;v=2', 'https://example.com/pdfs/', 'https://example.com/get-pdf.php',
+    'https://example.com/robots.txt', 'https://example.com/notes.txt', 'https://example.com/web',
+    'https://example.com/index.php~', 'https://example.com/archive.tar.gz', 'https://example.com/a.b.c',
+]
+
+
+@pytest.mark.parametrize('urls', [EDGE_URLS, synthetic_urls(20000)], ids=['edge', 'synthetic'])
+def test_matcher_agrees_with_the_old_checks(urls):
+    matcher = FileMatcher()
+    for url in urls:
+        assert (matcher.classify(url) is not None) == old_is_sensitive_file(url), url
+        assert is_pdf_url(url) == old_is_pdf_link(url), url
+
+
+@pytest.mark.parametrize('url, category', [
+    ('https://example.com/robots.txt', 'config'),
+    ('https://example.com/notes.txt', 'document'),
+    ('https://example.com/index.php.bak', 'backup'),
+    # The leftmost pattern in the name decides
+    ('https://example.com/config.yml.bak', 'config'),
+    ('https://example.com/id_rsa', 'key'),
+    ('https://example.com/about', None),
+])
+def test_categories(url, category):
+    assert FileMatcher().classify(url) == category
+
+
+def test_rules_file_extends_the_defaults(tmp_path):
+    rules = tmp_path / 'rules.txt'
+    rules.write_text('# site specific\nsecret contains .pdf\nsecret name credentials\n')
+    matcher = FileMatcher.with_rules_file(str(rules))
+    assert matcher.classify('https://example.com/credentials') == 'secret'
+    assert matcher.classify('https://example.com/r.pdf') == 'secret'
+    assert matcher.classify('https://example.com/id_rsa') == 'key'
+
+
+def test_bad_rules_line_is_reported(tmp_path):
+    rules = tmp_path / 'rules.txt'
+    rules.write_text('secret startswith cred\n')
+    with pytest.raises(ValueError, match='rules.txt:1'):
+        load_rules(str(rules))
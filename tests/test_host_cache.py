@@ -0,0 +1,33 @@
+import pytest
+
+from HostCache import RobotsRules
+
+
+@pytest.mark.parametrize('status, allowed', [
+    (200, True), (400, True), (401, True), (403, True), (404, True), (429, True),
+    (500, False), (503, False), (None, False),
+])
+def test_robots_status(status, allowed):
+    rules = RobotsRules.from_response(status, 'User-agent: *\nDisallow: /private\n')
+    assert rules.allowed('https://example.com/page') is allowed
+
+
+@pytest.mark.parametrize('field, value, seconds', [
+    ('crawl-delay', '2.5', 2.5),
+    ('request-rate', '1/5', 5.0),
+    ('request-rate', '1/5s', 5.0),
+    ('request-rate', '1/5m', 300.0),
+    ('request-rate', '2/1h', 1800.0),
+    ('request-rate', '1/1d', 86400.0),
+    ('request-rate', '1/10s 0800-1300', 10.0),
+    ('request-rate', '0/5m', None),
+    ('request-rate', 'fast', None),
+])
+def test_parse_delay(field, value, seconds):
+    assert RobotsRules.parse_delay(field, value) == seconds
+
+
+def test_request_rate_applies_to_its_group():
+    rules = RobotsRules('User-agent: *\nRequest-rate: 1/5m\nDisallow: /private\n')
+    assert rules.crawl_delay() == 300.0
+    assert not rules.allowed('https://example.com/private/x')
@@ -0,0 +1,121 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from Fetcher import Fetcher
+from HttpCache import HttpCache
+
+
+class Page:
+    """One page with its validators; `requests` logs (status, conditional headers) per GET"""
+    def __init__(self, body, etag=None, last_modified=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+
+
+@pytest.fixture
+def serve_page():
+    """Serve a Page at / that honours If-None-Match and If-Modified-Since; returns its URL"""
+    servers = []
+
+    def start(page):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                conditional = {name: self.headers[name] for name in ('If-None-Match', 'If-Modified-Since')
+                               if name in self.headers}
+                if page.etag is not None:
+                    fresh = conditional.get('If-None-Match') == page.etag
+                else:
+                    fresh = page.last_modified is not None and \
+                        conditional.get('If-Modified-Since') == page.last_modified
+                status = 304 if fresh else 200
+                page.requests.append((status, conditional))
+                self.send_response(status)
+                if page.etag:
+                    self.send_header('ETag', page.etag)
+                if page.last_modified:
+                    self.send_header('Last-Modified', page.last_modified)
+                body = b'' if fresh else page.body.encode('utf-8')
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}/'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = Fetcher(http2=False, cache=HttpCache(str(tmp_path / 'cache.db')))
+    yield fetcher
+    fetcher.close()
+
+
+def test_etag_revalidation_serves_the_cached_body(serve_page, fetcher):
+    page = Page('<p>v1</p>', etag='"v1"')
+    url = serve_page(page)
+    first = fetcher.get(url)
+    second = fetcher.get(url)
+    assert page.requests == [(200, {}), (304, {'If-None-Match': '"v1"'})]
+    assert not first.from_cache and second.from_cache
+    assert second.status_code == 200 and second.text == '<p>v1</p>'
+    assert second.headers['ETag'] == '"v1"'
+
+
+def test_last_modified_revalidation(serve_page, fetcher):
+    stamp = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    page = Page('<p>dated</p>', last_modified=stamp)
+    url = serve_page(page)
+    fetcher.get(url)
+    response = fetcher.get(url)
+    assert page.requests[1] == (304, {'If-Modified-Since': stamp})
+    assert response.from_cache and response.text == '<p>dated</p>'
+
+
+def test_changed_page_replaces_the_body_and_its_parse(serve_page, fetcher):
+    page = Page('<p>v1</p>', etag='"v1"')
+    url = serve_page(page)
+    parses = []
+
+    def parse(html):
+        parses.append(html)
+        return html.upper()
+
+    assert fetcher.extract(fetcher.get(url), 'upper', parse) == '<P>V1</P>'
+    # Unchanged: neither downloaded nor parsed again
+    assert fetcher.extract(fetcher.get(url), 'upper', parse) == '<P>V1</P>'
+    assert parses == ['<p>v1</p>']
+
+    page.body, page.etag = '<p>v2</p>', '"v2"'
+    response = fetcher.get(url)
+    assert page.requests[-1] == (200, {'If-None-Match': '"v1"'})
+    assert not response.from_cache
+    assert fetcher.extract(response, 'upper', parse) == '<P>V2</P>'
+    assert fetcher.get(url).from_cache
+    assert parses == ['<p>v1</p>', '<p>v2</p>']
+
+
+def test_pages_without_validators_are_not_cached(serve_page, fetcher):
+    page = Page('<p>live</p>')
+    url = serve_page(page)
+    fetcher.get(url)
+    response = fetcher.get(url)
+    assert page.requests == [(200, {}), (200, {})]
+    assert not response.from_cache
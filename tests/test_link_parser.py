@@ -0,0 +1,43 @@
+import pytest
+
+import LinkParser
+from LinkParser import extract_hrefs, extract_links, soup_hrefs, soup_links
+
+PAGES = [
+    '<a href="/a">A</a><a name="top">no href</a><A HREF="/Upper">Up</A>',
+    '<a href="/q?x=1&amp;y=2">and</a><a href="/caf&eacute;">caf&eacute;</a>',
+    '<a href="/first" href="/second">dup</a>',
+    '<p><a href="/nested"><span>deep <b>text</b></span></a></p>',
+    '<a href="/x">one</a> <a href="/x">again</a><a href="/empty"></a>',
+    '<a href=/unquoted>bare</a><a href="">blank</a>',
+    '<script type="application/ld+json">{"url": "https://example.com/org"}</script><a href="/after">after</a>',
+    '<script src="/app.js">var u = "/ignored";</script><a href="/kept">kept</a>',
+    '<a href="/' + 'long' * 40 + '">' + 'word ' * 40 + '</a>',
+]
+
+
+@pytest.mark.parametrize('html', PAGES)
+def test_streaming_parser_matches_soup(html):
+    assert extract_hrefs(html) == soup_hrefs(html)
+    assert extract_links(html) == soup_links(html)
+
+
+def test_other_tags_match_soup():
+    html = '<link rel="stylesheet" href="/s.css"><a href="/a">a</a><area href="/map">'
+    tags = ('a', 'link', 'area')
+    assert extract_hrefs(html, tags) == soup_hrefs(html, tags) == ['/s.css', '/a', '/map']
+
+
+def test_scripts_can_be_left_out():
+    html = '<script>location.href = "/from-js";</script><a href="/a">a</a>'
+    assert extract_hrefs(html, scripts=False) == soup_hrefs(html, scripts=False) == ['/a']
+
+
+def test_unparsable_markup_falls_back_to_soup(monkeypatch):
+    def choke(self, data):
+        raise ValueError('bad markup')
+
+    monkeypatch.setattr(LinkParser.HrefParser, 'feed', choke)
+    html = '<a href="/a">a</a>'
+    assert extract_hrefs(html) == ['/a']
+    assert extract_links(html) == {'hrefs': ['/a'], 'anchors': {'/a': 'a'}}
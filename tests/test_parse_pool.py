@@ -0,0 +1,73 @@
+import contextlib
+import io
+
+import pytest
+
+from CrawlState import CrawlState
+from Fetcher import Fetcher
+from mock_site import Resource
+from pdfFastScan import PDFScraper
+
+PAGES = 30
+
+
+def document_site():
+    pages = {'/': '<html><body>' + ''.join(f'<a href="/p/{i}">{i}</a>' for i in range(PAGES)) + '</body></html>'}
+    for i in range(PAGES):
+        pages[f'/p/{i}'] = f'<html><body><a href="/docs/report-{i}.pdf">Report</a></body></html>'
+    return pages
+
+
+def interrupt_after(fetcher, calls):
+    get = fetcher.get
+    count = [0]
+
+    def interrupting_get(*args, **kwargs):
+        count[0] += 1
+        if count[0] > calls:
+            raise KeyboardInterrupt
+        return get(*args, **kwargs)
+
+    fetcher.get = interrupting_get
+
+
+def scan(start_url, path, resume, interrupt=None):
+    state = CrawlState(path, resume=resume)
+    fetcher = Fetcher(http2=False)
+    if interrupt is not None:
+        interrupt_after(fetcher, interrupt)
+    try:
+        scraper = PDFScraper(start_url, PAGES + 1, fetcher=fetcher, state=state)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.scrape(workers=2)
+        return set(scraper.found_pdfs)
+    finally:
+        state.close()
+        fetcher.close()
+
+
+@pytest.mark.parametrize('interrupt', [3, 12])
+def test_resume_after_interrupted_pipeline_finds_everything(serve_pages, tmp_path, interrupt):
+    start_url = serve_pages(document_site())
+    expected = {start_url + f'docs/report-{i}.pdf' for i in range(PAGES)}
+
+    path = str(tmp_path / 'state.db')
+    partial = scan(start_url, path, resume=False, interrupt=interrupt)
+    assert len(partial) < PAGES
+    assert scan(start_url, path, resume=True) == expected
+
+
+def test_unknown_charset_does_not_stop_the_pipeline(serve_pages):
+    start_url = serve_pages({
+        '/': '<html><body><a href="/bogus">Bogus</a> <a href="/plain">Plain</a></body></html>',
+        '/bogus': Resource(200, 'text/html; charset=x-bogus', b'<a href="/docs/bogus.pdf">Report</a>'),
+        '/plain': '<html><body><a href="/docs/plain.pdf">Report</a></body></html>',
+    })
+    fetcher = Fetcher(http2=False)
+    try:
+        scraper = PDFScraper(start_url, 10, fetcher=fetcher)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.scrape(workers=2)
+    finally:
+        fetcher.close()
+    assert set(scraper.found_pdfs) == {start_url + 'docs/bogus.pdf', start_url + 'docs/plain.pdf'}
@@ -0,0 +1,129 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import RateControl
+from Fetcher import Fetcher
+from mock_site import Resource, serve
+from RateControl import RateController, backoff_delay, parse_retry_after
+
+OK = Resource(200, 'text/html', b'<p>ok</p>')
+
+
+def throttled(retry_after):
+    return Resource(429, 'text/html', b'slow down', headers={'Retry-After': retry_after})
+
+
+class ScriptedSite:
+    """Answers / with the given resources in turn, then with the last one"""
+    start_path = '/'
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.served = 0
+
+    def lookup(self, path):
+        if path != '/':
+            return None
+        self.served += 1
+        return self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+
+
+@pytest.fixture
+def serve_site():
+    servers = []
+
+    def start(site):
+        server, url = serve(site)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_retry_after_forms():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(' 3 ') == 3.0
+    soon = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(soon) <= 30
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.parametrize('attempt', range(8))
+def test_backoff_is_jittered_and_capped(attempt):
+    full = min(10.0, 2 ** attempt)
+    for _ in range(20):
+        assert full * 0.5 <= backoff_delay(attempt, cap=10.0) <= full
+
+
+def test_throttle_halves_concurrency_and_honours_retry_after():
+    rate = RateController(initial_concurrency=4)
+    rate.acquire('example.com')
+    rate.release('example.com', 0.1, 429, retry_after=5.0)
+    host = rate.hosts['example.com']
+    assert host.concurrency == 2 and host.delay == 0.1
+    assert 4.5 < host.blocked_until - time.monotonic() <= 5.0
+
+
+def test_backoff_grows_with_each_strike(monkeypatch):
+    monkeypatch.setattr(RateControl.random, 'uniform', lambda low, high: high)
+    rate = RateController(backoff_base=1.0)
+    pauses = []
+    host = rate.host('example.com')
+    for _ in range(3):
+        # A failed request, once the previous block has passed
+        host.in_flight += 1
+        host.blocked_until = 0.0
+        rate.release('example.com')
+        pauses.append(round(host.blocked_until - time.monotonic()))
+    assert pauses == [1, 2, 4]
+    # A success clears the strikes and lets the delay recover
+    host.in_flight += 1
+    rate.release('example.com', 0.05, 200)
+    assert host.strikes == 0 and host.delay < 0.4
+
+
+def test_fast_windows_grow_concurrency_and_slow_ones_shrink_it():
+    rate = RateController(initial_concurrency=2, max_concurrency=4)
+    host = rate.host('example.com')
+    for latency in [0.1] * 4 + [0.1] * 4 + [0.1] * 4:
+        host.in_flight += 1
+        rate.release('example.com', latency, 200)
+    assert host.concurrency == 4
+    for latency in [1.0] * 4:
+        host.in_flight += 1
+        rate.release('example.com', latency, 200)
+    assert host.concurrency == 3
+
+
+@pytest.mark.parametrize('with_rate', [False, True])
+def test_throttled_request_is_retried_after_retry_after(serve_site, with_rate):
+    site = ScriptedSite(throttled('0'), OK)
+    url = serve_site(site)
+    fetcher = Fetcher(http2=False, retries=2, rate=RateController() if with_rate else None)
+    try:
+        response = fetcher.get(url)
+    finally:
+        fetcher.close()
+    assert response.status_code == 200 and site.served == 2
+
+
+def test_long_retry_after_is_not_waited_out(serve_site):
+    site = ScriptedSite(throttled('3600'), OK)
+    url = serve_site(site)
+    fetcher = Fetcher(http2=False, retries=2)
+    try:
+        start = time.monotonic()
+        response = fetcher.get(url)
+    finally:
+        fetcher.close()
+    assert response.status_code == 429 and site.served == 1
+    assert time.monotonic() - start < 5
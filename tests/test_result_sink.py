@@ -0,0 +1,77 @@
+import csv
+import json
+import threading
+
+import pytest
+
+from ResultSink import CsvSink, JsonlSink, make_sink
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_are_visible_after_flush_every(tmp_path):
+    path = tmp_path / 'found.jsonl'
+    sink = JsonlSink(str(path), flush_every=2, flush_interval=3600)
+    try:
+        sink.write('emails', 'a@example.com', 'https://example.com/')
+        assert path.read_text() == ''
+        sink.write('pdfs', 'https://example.com/r.pdf', 'https://example.com/')
+        rows = read_jsonl(path)
+        assert [(r['kind'], r['value'], r['source']) for r in rows] == [
+            ('emails', 'a@example.com', 'https://example.com/'),
+            ('pdfs', 'https://example.com/r.pdf', 'https://example.com/'),
+        ]
+        assert all(r['time'].endswith('+00:00') for r in rows)
+    finally:
+        sink.close()
+
+
+def test_rows_are_flushed_after_the_interval(tmp_path):
+    path = tmp_path / 'found.jsonl'
+    sink = JsonlSink(str(path), flush_every=1000, flush_interval=0)
+    try:
+        sink.write('emails', 'a@example.com')
+        assert len(read_jsonl(path)) == 1
+    finally:
+        sink.close()
+
+
+def test_csv_append_keeps_a_single_header(tmp_path):
+    path = str(tmp_path / 'found.csv')
+    sink = make_sink(path)
+    assert isinstance(sink, CsvSink)
+    sink.write('files', 'https://example.com/.env', 'https://example.com/')
+    sink.close()
+    sink = make_sink(path, append=True)
+    sink.write('files', 'https://example.com/db.sql', 'https://example.com/')
+    sink.close()
+    rows = read_csv(path)
+    assert [r['value'] for r in rows] == ['https://example.com/.env', 'https://example.com/db.sql']
+
+
+@pytest.mark.parametrize('fmt, reader', [('jsonl', read_jsonl), ('csv', read_csv)])
+def test_concurrent_writes_are_whole_rows(tmp_path, fmt, reader):
+    path = str(tmp_path / f'found.{fmt}')
+    sink = make_sink(path, fmt)
+
+    def write_many(worker):
+        for i in range(200):
+            sink.write('emails', f'user{worker}-{i}@example.com', 'https://example.com/')
+
+    threads = [threading.Thread(target=write_many, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+    assert sink.count == 800
+    assert sorted(r['value'] for r in reader(path)) == sorted(
+        f'user{w}-{i}@example.com' for w in range(4) for i in range(200))
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from EmailExtract import extract_emails
+from LinkParser import extract_hrefs
+from ScriptExtract import script_links, script_texts, script_type
+
+JSON_LD = json.dumps({
+    '@context': 'https://schema.org',
+    '@type': 'Organization',
+    'url': 'https://example.com/',
+    'logo': 'https://example.com/logo.png',
+    'sameAs': ['https://twitter.com/example', '/about'],
+    'email': 'mailto:press@example.com',
+    'description': 'Not a /path under a plain key',
+    'brochure': '/files/brochure.pdf',
+})
+
+NEXT_DATA = json.dumps({'props': {'pageProps': {
+    'posts': [{'href': '/blog/one'}, {'href': '/blog/two'}],
+    'author': {'contact': 'writer@example.com', 'avatar': '/img/me.jpg'},
+}}})
+
+
+def test_json_ld_links_and_addresses():
+    assert script_links('application/ld+json', JSON_LD) == [
+        'https://schema.org', 'https://example.com/', 'https://twitter.com/example', '/about',
+        '/files/brochure.pdf',
+    ]
+    assert script_texts('application/ld+json', JSON_LD) == ['mailto:press@example.com']
+
+
+def test_next_data_is_read_as_json():
+    assert script_links('application/json', NEXT_DATA) == ['/blog/one', '/blog/two']
+    assert script_texts('application/json', NEXT_DATA) == ['writer@example.com']
+
+
+def test_state_objects_assigned_to_globals():
+    body = f'window.__INITIAL_STATE__ = {NEXT_DATA};\nconsole.log("ready");'
+    assert script_links('', body) == ['/blog/one', '/blog/two']
+    assert 'writer@example.com' in script_texts('', body)
+
+
+def test_javascript_literals():
+    body = '''
+        fetch("/api/items");
+        window.open('/popup', '_blank');
+        var cfg = {url: "/from-config", icon: "/favicon.ico", label: "/not-a-link"};
+        location.href = `https://example.com/next`;
+        var mail = "sales@" + "example.com", other = 'team@example.org';
+    '''
+    assert script_links('text/javascript', body) == [
+        '/api/items', '/popup', '/from-config', 'https://example.com/next',
+    ]
+    assert script_texts('text/javascript', body) == ['sales@', 'team@example.org']
+
+
+def test_broken_json_falls_back_to_literals():
+    body = '{"url": "/kept", "contact": "info@example.com",'
+    assert script_links('application/ld+json', body) == ['/kept']
+    assert script_texts('application/ld+json', body) == ['info@example.com']
+
+
+@pytest.mark.parametrize('attrs, expected', [
+    (' type="application/ld+json"', 'application/ld+json'),
+    (" TYPE='Application/JSON' id=x", 'application/json'),
+    (' id="__NEXT_DATA__" type=application/json', 'application/json'),
+    (' async', ''),
+])
+def test_script_type(attrs, expected):
+    assert script_type(attrs) == expected
+
+
+def test_pages_use_their_scripts():
+    html = (f'<script type="application/ld+json">{JSON_LD}</script>'
+            f'<script id="__NEXT_DATA__" type="application/json">{NEXT_DATA}</script>'
+            '<script src="/bundle.js"></script><a href="/plain">plain</a>')
+    assert extract_hrefs(html) == [
+        'https://schema.org', 'https://example.com/', 'https://twitter.com/example', '/about',
+        '/files/brochure.pdf', '/blog/one', '/blog/two', '/plain',
+    ]
+    assert extract_emails(html) == {'press@example.com', 'writer@example.com'}
@@ -0,0 +1,99 @@
+import gzip
+
+from ScanArgs import scan_parser
+from Sitemap import SitemapReader, parse_lastmod, sitemap_seeds
+
+BASE = 'https://example.com'
+
+
+def urlset(*entries):
+    """<urlset> with (loc, lastmod or None) entries"""
+    body = ''.join(f'<url><loc>{BASE}{loc}</loc>' + (f'<lastmod>{mod}</lastmod>' if mod else '') + '</url>'
+                   for loc, mod in entries)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>'
+
+
+def index(*entries):
+    body = ''.join(f'<sitemap><loc>{BASE}{loc}</loc>' + (f'<lastmod>{mod}</lastmod>' if mod else '') + '</sitemap>'
+                   for loc, mod in entries)
+    return f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</sitemapindex>'
+
+
+class SitemapResponse:
+    def __init__(self, body):
+        self.status_code = 200 if body is not None else 404
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+    def close(self):
+        pass
+
+
+class Robots:
+    sitemaps = [BASE + '/sitemap_index.xml']
+
+
+class SitemapFetcher:
+    """Serves {path: body} sitemaps and records which ones were fetched"""
+    def __init__(self, files):
+        self.files = files
+        self.fetched = []
+
+    def robots(self, url):
+        return Robots()
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        path = url[len(BASE):]
+        self.fetched.append(path)
+        return SitemapResponse(self.files.get(path))
+
+
+def site():
+    return SitemapFetcher({
+        '/sitemap_index.xml': index(('/pages.xml.gz', '2024-06-01'), ('/archive.xml', '2019-01-01'),
+                                    ('/more_index.xml', None), ('/sitemap_index.xml', None)),
+        '/pages.xml.gz': gzip.compress(urlset(('/new', '2024-06-01T10:00:00Z'), ('/old', '2020-01-01'),
+                                              ('/undated', None)).encode('utf-8')),
+        '/archive.xml': urlset(('/archived', '2019-01-01')),
+        '/more_index.xml': index(('/text.txt', None)),
+        '/text.txt': f'{BASE}/from-text\n# comment\nhttps://other.example/elsewhere\n',
+    })
+
+
+def test_indexes_are_followed_recursively():
+    fetcher = site()
+    urls = sitemap_seeds(BASE + '/', fetcher)
+    # Newest first, undated last; other hosts are dropped
+    assert urls[0] == BASE + '/new'
+    assert set(urls) == {BASE + p for p in ('/new', '/old', '/undated', '/archived', '/from-text')}
+    # The index listing itself is read once
+    assert sorted(fetcher.fetched) == sorted(['/sitemap_index.xml', '/pages.xml.gz', '/archive.xml',
+                                              '/more_index.xml', '/text.txt'])
+
+
+def test_since_skips_stale_urls_and_sitemaps():
+    fetcher = site()
+    urls = sitemap_seeds(BASE + '/', fetcher, since=parse_lastmod('2021-01-01'))
+    assert set(urls) == {BASE + p for p in ('/new', '/undated', '/from-text')}
+    assert '/archive.xml' not in fetcher.fetched
+
+
+def test_recursion_stops_at_max_depth():
+    fetcher = site()
+    reader = SitemapReader(fetcher, max_depth=1)
+    urls = reader.urls([BASE + '/sitemap_index.xml'])
+    assert BASE + '/from-text' not in urls
+    assert '/text.txt' not in fetcher.fetched
+
+
+def test_missing_sitemap_yields_nothing():
+    fetcher = SitemapFetcher({})
+    assert sitemap_seeds(BASE + '/', fetcher) == []
+
+
+def test_since_option_is_parsed_as_a_utc_date():
+    args = scan_parser('test').parse_args(['--since', '2024-05-01'])
+    assert args.since == parse_lastmod('2024-05-01T00:00:00Z')
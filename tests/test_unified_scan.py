@@ -0,0 +1,34 @@
+from collections import Counter
+from urllib.parse import urlparse
+
+from Fetcher import Fetcher
+from UnifiedScan import UnifiedScraper
+
+
+def linked_site():
+    """Pages that link to each other, a PDF and a backup, with one address each"""
+    links = '<a href="/">home</a><a href="/a">a</a><a href="/b?utm_source=x">b</a>' \
+            '<a href="/docs/report.pdf">report</a><a href="/backup.sql">backup</a>'
+    return {path: f'<html><body>{links}<p>{name}@example.com</p></body></html>'
+            for path, name in (('/', 'home'), ('/a', 'alice'), ('/b', 'bob'))}
+
+
+def test_one_crawl_feeds_every_extractor(serve_pages, finish_within):
+    fetcher = Fetcher(http2=False)
+    try:
+        start_url = serve_pages(linked_site())
+        scraper = UnifiedScraper(start_url, fetcher=fetcher)
+        finish_within(30, scraper.scrape)
+    finally:
+        fetcher.close()
+
+    emails, pdfs, files = (extractor.results() for extractor in scraper.extractors)
+    assert set(emails) == {'home@example.com', 'alice@example.com', 'bob@example.com'}
+    assert set(pdfs) == {start_url + 'docs/report.pdf'}
+    # Every extractor sees every link, so the PDF is a document finding too
+    assert set(files) == {start_url + 'backup.sql', start_url + 'docs/report.pdf'}
+    # Every page is fetched once, however many extractors and links point at it;
+    # downloads claimed by an extractor are never crawled
+    fetched = Counter(urlparse(url).path for url, *_ in fetcher.stats.recent)
+    assert fetched == {'/robots.txt': 1, '/': 1, '/a': 1, '/b': 1}
+    assert set(scraper.enqueued) == {start_url, start_url + 'a', start_url + 'b'}
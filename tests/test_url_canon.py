@@ -0,0 +1,14 @@
+import pytest
+
+from UrlCanon import canonicalize
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTP://Example.COM:80/a/./b/../c?b=2&a=1#top', 'http://example.com/a/c?a=1&b=2'),
+    ('https://example.com?utm_source=x&id=7', 'https://example.com/?id=7'),
+    ('https://example.com/?a=1&a=0', 'https://example.com/?a=1&a=0'),
+    ('https://example.com/?b=1&a=2&b=0&a=1', 'https://example.com/?a=2&a=1&b=1&b=0'),
+    ('mailto:someone@example.com', 'mailto:someone@example.com'),
+])
+def test_canonicalize(url, expected):
+    assert canonicalize(url) == expected
@@ -0,0 +1,49 @@
+import pytest
+
+from VisitedStore import BloomFilter, HashedURLSet, ScalableBloomFilter, make_visited_store
+
+
+def urls(prefix, count):
+    return [f'https://example.com/{prefix}/{i}' for i in range(count)]
+
+
+def false_positive_rate(store, probes):
+    return sum(url in store for url in probes) / len(probes)
+
+
+@pytest.mark.parametrize('error_rate', [0.01, 0.001])
+def test_bloom_filter_at_capacity_stays_near_its_rate(error_rate):
+    bloom = BloomFilter(5000, error_rate)
+    seen = urls('seen', 5000)
+    for url in seen:
+        bloom.add(url)
+    assert all(url in bloom for url in seen)
+    assert false_positive_rate(bloom, urls('new', 50000)) <= 2 * error_rate
+
+
+def test_scalable_bloom_filter_keeps_its_bound_while_growing():
+    bloom = ScalableBloomFilter(error_rate=0.01, initial_capacity=500)
+    seen = urls('seen', 10000)
+    for url in seen:
+        bloom.add(url)
+    # 500 + 1000 + 2000 + 4000 + 8000 capacity
+    assert len(bloom.filters) == 5
+    assert len(bloom) <= len(seen)
+    assert all(url in bloom for url in seen)
+    assert false_positive_rate(bloom, urls('new', 50000)) <= 0.01
+
+
+def test_hashed_set_is_exact_across_growth():
+    store = HashedURLSet(capacity=4)
+    seen = urls('seen', 2000)
+    for url in seen + seen[:100]:
+        store.add(url)
+    assert len(store) == 2000
+    assert all(url in store for url in seen)
+    assert not any(url in store for url in urls('new', 2000))
+
+
+def test_unknown_store_is_rejected():
+    assert make_visited_store('exact') == set()
+    with pytest.raises(ValueError):
+        make_visited_store('cuckoo')